@@ -1,11 +1,6 @@
 import logging
 import numpy as np
-from pandas import array
 from random import randint
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.ensemble import VotingRegressor
-from sklearn.neighbors import KNeighborsRegressor
 from time import time
 from typing import cast
 import random
@@ -34,6 +29,9 @@ from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
 from agents.template_agent.utils.opponent_model import OpponentModel
+from utils.turn_context import TurnContext
+
+from .utils.time_forecaster import OpponentTimeForecaster
 
 
 class BIU_agent(DefaultParty):
@@ -61,6 +59,11 @@ class BIU_agent(DefaultParty):
         self.bids_received: list = None
         self.proposal_time: float = None
         self.opponent_bid_times: list = None
+        self.time_forecaster: OpponentTimeForecaster = None
+        # refit the regression ensemble every n turns near the deadline, 0 to never use it
+        self.ensemble_every: int = 0
+        self.ensemble_turns: int = 0
+        self.ensemble_time: float = None
 
     def notifyChange(self, data: Inform):
         """MUST BE IMPLEMENTED
@@ -92,6 +95,8 @@ class BIU_agent(DefaultParty):
             profile_connection.close()
 
             self.opponent_bid_times = []
+            self.time_forecaster = OpponentTimeForecaster(window=10)
+            self.ensemble_every = self.parameters.get("ensemble_every") or 0
 
         # ActionDone informs you of an action (an offer or an accept)
         # that is performed by one of the agents (including yourself).
@@ -110,7 +115,9 @@ class BIU_agent(DefaultParty):
         elif isinstance(data, YourTurn):
             # execute a turn
             if self.proposal_time is not None:
-                self.opponent_bid_times.append(self.progress.get(time() * 1000) - self.proposal_time)
+                bid_time = self.progress.get(time() * 1000) - self.proposal_time
+                self.opponent_bid_times.append(bid_time)
+                self.time_forecaster.update(bid_time)
             self.my_turn()
             self.proposal_time = self.progress.get(time() * 1000)
 
@@ -177,17 +184,20 @@ class BIU_agent(DefaultParty):
         """This method is called when it is our turn. It should decide upon an action
         to perform and send this action to the opponent.
         """
-        if self.accept_condition(self.last_received_bid):
+        # snapshot of the progress that is shared by all decisions in this turn
+        context = TurnContext(self.progress)
+
+        if self.accept_condition(self.last_received_bid, context):
             action = Accept(self.me, self.last_received_bid)
         else:
-            t = self.progress.get(time() * 1000)
+            t = context.progress
             self.logger.log(logging.INFO, t)
-            bid = self.find_bid()
+            bid = self.find_bid(context)
             if t >= 0.95:
-                t_o = self.regression_opponent_time(self.opponent_bid_times[-10:])
+                t_o = self.predict_opponent_time()
                 self.logger.log(logging.INFO, self.opponent_bid_times)
                 self.logger.log(logging.INFO, t_o)
-                while all(t < 1 - t_o):
+                while t < 1 - t_o:
                     t = self.progress.get(time() * 1000)
             action = Offer(self.me, bid)
 
@@ -207,12 +217,12 @@ class BIU_agent(DefaultParty):
     ################################## Example methods below ##################################
     ###########################################################################################
 
-    def accept_condition(self, bid: Bid) -> bool:
+    def accept_condition(self, bid: Bid, context: TurnContext) -> bool:
         if bid is None:
             return False
 
         # progress of the negotiation session between 0 and 1 (1 is deadline)
-        progress = self.progress.get(time() * 1000)
+        progress = context.progress
 
         # very basic approach that accepts if the offer is valued above 0.7 and
         # 95% of the time towards the deadline has passed
@@ -233,7 +243,7 @@ class BIU_agent(DefaultParty):
         ]
         return all(conditions)
 
-    def find_bid(self) -> Bid:
+    def find_bid(self, context: TurnContext) -> Bid:
         # compose a list of all possible bids
         domain = self.profile.getDomain()
         all_bids = AllBidsList(domain)
@@ -244,17 +254,18 @@ class BIU_agent(DefaultParty):
         # take 500 attempts to find a bid according to a heuristic score
         for _ in range(500):
             bid = all_bids.get(randint(0, all_bids.size() - 1))
-            bid_score = self.score_bid(bid)
+            bid_score = self.score_bid(bid, context)
             if bid_score > best_bid_score:
                 best_bid_score, best_bid = bid_score, bid
 
         return best_bid
 
-    def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.5) -> float:
+    def score_bid(self, bid: Bid, context: TurnContext, alpha: float = 0.95, eps: float = 0.5) -> float:
         """Calculate heuristic score for a bid
 
         Args:
             bid (Bid): Bid to score
+            context (TurnContext): progress and derived quantities of the current turn
             alpha (float, optional): Trade-off factor between self interested and
                 altruistic behaviour. Defaults to 0.95.
             eps (float, optional): Time pressure factor, balances between conceding
@@ -289,15 +300,13 @@ class BIU_agent(DefaultParty):
             stochastic_alpha = alpha + eps
             stochastic_eps = -0.005
         
-        progress = self.progress.get(time() * 1000)
-
         utility = float(self.profile.getUtility(bid))
 
-        time_pressure = 1.0 - progress ** (1 / eps)
+        time_pressure = context.time_pressure(eps)
         score = stochastic_alpha * time_pressure * utility
 
         if self.opponent_model is not None:
-            opponent_utility = self.opponent_model.get_predicted_utility(bid)
+            opponent_utility = context.opponent_utility(self.opponent_model, bid)
             opponent_score = (1.0 - stochastic_alpha * time_pressure) * opponent_utility
             score += opponent_score
         if utility > 0.994 and stochastic_eps > 0:
@@ -309,11 +318,29 @@ class BIU_agent(DefaultParty):
         
 
 
+    def predict_opponent_time(self) -> float:
+        """Upper bound of the predicted time of the next opponent bid. Optionally combined
+        with the regression ensemble, which is only refitted every `ensemble_every` turns.
+        """
+        _, _, t_o = self.time_forecaster.predict()
+        if self.ensemble_every > 0 and len(self.opponent_bid_times) >= 5:
+            if self.ensemble_time is None or self.ensemble_turns >= self.ensemble_every:
+                self.ensemble_time = float(max(self.regression_opponent_time(self.opponent_bid_times[-10:])))
+                self.ensemble_turns = 0
+            self.ensemble_turns += 1
+            t_o = max(t_o, self.ensemble_time)
+        return t_o
+
     def regression_opponent_time(self, bid_times):
+        # scikit-learn is slow to import, only load it when the ensemble is used
+        from sklearn.ensemble import RandomForestRegressor, VotingRegressor
+        from sklearn.linear_model import LinearRegression
+        from sklearn.neighbors import KNeighborsRegressor
+
         r1 = LinearRegression()
         r2 = RandomForestRegressor(n_estimators=10, random_state=1)
         r3 = KNeighborsRegressor()
-        X = array(range(len(bid_times))).reshape(-1, 1)
-        y = array(bid_times).reshape(-1, 1)
+        X = np.arange(len(bid_times)).reshape(-1, 1)
+        y = np.array(bid_times)
         er = VotingRegressor([('lr', r1), ('rf', r2), ('r3', r3)])        
         return er.fit(X, y).predict(X)
\ No newline at end of file
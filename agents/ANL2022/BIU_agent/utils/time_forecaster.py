@@ -0,0 +1,79 @@
+import math
+from collections import deque
+from typing import Tuple
+
+
+class OpponentTimeForecaster:
+    """Forecasts the time the opponent needs for its next bid, with constant cost per update.
+
+    A least squares line is fitted over a sliding window of the last response times
+    (kept as running sums, so an update does not refit anything) and combined with an
+    exponentially smoothed level. The smoothed squared forecast error gives a prediction
+    interval.
+
+    Args:
+        window (int, optional): number of recent response times for the trend. Defaults to 10.
+        alpha (float, optional): smoothing factor of the level and the error. Defaults to 0.3.
+        z (float, optional): width of the prediction interval in standard deviations. Defaults to 1.96.
+    """
+
+    def __init__(self, window: int = 10, alpha: float = 0.3, z: float = 1.96):
+        self.window = window
+        self.alpha = alpha
+        self.z = z
+
+        self.times = deque()
+        self.count = 0
+        # running sums of x, y, x*x and x*y over the window, x is the index of the response
+        self.sum_x = self.sum_y = self.sum_xx = self.sum_xy = 0.0
+        self.level: float = None
+        self.squared_error: float = None
+
+    def update(self, response_time: float):
+        if self.count > 0:
+            error = response_time - self.forecast()
+            if self.squared_error is None:
+                self.squared_error = error**2
+            else:
+                self.squared_error += self.alpha * (error**2 - self.squared_error)
+
+        x = float(self.count)
+        self.times.append((x, response_time))
+        self.sum_x += x
+        self.sum_y += response_time
+        self.sum_xx += x * x
+        self.sum_xy += x * response_time
+        if len(self.times) > self.window:
+            old_x, old_y = self.times.popleft()
+            self.sum_x -= old_x
+            self.sum_y -= old_y
+            self.sum_xx -= old_x * old_x
+            self.sum_xy -= old_x * old_y
+
+        if self.level is None:
+            self.level = response_time
+        else:
+            self.level += self.alpha * (response_time - self.level)
+        self.count += 1
+
+    def _trend(self, x: float) -> float:
+        n = len(self.times)
+        denominator = n * self.sum_xx - self.sum_x**2
+        if n < 2 or denominator <= 0:
+            return self.level
+        slope = (n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+        intercept = (self.sum_y - slope * self.sum_x) / n
+        return intercept + slope * x
+
+    def forecast(self) -> float:
+        """Expected time of the next response, 0 if no response was seen yet."""
+        if self.count == 0:
+            return 0.0
+        # average of the local trend and the smoothed level, never negative
+        return max(0.0, (self._trend(float(self.count)) + self.level) / 2)
+
+    def predict(self) -> Tuple[float, float, float]:
+        """Forecast of the next response time with the lower and upper bound of its prediction interval."""
+        forecast = self.forecast()
+        spread = self.z * math.sqrt(self.squared_error) if self.squared_error else 0.0
+        return forecast, max(0.0, forecast - spread), forecast + spread
@@ -40,6 +40,7 @@ from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
 from .utils.opponent_model import OpponentModel
 from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
 from agents.time_dependent_agent.extended_util_space import ExtendedUtilSpace
+from utils.agent_storage import AgentStorage
 from decimal import Decimal
 from geniusweb.opponentmodel import FrequencyOpponentModel
 
@@ -357,7 +358,7 @@ class LuckyAgent2022(DefaultParty):
 
     def _updateUtilSpace(self) -> LinearAdditive:  # throws IOException
         newutilspace = self.profile
-        if not newutilspace == self._utilspace:
+        if newutilspace is not self._utilspace and newutilspace != self._utilspace:
             self._utilspace = cast(LinearAdditive, newutilspace)
             self._extendedspace = ExtendedUtilSpace(self._utilspace)
         return self._utilspace
@@ -369,56 +370,17 @@ class LuckyAgent2022(DefaultParty):
         """
         # **************************************************
 
-        c_data = {}
-        if os.path.isfile(f"{self.storage_dir}/c_data_{self.other}"):
-            # OLD
-            # dbfile_c = open(f"{self.storage_dir}/c_data", 'rb')
-            # c_data = pickle.load(dbfile_c)
-            # dbfile_c.close()
-            # NEW
-            with open(f"{self.storage_dir}/c_data_{self.other}", 'r') as dbfile_c:
-                c_data = json.load(dbfile_c)
-
-        if os.path.exists(f"{self.storage_dir}/c_data_{self.other}"):
-            os.remove(f"{self.storage_dir}/c_data_{self.other}")
-
-        c_data[self.other] = self.condition_d
-        # OLD
-        # dbfile_c = open(f"{self.storage_dir}/c_data", 'ab')
-        # pickle.dump(c_data, dbfile_c)
-        # dbfile_c.close()
-        # NEW
-        with open(f"{self.storage_dir}/c_data_{self.other}", 'w') as dbfile_c:
-            json.dump(c_data, dbfile_c, indent=2)
-
-        m_data = {}
-        if os.path.isfile(f"{self.storage_dir}/m_data_{self.other}"):
-            # OLD
-            # dbfile = open(f"{self.storage_dir}/m_data", 'rb')
-            # m_data = pickle.load(dbfile)
-            # dbfile.close()
-            # NEW
-            with open(f"{self.storage_dir}/m_data_{self.other}", 'r') as dbfile:
-                m_data = json.load(dbfile)
-
-
-        if os.path.exists(f"{self.storage_dir}/m_data_{self.other}"):
-            os.remove(f"{self.storage_dir}/m_data_{self.other}")
+        # read-modify-write under a lock with an atomic replace instead of deleting and rewriting
+        # the files, so parallel sessions against the same opponent do not lose or corrupt data
+        storage = AgentStorage(self.storage_dir)
+
+        def set_condition(c_data):
+            c_data[self.other] = self.condition_d
+
+        storage.update_json(f"c_data_{self.other}", set_condition, {}, indent=2)
 
         m_tuple = (self.agreement_utility, self.min, self.e)
-        if self.other in m_data:
-            m_data[self.other].append(m_tuple)
-        else:
-            m_data[self.other] = [m_tuple, ]
-
-        # OLD
-        # dbfile = open(f"{self.storage_dir}/m_data", 'ab')
-        # # source, destination
-        # pickle.dump(m_data, dbfile)
-        # dbfile.close()
-        # NEW
-        with open(f"{self.storage_dir}/m_data_{self.other}", 'w') as dbfile:
-            json.dump(m_data, dbfile, indent=2)
+        storage.append_records(f"m_data_{self.other}", [m_tuple], key=self.other, indent=2)
 
     ###########################################################################################
     ################################## Example methods below ##################################
@@ -1,11 +1,15 @@
 import json
 import random
-import pandas as pd
-import lightgbm as lgb
 
 from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.issuevalue.Bid import Bid
 
+from utils.lazy_import import lazy_import, load
+
+# pandas and lightgbm are slow to import, they are loaded on first use
+pd = lazy_import("pandas")
+lgb = lazy_import("lightgbm")
+
 
 class Pinar_Agent_Brain:
     def __init__(self):
@@ -82,6 +86,8 @@ class Pinar_Agent_Brain:
             self.Y = pd.concat([self.Y, new])
 
     def fill_domain_and_profile(self, domain, profile):
+        # called with the Settings, load lightgbm now instead of in the first turn that trains a model
+        load(lgb)
         self.domain = domain
         self.profile = profile
         self.reservationBid = self.profile.getReservationBid()
@@ -8,7 +8,6 @@ from typing import cast
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -24,6 +23,8 @@ from geniusweb.progress.Progress import Progress
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from utils.compact_bid import BidCodec
+
 NUM_OF_MOVES_FOR_EXPLORE = 800
 
 
@@ -164,7 +165,7 @@ class Agent4410(DefaultParty):
         if not self._explore_state:
             self.getReporter().log(logging.INFO, "Changing state to exploit!")
 
-        return Offer(self._me, next_bid)
+        return Offer(self._me, next_bid.to_bid())
 
     def _update_response_tracking(self):
         last_bid_issue_values = self._last_received_bid.getIssueValues()
@@ -204,7 +205,8 @@ class Agent4410(DefaultParty):
         self._sorted_bids = sorted(self._sorted_bids_to_utility, key=lambda bid: self._sorted_bids_to_utility[bid],
                                    reverse=True)
         # TODO: Smart randomaization by time left (maybe add sleep if we have lots of time (to scare timebase opponents))
-        return Offer(self._me, self._sorted_bids[randrange(round(len(self._sorted_bids) * self._precent_of_bids))])
+        next_bid = self._sorted_bids[randrange(round(len(self._sorted_bids) * self._precent_of_bids))]
+        return Offer(self._me, next_bid.to_bid())
 
     def _load_opponent_weights(self):
         self._opponent_weights = {}
@@ -249,8 +251,9 @@ class Agent4410(DefaultParty):
         profile = self._profile.getProfile()
         domain = self._profile.getProfile().getDomain()
 
-        all_bids = AllBidsList(domain)
-        self._bid_to_utility = {bid: profile.getUtility(bid) for bid in all_bids}
+        # compact bids keep the full bid space small, they are only converted when offered
+        all_bids = BidCodec(domain)
+        self._bid_to_utility = {bid: profile.getUtility(bid.to_bid()) for bid in all_bids}
 
         # For Future uses
         self._sorted_bids_to_utility = {k: v for k, v in
@@ -1,6 +1,5 @@
 import logging
 from random import randint,uniform
-from time import time
 from typing import cast
 
 from geniusweb.actions.Accept import Accept
@@ -34,6 +33,7 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
+from utils.turn_context import TurnContext
 
 from .utils.opponent_model import OpponentModel
 
@@ -195,14 +195,17 @@ class AgentFish(DefaultParty):
         """This method is called when it is our turn. It should decide upon an action
         to perform and send this action to the opponent.
         """
+        # snapshot of the progress that is shared by all decisions in this turn
+        context = TurnContext(self.progress)
+
         # check if the last received offer is good enough
         self.updateUtilSpace()
-        if self.accept_condition(self.last_received_bid):
+        if self.accept_condition(self.last_received_bid, context):
             # if so, accept the offer
             action = Accept(self.me, self.last_received_bid)
         else:
             # if not, find a bid to propose as counter offer
-            bid = self.makeBid()
+            bid = self.makeBid(context)
             action = Offer(self.me, bid)
 
         # send the action
@@ -210,17 +213,18 @@ class AgentFish(DefaultParty):
 
     def updateUtilSpace(self) -> LinearAdditive:  # throws IOException
         newutilspace = self.profile
-        if not newutilspace == self.utilspace:
+        if newutilspace is not self.utilspace and newutilspace != self.utilspace:
             self.utilspace = cast(LinearAdditive, newutilspace)
             self.extendedspace = ExtendedUtilSpace(self.utilspace)
         return self.utilspace
 
-    def makeBid(self) -> Bid:
+    def makeBid(self, context: TurnContext) -> Bid:
         """
+        @param context progress of the current turn
         @return next possible bid with current target utility, or null if no such
                 bid.
         """
-        time_to_deadline = self.progress.get(time() * 1000)
+        time_to_deadline = context.progress
 
         utilityGoal = self.getUtilityGoal(
             time_to_deadline,
@@ -270,12 +274,12 @@ class AgentFish(DefaultParty):
     ################################## Example methods below ##################################
     ###########################################################################################
 
-    def accept_condition(self, bid: Bid) -> bool:
+    def accept_condition(self, bid: Bid, context: TurnContext) -> bool:
         if bid is None:
             return False
 
         # progress of the negotiation session between 0 and 1 (1 is deadline)
-        progress = self.progress.get(time() * 1000)
+        progress = context.progress
 
         # very basic approach that accepts if the offer is valued above 0.7 and
         # 95% of the time towards the deadline has passed
@@ -290,11 +294,12 @@ class AgentFish(DefaultParty):
         ]
         return all([any(conditions), progress > 0.1])
 
-    def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.1) -> float:
+    def score_bid(self, bid: Bid, context: TurnContext, alpha: float = 0.95, eps: float = 0.1) -> float:
         """Calculate heuristic score for a bid
 
         Args:
             bid (Bid): Bid to score
+            context (TurnContext): progress and derived quantities of the current turn
             alpha (float, optional): Trade-off factor between self interested and
                 altruistic behaviour. Defaults to 0.95.
             eps (float, optional): Time pressure factor, balances between conceding
@@ -303,15 +308,13 @@ class AgentFish(DefaultParty):
         Returns:
             float: score
         """
-        progress = self.progress.get(time() * 1000)
-
         our_utility = float(self.profile.getUtility(bid))
 
-        time_pressure = 1.0 - progress ** (1 / eps)
+        time_pressure = context.time_pressure(eps)
         score = alpha * time_pressure * our_utility
 
         if self.opponent_model is not None:
-            opponent_utility = self.opponent_model.get_predicted_utility(bid)
+            opponent_utility = context.opponent_utility(self.opponent_model, bid)
             opponent_score = (1.0 - alpha * time_pressure) * opponent_utility
             score += opponent_score
 
@@ -38,6 +38,8 @@ from geniusweb.references.Parameters import Parameters
 from numpy import long
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from utils.anytime_search import TurnBudget, anytime_best, candidate_bids
+
 from .LearnedData import LearnedData
 from .NegotiationData import NegotiationData
 from .Pair import Pair
@@ -58,6 +60,7 @@ class CompromisingAgent(DefaultParty):
         self.lastReceivedBid: Bid = None
         self.me: PartyId = None
         self.progress: ProgressTime = None
+        self.turn_budget = TurnBudget()
         self.protocol: str = None
         self.parameters: Parameters = None
         self.utilitySpace: UtilitySpace = None
@@ -360,6 +363,7 @@ class CompromisingAgent(DefaultParty):
     # send our next offer
     def myTurn(self):
         action: Action = None
+        search_budget_s = self.turn_budget.start_turn(self.progress)
 
         # save average of the last avgSplit offers (only when frequency table is stabilized)
         if self.isNearNegotiationEnd() > 0:
@@ -400,33 +404,13 @@ class CompromisingAgent(DefaultParty):
                     bid)) else self.optimalBid  # if the last bid isn't good, offer (default) the optimal bid
 
             elif isNearNegotiationEnd == 1:
-                if self.progress.get(int(time.time() * 1000)) > 0.95:
-                    maxOpponentUtility: float = 0.0
-                    maxBid: Bid = None
-                    i = 0
-                    while i < 10000 and self.progress.get(int(time.time() * 1000)) < 0.99:
-                        i: long = randint(0, self.allBidList.size())
-                        bid = self.allBidList.get(i)
-                        if self.isGood(bid) and self.isOpGood(bid):
-                            opValue = self.calcOpValue(bid)
-                            if opValue > maxOpponentUtility:
-                                maxOpponentUtility = opValue
-                                maxBid = bid
-                        i += 1
-                    bid = maxBid
-                else:
-                    # look for bid with max utility for opponent
-                    maxOpponentUtility: float = 0.0
-                    maxBid: Bid = None
-                    for i in range(2000):
-                        i: long = randint(0, self.allBidList.size())
-                        bid = self.allBidList.get(i)
-                        if self.isGood(bid) and self.isOpGood(bid):
-                            opValue = self.calcOpValue(bid)
-                            if opValue > maxOpponentUtility:
-                                maxOpponentUtility = opValue
-                                maxBid = bid
-                    bid = maxBid
+                # look for the good bid with max utility for the opponent, as long as the search budget
+                # of this turn (derived from the time left and the opponent's turn times) allows
+                bid, _, _ = anytime_best(
+                    candidate_bids(self.allBidList),
+                    lambda bid: self.calcOpValue(bid) if self.isGood(bid) and self.isOpGood(bid) else None,
+                    search_budget_s,
+                )
 
                 bid = bid if self.isGood(
                     bid) else self.optimalBid  # if the last bid isn't good, offer (default) the optimal bid
@@ -439,6 +423,7 @@ class CompromisingAgent(DefaultParty):
 
         # Send action
         self.getConnection().send(action)
+        self.turn_budget.end_turn()
 
     def isGood(self, bid: Bid):
         """ The method checks if a bid is good.
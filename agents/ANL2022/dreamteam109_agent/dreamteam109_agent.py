@@ -32,6 +32,12 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
+from utils.agent_storage import AgentStorage
+from utils.kbest_bids import KBestBids
+from utils.reporting import LazyMessage
+from utils.turn_context import TurnContext
+from utils.utility_evaluator import UtilityEvaluator
+
 from .utils.logger import Logger
 
 from .utils.opponent_model import OpponentModel
@@ -57,6 +63,7 @@ class DreamTeam109Agent(DefaultParty):
         self.domain: Domain = None
         self.parameters: Parameters = None
         self.profile: LinearAdditiveUtilitySpace = None
+        self.evaluator: UtilityEvaluator = None
         self.progress: ProgressTime = None
         self.me: PartyId = None
         self.other: PartyId = None
@@ -69,7 +76,7 @@ class DreamTeam109Agent(DefaultParty):
         self.last_received_bid: Bid = None
         self.opponent_model: OpponentModel = None
         self.all_bids: AllBidsList = None
-        self.bids_with_utilities: list[tuple[Bid, float]] = None
+        self.bids_with_utilities: KBestBids = None
         self.num_of_top_bids: int = 1
         self.min_util: float = 0.9
 
@@ -110,6 +117,8 @@ class DreamTeam109Agent(DefaultParty):
                 data.getProfile().getURI(), self.getReporter()
             )
             self.profile = profile_connection.getProfile()
+            # float lookup tables for fast evaluation of our own utility
+            self.evaluator = UtilityEvaluator(self.profile)
             self.domain = self.profile.getDomain()
             # compose a list of all possible bids
             self.all_bids = AllBidsList(self.domain)
@@ -223,17 +232,20 @@ class DreamTeam109Agent(DefaultParty):
             self.avg_time = sum(self.round_times[-3:])/3
         self.last_time = datetime.datetime.now()
 
+        # snapshot of the progress that is shared by all decisions in this turn
+        context = TurnContext(self.progress)
+
         # check if the last received offer is good enough
         # if self.accept_condition(self.last_received_bid):
-        if self.accept_condition(self.last_received_bid):
-            self.logger.log(logging.INFO, "accepting bid : " + bid_to_string(self.last_received_bid))
+        if self.accept_condition(self.last_received_bid, context):
+            self.logger.log(logging.INFO, LazyMessage(lambda: "accepting bid : " + bid_to_string(self.last_received_bid)))
             # if so, accept the offer
             action = Accept(self.me, self.last_received_bid)
             self.did_accept = True
         else:
             # if not, find a bid to propose as counter offer
-            bid = self.find_bid()
-            self.logger.log(logging.INFO, "Offering bid : " + bid_to_string(bid))
+            bid = self.find_bid(context)
+            self.logger.log(logging.INFO, LazyMessage(lambda: "Offering bid : " + bid_to_string(bid)))
             action = Offer(self.me, bid)
 
         # send the action
@@ -280,9 +292,11 @@ class DreamTeam109Agent(DefaultParty):
         if self.other_name is None:
             self.logger.log(logging.WARNING, "Opponent name was not set; skipping save data")
         else:
-            json_data = json.dumps(self.data_dict, sort_keys=True, indent=4)
-            with open(self.get_data_file_path(), "w") as f:
-                f.write(json_data)
+            # merge this session into the file as it is now, so parallel sessions against
+            # the same opponent do not overwrite each other's sessions
+            self.data_dict = AgentStorage(self.storage_dir).append_records(
+                f"{self.other_name}.json", self.data_dict["sessions"][-1:], key="sessions", sort_keys=True, indent=4
+            )
             self.logger.log(logging.INFO, "Saved data about opponent: " + self.other_name)
 
     def learn_from_past_sessions(self, sessions: list[SessionData]):
@@ -300,18 +314,17 @@ class DreamTeam109Agent(DefaultParty):
     def low_utility(self, session: SessionData):
         return session["utilityAtFinish"] < 0.5
 
-    def accept_condition(self, bid: Bid) -> bool:
+    def accept_condition(self, bid: Bid, context: TurnContext) -> bool:
         if bid is None:
             return False
 
         # progress of the negotiation session between 0 and 1 (1 is deadline)
-        progress = self.progress.get(time.time() * 1000)
+        progress = context.progress
         threshold = 0.98
-        light_threshold = 0.95
+        light_threshold = context.cached("light_threshold", self.get_light_threshold)
 
         if self.avg_time is not None: 
             threshold = 1 - 1000 * self.force_accept_at_remaining_turns * self.avg_time / self.progress.getDuration()
-            light_threshold = 1 - 5000 * self.force_accept_at_remaining_turns_light * self.avg_time / self.progress.getDuration()
 
         conditions = [
             self.profile.getUtility(bid) >= self.min_util,
@@ -320,36 +333,28 @@ class DreamTeam109Agent(DefaultParty):
         ]
         return any(conditions)
 
-    def find_bid(self) -> Bid:
+    def get_light_threshold(self) -> float:
+        # progress after which good bids are accepted and the best bid of the opponent is offered
+        if self.avg_time is None:
+            return 0.95
+        return 1 - 5000 * self.force_accept_at_remaining_turns_light * self.avg_time / self.progress.getDuration()
+
+    def find_bid(self, context: TurnContext) -> Bid:
         self.logger.log(logging.INFO, "finding bid...")
 
         num_of_bids = self.all_bids.size()
 
         if self.bids_with_utilities is None:
-            self.logger.log(logging.INFO, "calculating bids_with_utilities...")
-            startTime = time.time()
-            self.bids_with_utilities = []
-
-            for index in range(num_of_bids):
-                bid = self.all_bids.get(index)
-                bid_utility = float(self.profile.getUtility(bid))
-                self.bids_with_utilities.append((bid, bid_utility))
-            
-            self.bids_with_utilities.sort(key=lambda tup: tup[1], reverse=True)
-            
-            endTime = time.time()
-            self.logger.log(logging.INFO, "calculating bids_with_utilities took (in seconds): " + str(endTime - startTime))
-
+            # (bid, utility) tuples in descending order of utility, bids are only generated up to the
+            # highest rank that is used instead of evaluating and sorting the full bid space
+            self.bids_with_utilities = KBestBids(self.profile)
             self.num_of_top_bids = max(5, num_of_bids * self.top_bids_percentage)
             
         if (self.last_received_bid is None):
             return self.bids_with_utilities[0][0]
 
-        progress = self.progress.get(time.time() * 1000)
-        light_threshold = 0.95
-
-        if self.avg_time is not None: 
-            light_threshold = 1 - 5000 * self.force_accept_at_remaining_turns_light * self.avg_time / self.progress.getDuration()
+        progress = context.progress
+        light_threshold = context.cached("light_threshold", self.get_light_threshold)
 
         if (progress > light_threshold):
             return self.opponent_best_bid
@@ -358,17 +363,18 @@ class DreamTeam109Agent(DefaultParty):
             self.num_of_top_bids = num_of_bids / 2
 
         self.min_util = self.bids_with_utilities[floor(self.num_of_top_bids) - 1][1]
-        self.logger.log(logging.INFO, "min_util = " + str(self.min_util))
+        self.logger.log(logging.INFO, LazyMessage("min_util = %s", self.min_util))
         
         picked_ranking = randint(0, floor(self.num_of_top_bids) - 1)
 
         return self.bids_with_utilities[picked_ranking][0]
 
-    def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.1) -> float:
+    def score_bid(self, bid: Bid, context: TurnContext, alpha: float = 0.95, eps: float = 0.1) -> float:
         """Calculate heuristic score for a bid
 
         Args:
             bid (Bid): Bid to score
+            context (TurnContext): progress and derived quantities of the current turn
             alpha (float, optional): Trade-off factor between self interested and
                 altruistic behaviour. Defaults to 0.95.
             eps (float, optional): Time pressure factor, balances between conceding
@@ -377,11 +383,9 @@ class DreamTeam109Agent(DefaultParty):
         Returns:
             float: score
         """
-        progress = self.progress.get(time.time() * 1000)
-
-        our_utility = float(self.profile.getUtility(bid))
+        our_utility = self.evaluator.utility(bid)
 
-        time_pressure = 1.0 - progress ** (1 / eps)
+        time_pressure = context.time_pressure(eps)
         score = alpha * time_pressure * our_utility
 
         if self.opponent_model is not None:
@@ -1,5 +1,7 @@
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from utils.reporting import LazyMessage
+
 class Logger:
 
     def __init__(self, base_logger: ReportToLogger, id: int):
@@ -7,4 +9,4 @@ class Logger:
         self.id = id
 
     def log(self, level:int , msg:str, thrown: BaseException=None) -> None:
-        self.base_logger.log(level, f"{self.id} - {msg}", thrown)
+        self.base_logger.log(level, LazyMessage("%s - %s", self.id, msg), thrown)
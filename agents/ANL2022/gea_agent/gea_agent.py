@@ -1,9 +1,7 @@
 import logging
 from random import randint
-from time import time
 from typing import cast
 
-import pandas as pd
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
@@ -29,11 +27,10 @@ from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
 from agents.template_agent.utils.opponent_model import OpponentModel
+from utils.turn_context import TurnContext
 
 # our imports
 import numpy as np
-from sklearn import tree
-from sklearn.preprocessing import label_binarize
 import random
 
 
@@ -122,6 +119,9 @@ class GEAAgent(DefaultParty):
             # our code: init issue dictionary
             self.init_bid_values()
 
+            # sklearn is slow to import, load it now instead of in the first turn
+            from sklearn import preprocessing, tree  # noqa: F401
+
         # ActionDone informs you of an action (an offer or an accept)
         # that is performed by one of the agents (including yourself).
         elif isinstance(data, ActionDone):
@@ -204,13 +204,16 @@ class GEAAgent(DefaultParty):
         to perform and send this action to the opponent.
         """
             
+        # snapshot of the progress that is shared by all decisions in this turn
+        context = TurnContext(self.progress)
+
         # check if the last received offer is good enough
-        if self.accept_condition(self.last_received_bid):
+        if self.accept_condition(self.last_received_bid, context):
             # if so, accept the offer
             action = Accept(self.me, self.last_received_bid)
         else:
             # if not, find a bid to propose as counter offer
-            bid = self.find_bid()
+            bid = self.find_bid(context)
             action = Offer(self.me, bid)
             self.append_data_and_train_tree(bid, self.OPPONENT_REJECT)
 
@@ -230,13 +233,13 @@ class GEAAgent(DefaultParty):
     ################################## Example methods below ##################################
     ###########################################################################################
 
-    def accept_condition(self, bid: Bid) -> bool:
+    def accept_condition(self, bid: Bid, context: TurnContext) -> bool:
         if bid is None:
             return False
 
         # our code
         # process new bid offer
-        heuristic_score = self.score_bid(bid)
+        heuristic_score = self.score_bid(bid, context)
         objective_utility = self.profile.getUtility(bid)
 
         self.append_data_and_train_tree(bid, self.OPPONENT_ACCEPT)
@@ -252,7 +255,7 @@ class GEAAgent(DefaultParty):
         self.last_bid_utility = objective_utility
 
         # progress of the negotiation session between 0 and 1 (1 is deadline)
-        progress = self.progress.get(time() * 1000)
+        progress = context.progress
 
         conditions = [
             progress > 0.95 and objective_utility > 0.4,
@@ -262,7 +265,7 @@ class GEAAgent(DefaultParty):
         ]
         return any(conditions)
 
-    def find_bid(self) -> Bid:
+    def find_bid(self, context: TurnContext) -> Bid:
         # compose a list of all possible bids
         domain = self.profile.getDomain()
         all_bids = AllBidsList(domain)
@@ -273,19 +276,17 @@ class GEAAgent(DefaultParty):
         # take 500 attempts to find a bid according to a heuristic score
         for _ in range(500):
             bid = all_bids.get(randint(0, all_bids.size() - 1))
-            bid_score = self.score_bid(bid)
+            bid_score = self.score_bid(bid, context)
             if bid_score > best_bid_score:
                 best_bid_score, best_bid = bid_score, bid
 
         return best_bid
 
-    def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.1) -> float:
+    def score_bid(self, bid: Bid, context: TurnContext, alpha: float = 0.95, eps: float = 0.1) -> float:
         ''' Calculate heuristic score for a bid '''
-        progress = self.progress.get(time() * 1000)
-
         our_utility = float(self.profile.getUtility(bid))
 
-        time_pressure = 1.0 - progress ** (1 / eps)
+        time_pressure = context.time_pressure(eps)
         score = alpha * time_pressure * our_utility
 
         opponent_score = self.tree_predict(bid) * self.opponent_agree_weight
@@ -296,6 +297,9 @@ class GEAAgent(DefaultParty):
 
     def tree_predict(self, bid: Bid) -> float:
         ''' returns acceptance estimation for the other agent '''
+        # sklearn is loaded with the Settings, so importing it here is only a lookup
+        from sklearn.preprocessing import label_binarize
+
         bid_data = []
         bid_issue_values = bid.getIssueValues()
         domain_issues = list(bid_issue_values.keys())
@@ -315,6 +319,9 @@ class GEAAgent(DefaultParty):
 
     def append_data_and_train_tree(self, bid: Bid, opponent_accept: int) -> None:
         ''' appends new bid to negotiation history and retrain model '''
+        from sklearn import tree
+        from sklearn.preprocessing import label_binarize
+
         bid_data = []
         bid_issue_values = bid.getIssueValues()
         domain_issues = list(bid_issue_values.keys())
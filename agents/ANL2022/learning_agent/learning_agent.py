@@ -1,4 +1,3 @@
-import json
 import math
 import os
 from decimal import Decimal
@@ -38,6 +37,8 @@ from geniusweb.references.Parameters import Parameters
 from numpy import long
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from utils.agent_storage import AgentStorage
+
 from .LearnedData import LearnedData
 from .NegotiationData import NegotiationData
 from .Pair import Pair
@@ -156,20 +157,30 @@ class LearningAgent(DefaultParty):
         # Write the negotiation data that we collected to the path provided.
         if not (self.negotiationDataPath == None or self.negotiationData == None):
             try:
-                with open(self.negotiationDataPath, "w") as f:
-                    # w means overwritten
-                    json.dump(self.negotiationData.__dict__, default=lambda o: o.__dict__, indent=5, fp=f)
+                # replaced atomically, parallel sessions never read a half-written file
+                storage = AgentStorage(self.storage_dir)
+                storage.write_json(
+                    os.path.basename(self.negotiationDataPath), self.negotiationData.__dict__, default=lambda o: o.__dict__, indent=5
+                )
 
 
             except:
                 self.logger.log(logging.ERROR, "Failed to write negotiation data to disk")
 
-        # Write the learned data to the path provided.
-        if not (self.learnedDataPath == None or self.learnedData == None):
+        # Add the negotiation data of this session to the learned data on disk. The learned data is
+        # read again under the lock of the file, so parallel sessions against the same opponent
+        # do not overwrite each other's updates.
+        if not (self.learnedDataPath == None or self.negotiationData == None):
             try:
-                with open(self.learnedDataPath, "w") as f:
-                    # w means overwritten
-                    json.dump(self.learnedData.__dict__, default=lambda o: o.__dict__, indent=9, fp=f)
+                storage = AgentStorage(self.storage_dir)
+                learnedDataFile = os.path.basename(self.learnedDataPath)
+                with storage.lock(learnedDataFile):
+                    learnedData = LearnedData()
+                    storedData = storage.read_json(learnedDataFile)
+                    if storedData is not None:
+                        learnedData.encode(list(storedData.values()))
+                    learnedData.update(self.negotiationData)
+                    storage.write_json(learnedDataFile, learnedData.__dict__, default=lambda o: o.__dict__, indent=9)
 
 
             except:
@@ -194,8 +205,8 @@ class LearningAgent(DefaultParty):
                 self.negotiationDataPath = self.getPath("negotiationData", self.opponentName)
                 self.learnedDataPath = self.getPath("learnedData", self.opponentName)
 
-                # update and load learnedData
-                self.updateAndLoadLearnedData()
+                # load learnedData
+                self.loadLearnedData()
 
                 # Add name of the opponent to the negotiation data
                 self.negotiationData.setOpponentName(self.opponentName)
@@ -538,32 +549,20 @@ class LearningAgent(DefaultParty):
     def getPath(self, dataType: str, opponentName: str):
         return os.path.join(self.storage_dir, dataType + "_" + opponentName + ".json")
 
-    def updateAndLoadLearnedData(self):
-        # we didn't meet this opponent before
-        if exists(self.negotiationDataPath):
+    def loadLearnedData(self):
+        # the learned data already includes all finished sessions, as every session adds its
+        # negotiation data when it finishes. We didn't meet this opponent before if it does not exist
+        if exists(self.learnedDataPath):
             try:
-                # Load the negotiation data object of a previous negotiation
-                with open(self.negotiationDataPath, "r") as f:
-                    negotiationData: NegotiationData = NegotiationData()
-                    negotiationData.encode(list(json.load(f).values()))
+                # files are replaced atomically, so no lock is needed to read them
+                storage = AgentStorage(self.storage_dir)
+                learnedData = LearnedData()
+                learnedData.encode(list(storage.read_json(os.path.basename(self.learnedDataPath)).values()))
+                self.learnedData = learnedData
 
             except:
-                self.logger.log(logging.ERROR, "Negotiation data does not exist")
-
-            if exists(self.learnedDataPath):
-                try:
-                    # Load the negotiation data object of a previous negotiation
-                    with open(self.learnedDataPath, "r") as f:
-                        self.learnedData = LearnedData()
-                        self.learnedData.encode(list(json.load(f).values()))
-
-                except:
-                    self.logger.log(logging.ERROR, "learned data does not exist")
-
-            else:
-                self.learnedData = LearnedData()
+                self.logger.log(logging.ERROR, "learned data does not exist")
 
-            # Process the negotiation data in our learned Data
-            self.learnedData.update(negotiationData)
+        if self.learnedData != None:
             self.avgUtil = self.learnedData.getAvgUtility()
             self.stdUtil = self.learnedData.getStdUtility()
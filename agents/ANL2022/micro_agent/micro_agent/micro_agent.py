@@ -7,7 +7,6 @@ from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -26,6 +25,7 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
+from utils.kbest_bids import KBestBids
 
 #from agents.template_agent.utils.opponent_model import OpponentModel
 
@@ -52,7 +52,7 @@ class MiCROAgent(DefaultParty):
 #        self.opponent_model: OpponentModel = None
         self.logger.log(logging.INFO, "party is initialized")
         
-        self.allMyBidsSorted: list = None
+        self.allMyBidsSorted: KBestBids = None
         self.receivedBids = set()
         self.numUniqueProposalsMadeByMe = 0
         self.reservationValue = 0 # in ANAC 2022 the reservation value is always 0, so actually we don't really need this value.
@@ -87,11 +87,9 @@ class MiCROAgent(DefaultParty):
             profile_connection.close()
             
          
-            #Create a sorted list containing all possible bids.
-            domain = self.profile.getDomain()
-            all_bids = AllBidsList(domain)
-            self.allMyBidsSorted = list(all_bids)
-            self.allMyBidsSorted.sort(reverse=True,key=self.profile.getUtility) 
+            #Create a sorted list containing all possible bids, (bid, utility) tuples that are only generated
+            #when they are needed, so only the bids we actually get to are evaluated.
+            self.allMyBidsSorted = KBestBids(self.profile)
             
             #Test that it is sorted correctly.
             #for bid in self.allMyBidsSorted:
@@ -201,7 +199,7 @@ class MiCROAgent(DefaultParty):
         # 3. If we did not accept, then make a counter-proposal (either a new one, or repeat an old one). 
         
             # 3a. Get the next bid from our sorted list, after the last one that we have already proposed.
-        myNextBid = self.allMyBidsSorted[self.numUniqueProposalsMadeByMe]
+        myNextBid = self.allMyBidsSorted[self.numUniqueProposalsMadeByMe][0]
             
             # 3b. Determine whether to propose that one or to repeat one we already proposed before.
         if readyToConcede and self.profile.getUtility(myNextBid) > self.reservationValue:
@@ -218,7 +216,7 @@ class MiCROAgent(DefaultParty):
             
             # Randomly pick a bid we have already proposed before.
             randomIndex = randint(0, self.numUniqueProposalsMadeByMe-1)
-            randomBid = self.allMyBidsSorted[randomIndex]
+            randomBid = self.allMyBidsSorted[randomIndex][0]
             action = Offer(self.me, randomBid)
             self.send_action(action)
             return
@@ -231,9 +229,9 @@ class MiCROAgent(DefaultParty):
             return False;
         
         if readyToConcede:
-            lowestAcceptableBid = self.allMyBidsSorted[self.numUniqueProposalsMadeByMe]  #The next bid we are willing to propose. 
+            lowestAcceptableBid = self.allMyBidsSorted[self.numUniqueProposalsMadeByMe][0]  #The next bid we are willing to propose. 
         else:
-            lowestAcceptableBid = self.allMyBidsSorted[self.numUniqueProposalsMadeByMe-1] # The lowest bid we have already proposed.
+            lowestAcceptableBid = self.allMyBidsSorted[self.numUniqueProposalsMadeByMe-1][0] # The lowest bid we have already proposed.
         
         lowestAcceptableUtility = self.profile.getUtility(lowestAcceptableBid);
         
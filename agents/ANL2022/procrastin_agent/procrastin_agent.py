@@ -144,6 +144,9 @@ class ProcrastinAgent(DefaultParty):
             self.domain = self.profile.getDomain()
             profile_connection.close()
 
+            # sklearn is slow to import, load it now instead of when the time estimator fits its first model
+            from sklearn import linear_model  # noqa: F401
+
         # ActionDone informs you of an action (an offer or an accept)
         # that is performed by one of the agents (including yourself).
         elif isinstance(data, ActionDone):
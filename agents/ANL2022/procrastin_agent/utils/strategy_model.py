@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.stats import norm
 
 class StrategyModel():
 	def __init__(self, alphas: list, betas: list, accepts: list):
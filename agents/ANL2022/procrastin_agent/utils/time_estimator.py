@@ -1,5 +1,4 @@
 import numpy as np
-from sklearn.linear_model import LinearRegression
 
 """
 Key assumptions:
@@ -55,6 +54,9 @@ class TimeEstimator:
         self.self_diff.append(value - self.self_times[-1])
 
     def _generate_model(self, frame_length):
+        # sklearn is slow to import, the agent loads it with the Settings so this is only a lookup
+        from sklearn.linear_model import LinearRegression
+
         y_list = self.self_times if len(self.self_times) < frame_length else self.self_times[-frame_length:]
         x1_list = self.rounds if len(self.rounds) < frame_length else self.rounds[-frame_length:]
         # x2_list = self.roundsquare if len(self.roundsquare) < frame_length else self.rounds[-frame_length:]
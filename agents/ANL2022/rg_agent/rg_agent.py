@@ -2,7 +2,6 @@ import logging
 import numpy as np
 
 from random import randint
-from time import time
 from typing import cast
 
 from geniusweb.actions.Accept import Accept
@@ -30,6 +29,7 @@ from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
 from agents.template_agent.utils.opponent_model import OpponentModel
+from utils.turn_context import TurnContext
 
 
 class RGAgent(DefaultParty):
@@ -200,13 +200,16 @@ class RGAgent(DefaultParty):
 
         @return: None.
         """
+        # Snapshot of the progress that is shared by all decisions in this turn
+        context = TurnContext(self.progress)
+
         # Check if the last received offer is good enough
-        if self.accept_condition(self.last_received_bid):
+        if self.accept_condition(self.last_received_bid, context):
             # If so, accept the offer
             action = Accept(self.me, self.last_received_bid)
         else:
             # If not, find a bid to propose as counter offer
-            bid = self.find_bid()
+            bid = self.find_bid(context)
             action = Offer(self.me, bid)
 
         # Send the action
@@ -226,29 +229,42 @@ class RGAgent(DefaultParty):
         with open(f"{self.storage_dir}/data.md", "w") as f:
             f.write(data)
 
-    def accept_condition(self, bid: Bid) -> bool:
+    def accept_condition(self, bid: Bid, context: TurnContext) -> bool:
         """
         @brief: Accept the given bid.
 
+        @param bid: Bid to accept or reject
+        @param context: Progress and derived quantities of the current turn
+
         @return: Boolean indicator if to accept/reject the bid.
         """
         if bid is None:
             return False
 
-        # Progress of the negotiation session between 0 and 1 (1 is deadline)
-        progress = self.progress.get(time() * 1000)
+        acceptance_threshold = context.cached("acceptance_threshold", lambda: self.acceptance_threshold(context.progress))
+
+        return self.profile.getUtility(bid) >= acceptance_threshold
+
+    def acceptance_threshold(self, progress: float) -> float:
+        """
+        @brief: Acceptance threshold at the given progress.
+
+        @param progress: Progress of the negotiation session between 0 and 1 (1 is deadline)
 
+        @return: The minimum utility of an acceptable bid.
+        """
         acceptance_threshold = -np.exp(self.compromising_factor * progress)
         acceptance_threshold /= np.exp(self.compromising_factor) - 1  # scale to 1
         acceptance_threshold *= self.max_acceptance_threshold - self.min_acceptance_threshold
         acceptance_threshold += self.max_acceptance_threshold
+        return acceptance_threshold
 
-        return self.profile.getUtility(bid) >= acceptance_threshold
-
-    def find_bid(self) -> Bid:
+    def find_bid(self, context: TurnContext) -> Bid:
         """
         @brief: Finds the bid.
 
+        @param context: Progress and derived quantities of the current turn
+
         @return: The chosen bid.
         """
         # Compose a list of all possible bids
@@ -261,19 +277,20 @@ class RGAgent(DefaultParty):
         # Take X attempts to find a bid according to a heuristic score
         for _ in range(self.bids_to_consider):
             bid = all_bids.get(randint(0, all_bids.size() - 1))
-            bid_score = self.score_bid(bid)
+            bid_score = self.score_bid(bid, context)
             if bid_score > best_bid_score:
                 best_bid_score, best_bid = bid_score, bid
-        if self.accept_condition(best_bid):
+        if self.accept_condition(best_bid, context):
             return best_bid
         else:
             return self.optimal_bid
 
-    def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.1) -> float:
+    def score_bid(self, bid: Bid, context: TurnContext, alpha: float = 0.95, eps: float = 0.1) -> float:
         """
         @brief: Calculate heuristic score for a bid.
 
         @param bid: Bid to score
+        @param context: Progress and derived quantities of the current turn
         @param alpha: Trade-off factor between self interested and
                      altruistic behavior. Defaults to 0.95.
         @param eps: Time pressure factor, balances between conceding
@@ -282,15 +299,13 @@ class RGAgent(DefaultParty):
         Returns:
             float: score
         """
-        progress = self.progress.get(time() * 1000)
-
         our_utility = float(self.profile.getUtility(bid))
 
-        time_pressure = 1.0 - progress ** (1 / eps)
+        time_pressure = context.time_pressure(eps)
         score = alpha * time_pressure * our_utility
 
         if self.opponent_model is not None:
-            opponent_utility = self.opponent_model.get_predicted_utility(bid)
+            opponent_utility = context.opponent_utility(self.opponent_model, bid)
             opponent_score = (1.0 - alpha * time_pressure) * opponent_utility
             score += opponent_score
 
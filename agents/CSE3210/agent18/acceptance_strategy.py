@@ -2,6 +2,8 @@ import decimal
 
 import numpy as np
 
+from utils.streaming_window import StreamingWindow
+
 
 class AcceptanceStrategy:
     """
@@ -22,18 +24,26 @@ class AcceptanceStrategy:
     12. prev(1, 0)
     """
 
-    def __init__(self, progress, profile, rec_bid_hist=None, next_sent_bid=None, prev_sent_bid=None):
+    def __init__(self, progress, profile, rec_bid_hist=None, next_sent_bid=None, prev_sent_bid=None,
+                 rec_utility_window: StreamingWindow = None):
         """
         Constructs an acceptance strategy object.
         @param progress: the current negotiation progress from 0 to 1 (essentially time).
         @param rec_bid_hist: the history of all the opponent's bids so far.
+        @param rec_utility_window: streaming window over the utilities of rec_bid_hist, kept by the agent
+                                   across turns so that the utilities are not recomputed every turn.
         """
         self.progress = progress
         self.profile = profile
         if rec_bid_hist and len(rec_bid_hist) == 0:
             Exception(f"Expected history of at least 1 bid but got 0")
         elif rec_bid_hist:
-            self.rec_utility_hist = list(map(lambda bid: self.profile.getUtility(bid), rec_bid_hist))
+            if rec_utility_window is None:
+                rec_utility_window = StreamingWindow()
+                for bid in rec_bid_hist:
+                    rec_utility_window.append(self.profile.getUtility(bid))
+            self.rec_utility_window = rec_utility_window
+            self.rec_utility_hist = rec_utility_window.history
             self.rec_bid_hist = rec_bid_hist
             self.last_rec_bid = rec_bid_hist[-1]
         self.next_sent_bid = next_sent_bid
@@ -44,7 +54,7 @@ class AcceptanceStrategy:
         window = self._get_bid_window()
         if len(window) != 0:
             # Take the maximum of the bid window
-            alpha = np.max(window)
+            alpha = window.max()
         else:
             alpha = 0
         return self._combi(progress_thresh, alpha, scale, const)
@@ -53,7 +63,7 @@ class AcceptanceStrategy:
         """Combined strategy that checks a window of previously received bids"""
         window = self._get_bid_window()
         if len(window) != 0:
-            alpha = np.mean(window)
+            alpha = window.mean()
         else:
             alpha = 0
         return self._combi(progress_thresh, alpha, scale, const)
@@ -76,7 +86,8 @@ class AcceptanceStrategy:
         # print(bounds)
         if bounds[1] < bounds[0]:
             raise Exception("Invalid bounds")
-        return self.rec_utility_hist[bounds[0]: bounds[1]]
+        self.rec_utility_window.move(bounds[0], bounds[1])
+        return self.rec_utility_window
 
     def _combi(self, progress_thresh, alpha, scale, const):
         """Helper method for the combi acceptance strategy. According to research most effective with T = 0.99."""
@@ -25,6 +25,7 @@ from geniusweb.progress.Progress import Progress
 from .acceptance_strategy import AcceptanceStrategy
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
+from utils.streaming_window import StreamingWindow
 
 
 # A custom agent that combines different strategies and changes between them based on time
@@ -52,6 +53,8 @@ class Agent18(DefaultParty):
         self._last_received_bid: Bid = None
         # List of all received bids
         self._received_bids: list[Bid] = []
+        # Utilities of all received bids, computed once when a bid arrives
+        self._received_utilities = StreamingWindow()
         # Stores the last sent bid
         self._last_sent_bid = None
         # Stores the best utility stored so far
@@ -104,6 +107,7 @@ class Agent18(DefaultParty):
                 if self._last_sent_bid is None or bid != self._last_sent_bid:
                     self._last_received_bid = bid
                     self._received_bids.append(self._last_received_bid)
+                    self._received_utilities.append(self._profile.getProfile().getUtility(bid))
                     self._opponent_model = self._opponent_model.WithAction(action, self._progress)
         # YourTurn notifies you that it is your turn to act
         elif isinstance(info, YourTurn):
@@ -185,7 +189,8 @@ class Agent18(DefaultParty):
         progress = self._progress.get(time.time() * 1000)
 
         # Create an acceptance profile and check the metrics used
-        ac = AcceptanceStrategy(progress, profile, self._received_bids, next_sent_bid, self._last_sent_bid)
+        ac = AcceptanceStrategy(progress, profile, self._received_bids, next_sent_bid, self._last_sent_bid,
+                                self._received_utilities)
         return ac.combi_max_w(self.thresholds[0], 1, 0)
 
     # Finds the next bid to send to the opponent
@@ -2,6 +2,7 @@ import curses
 import itertools
 import os
 import random
+import sys
 import time
 from multiprocessing import Process, Manager
 
@@ -306,7 +306,7 @@ class Agent2(DefaultParty):
 
     def _update_utilspace(self) -> None:  # throws IOException
         newutilspace = self._profileint.getProfile()
-        if not newutilspace == self._utilspace:
+        if newutilspace is not self._utilspace and newutilspace != self._utilspace:
             self._utilspace = cast(LinearAdditive, newutilspace)
             self._extendedspace = ExtendedUtilSpace(self._utilspace)
 
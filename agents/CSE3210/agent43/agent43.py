@@ -239,7 +239,7 @@ class Agent43(DefaultParty):
     # Update Utility space.
     def _updateUtilSpace(self) -> LinearAdditive:  # throws IOException
         newutilspace = self._profile.getProfile()
-        if not newutilspace == self._util_space:
+        if newutilspace is not self._util_space and newutilspace != self._util_space:
             self._util_space = cast(LinearAdditive, newutilspace)
             self._extended_space = ExtendedUtilSpace(self._util_space)
         return self._util_space
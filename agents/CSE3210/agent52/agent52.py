@@ -23,6 +23,7 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from .FreqModelWeighted import FreqModelWeighted
 from tudelft_utilities_logging.Reporter import Reporter
+from utils.streaming_window import StreamingWindow
 
 """
 BeanBot agent
@@ -37,7 +38,7 @@ class Agent52(DefaultParty):
         self._last_received_action = None
         self._opp_model = None
         self._window_size = 10 # last 10 opponent bids are stored window below
-        self._opp_bids_window = []
+        self._opp_bids_window = StreamingWindow(self._window_size)
         self._opp_best_bid = None
 
     def notifyChange(self, info: Inform):
@@ -140,8 +141,6 @@ class Agent52(DefaultParty):
         # Update the bids in the window of last received bids (window has size self._window_size)
         if self._last_received_bid is not None:
             self._opp_bids_window.append(profile.getUtility(self._last_received_bid))
-        if len(self._opp_bids_window) > self._window_size:
-            self._opp_bids_window.pop(0)
 
         bid = self._findBid()
         action = Offer(self._me, bid)
@@ -179,12 +178,12 @@ class Agent52(DefaultParty):
     def _window_max(self):
         # check if better than maximum utility in past window
         profile = self._profile.getProfile()
-        return profile.getUtility(self._last_received_bid) >= np.max(self._opp_bids_window)
+        return profile.getUtility(self._last_received_bid) >= self._opp_bids_window.max()
 
     def _window_avg(self):
         # check if better than average utility in past window
         profile = self._profile.getProfile()
-        return profile.getUtility(self._last_received_bid) >= np.mean(self._opp_bids_window)
+        return profile.getUtility(self._last_received_bid) >= self._opp_bids_window.mean()
 
     def _overall_max(self):
         # check if better than maximum utility received in entire negotiation
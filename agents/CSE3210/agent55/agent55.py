@@ -387,7 +387,7 @@ class Agent55(DefaultParty):
 
     def _updateUtilSpace(self) -> LinearAdditive:
         newutilspace = self._profile.getProfile()
-        if not newutilspace == self._utilspace:
+        if newutilspace is not self._utilspace and newutilspace != self._utilspace:
             self._utilspace = newutilspace
             self._bidutils = BidsWithUtility.create(self._utilspace)
         return self._utilspace
@@ -139,7 +139,7 @@ class Bidding():
 
     def _updateUtilSpace(self) -> LinearAdditive:  # throws IOException
         newutilspace = self._profileint.getProfile()
-        if not newutilspace == self._utilspace:
+        if newutilspace is not self._utilspace and newutilspace != self._utilspace:
             self._utilspace = cast(LinearAdditive, newutilspace)
             self._extendedspace = ExtendedUtilSpace(self._utilspace)
         return self._utilspace
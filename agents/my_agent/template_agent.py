@@ -30,6 +30,12 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from utils.agent_storage import AgentStorage
+from utils.reporting import LazyMessage
+from utils.anytime_search import TurnBudget, anytime_filter, candidate_bids
+from utils.turn_context import TurnContext
+from utils.utility_evaluator import UtilityEvaluator
+
 
 from .utils.opponent_model import OpponentModel
 
@@ -50,6 +56,8 @@ class TemplateAgent(DefaultParty):
         self.domain: Domain = None
         self.parameters: Parameters = None
         self.profile: LinearAdditiveUtilitySpace = None
+        self.evaluator: UtilityEvaluator = None
+        self.turn_budget = TurnBudget()
         self.progress: ProgressTime = None
         self.me: PartyId = None
         self.other: str = None
@@ -102,6 +110,8 @@ class TemplateAgent(DefaultParty):
                 data.getProfile().getURI(), self.getReporter()
             )
             self.profile = profile_connection.getProfile()
+            # float lookup tables for fast evaluation of our own utility
+            self.evaluator = UtilityEvaluator(self.profile)
             self.domain = self.profile.getDomain()
             profile_connection.close()
 
@@ -205,13 +215,16 @@ class TemplateAgent(DefaultParty):
         """This method is called when it is our turn. It should decide upon an action
         to perform and send this action to the opponent.
         """
+        # Snapshot of the progress that is shared by all decisions in this turn
+        context = TurnContext(self.progress, turn_budget=self.turn_budget)
+
         # Check if the last received offer is good enough
-        if self.accept_condition(self.last_received_bid):
+        if self.accept_condition(self.last_received_bid, context):
             action = Accept(self.me, self.last_received_bid)
             self.did_accept = True
         else:
             # Attempt to find a bid
-            bid = self.find_bid()
+            bid = self.find_bid(context)
             if bid is None:
                 self.logger.log(logging.WARNING, "No valid bid found. Retrying with fallback strategy.")
                 # Fallback strategy: Use a random bid
@@ -222,6 +235,7 @@ class TemplateAgent(DefaultParty):
 
         # Send the action
         self.send_action(action)
+        self.turn_budget.end_turn()
 
 
 
@@ -239,21 +253,14 @@ class TemplateAgent(DefaultParty):
         }
         self.data_dict["sessions"].append(session_data)
 
-
         if self.other:
-            filename = f"{self.storage_dir}/{self.other}.json"
-            try:
-                with open(filename, "r") as f:
-                    existing_data = json.load(f)
-                existing_data["sessions"].extend(self.data_dict["sessions"])
-                self.data_dict = existing_data  # Update the data_dict
-            except FileNotFoundError:
-                self.logger.log(logging.INFO, "No previous data found; creating new data file.")
-
-
-            with open(filename, "w") as f:
-                json.dump(self.data_dict, f, indent=4)
-            self.logger.log(logging.INFO, f"Session data saved to {filename}")
+            # add this session to the history as it is now, other sessions against the same
+            # opponent may have saved theirs since this one started
+            filename = f"{self.other}.json"
+            self.data_dict = AgentStorage(self.storage_dir).append_records(
+                filename, [session_data], key="sessions", indent=4
+            )
+            self.logger.log(logging.INFO, f"Session data saved to {self.storage_dir}/{filename}")
 
 
     def load_history(self):
@@ -276,13 +283,14 @@ class TemplateAgent(DefaultParty):
     ###########################################################################################
 
 
-    def accept_condition(self, bid: Bid) -> bool:
+    def accept_condition(self, bid: Bid, context: TurnContext) -> bool:
         """
         Determines whether to accept the opponent's bid based on advanced strategies,
         incorporating historical data from previous sessions.
 
         Args:
             bid (Bid): The last received bid from the opponent.
+            context (TurnContext): Progress of the current turn.
 
         Returns:
             bool: True if the bid should be accepted; False otherwise.
@@ -291,8 +299,8 @@ class TemplateAgent(DefaultParty):
             return False
 
         # Get negotiation progress and utilities
-        progress = self.progress.get(time() * 1000)
-        our_utility = float(self.profile.getUtility(bid))
+        progress = context.progress
+        our_utility = self.evaluator.utility(bid)
         opponent_utility = (
             self.opponent_model.get_predicted_utility(bid) if self.opponent_model else 0.0
         )
@@ -358,16 +366,22 @@ class TemplateAgent(DefaultParty):
         # Logging for debugging
         self.logger.log(
             logging.INFO,
-            f"Accept Condition: {accept}, Our Utility: {our_utility}, Opponent Utility: {opponent_utility}, "
-            f"Progress: {progress}, Dynamic Threshold: {dynamic_threshold}, Nash Product: {nash_product}, "
-            f"Pareto Optimal: {is_pareto}, Risk Tolerance: {risk_tolerance}, "
-            f"Historical Avg Utility: {avg_utility}, Historical Avg Accept Progress: {avg_accept_progress}",
+            LazyMessage(
+                "Accept Condition: %s, Our Utility: %s, Opponent Utility: %s, "
+                "Progress: %s, Dynamic Threshold: %s, Nash Product: %s, "
+                "Pareto Optimal: %s, Risk Tolerance: %s, "
+                "Historical Avg Utility: %s, Historical Avg Accept Progress: %s",
+                accept, our_utility, opponent_utility,
+                progress, dynamic_threshold, nash_product,
+                is_pareto, risk_tolerance,
+                avg_utility, avg_accept_progress,
+            ),
         )
         return accept
 
 
 
-    def find_bid(self) -> Bid:
+    def find_bid(self, context: TurnContext) -> Bid:
         """
         Find a Pareto-efficient bid based on the adaptive concession strategy and fairness metrics.
         """
@@ -380,7 +394,7 @@ class TemplateAgent(DefaultParty):
 
 
         # Determine Concession Threshold
-        progress = self.progress.get(time() * 1000)
+        progress = context.progress
         base_threshold = 0.9 - progress * 0.2  # Concession increases with time
 
 
@@ -394,7 +408,7 @@ class TemplateAgent(DefaultParty):
 
 
         # Filter Pareto-efficient bids
-        pareto_bids = self.filter_pareto_bids(all_bids)
+        pareto_bids = self.filter_pareto_bids(all_bids, context.search_budget_s)
         if not pareto_bids:
             self.logger.log(logging.ERROR, "No Pareto-efficient bids found!")
             return None
@@ -425,7 +439,7 @@ class TemplateAgent(DefaultParty):
     Returns:
         float: The calculated score.
     """
-        our_utility = float(self.profile.getUtility(bid))
+        our_utility = self.evaluator.utility(bid)
         opponent_utility = (
             self.opponent_model.get_predicted_utility(bid) if self.opponent_model else 0
         )
@@ -442,23 +456,21 @@ class TemplateAgent(DefaultParty):
         return joint_utility - 0.5 * utility_diff
 
 
-    def filter_pareto_bids(self, all_bids: AllBidsList) -> list:
+    def filter_pareto_bids(self, all_bids: AllBidsList, budget_s: float) -> list:
         #"""Filter bids that are Pareto-efficient."""
-        pareto_bids = []
-        for _ in range(1000):  # Evaluate a subset for efficiency
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
+        def is_pareto_dominant(bid):
             self_utility = self.profile.getUtility(bid)
             opponent_utility = (
                self.opponent_model.get_predicted_utility(bid) if self.opponent_model else 0
             )
-
-
             # Check if the bid dominates others in terms of both utilities
-            if self.is_pareto_dominant(bid, self_utility, opponent_utility):
-                pareto_bids.append(bid)
+            return self.is_pareto_dominant(bid, self_utility, opponent_utility)
+
+        # Evaluate a subset for efficiency, as many bids as the search budget of this turn allows
+        pareto_bids = anytime_filter(candidate_bids(all_bids), is_pareto_dominant, budget_s)
 
 
-        self.logger.log(logging.INFO, f"Filtered {len(pareto_bids)} Pareto-efficient bids")
+        self.logger.log(logging.INFO, LazyMessage("Filtered %d Pareto-efficient bids", len(pareto_bids)))
         return pareto_bids
 
 
@@ -1,6 +1,4 @@
 import logging
-from random import randint
-from time import time
 from typing import cast
 
 from geniusweb.actions.Accept import Accept
@@ -27,6 +25,10 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from utils.anytime_search import TurnBudget, anytime_best, candidate_bids
+from utils.turn_context import TurnContext
+from utils.utility_evaluator import UtilityEvaluator
+
 from .utils.opponent_model import OpponentModel
 
 
@@ -42,6 +44,8 @@ class TemplateAgent(DefaultParty):
         self.domain: Domain = None
         self.parameters: Parameters = None
         self.profile: LinearAdditiveUtilitySpace = None
+        self.evaluator: UtilityEvaluator = None
+        self.turn_budget = TurnBudget()
         self.progress: ProgressTime = None
         self.me: PartyId = None
         self.other: str = None
@@ -78,6 +82,8 @@ class TemplateAgent(DefaultParty):
                 data.getProfile().getURI(), self.getReporter()
             )
             self.profile = profile_connection.getProfile()
+            # float lookup tables for fast evaluation of our own utility
+            self.evaluator = UtilityEvaluator(self.profile)
             self.domain = self.profile.getDomain()
             profile_connection.close()
 
@@ -162,17 +168,21 @@ class TemplateAgent(DefaultParty):
         """This method is called when it is our turn. It should decide upon an action
         to perform and send this action to the opponent.
         """
+        # snapshot of the progress that is shared by all decisions in this turn
+        context = TurnContext(self.progress, turn_budget=self.turn_budget)
+
         # check if the last received offer is good enough
-        if self.accept_condition(self.last_received_bid):
+        if self.accept_condition(self.last_received_bid, context):
             # if so, accept the offer
             action = Accept(self.me, self.last_received_bid)
         else:
             # if not, find a bid to propose as counter offer
-            bid = self.find_bid()
+            bid = self.find_bid(context)
             action = Offer(self.me, bid)
 
         # send the action
         self.send_action(action)
+        self.turn_budget.end_turn()
 
     def save_data(self):
         """This method is called after the negotiation is finished. It can be used to store data
@@ -187,12 +197,12 @@ class TemplateAgent(DefaultParty):
     ################################## Example methods below ##################################
     ###########################################################################################
 
-    def accept_condition(self, bid: Bid) -> bool:
+    def accept_condition(self, bid: Bid, context: TurnContext) -> bool:
         if bid is None:
             return False
 
         # progress of the negotiation session between 0 and 1 (1 is deadline)
-        progress = self.progress.get(time() * 1000)
+        progress = context.progress
 
         # very basic approach that accepts if the offer is valued above 0.7 and
         # 95% of the time towards the deadline has passed
@@ -202,28 +212,24 @@ class TemplateAgent(DefaultParty):
         ]
         return all(conditions)
 
-    def find_bid(self) -> Bid:
+    def find_bid(self, context: TurnContext) -> Bid:
         # compose a list of all possible bids
         domain = self.profile.getDomain()
         all_bids = AllBidsList(domain)
 
-        best_bid_score = 0.0
-        best_bid = None
-
-        # take 500 attempts to find a bid according to a heuristic score
-        for _ in range(500):
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
-            bid_score = self.score_bid(bid)
-            if bid_score > best_bid_score:
-                best_bid_score, best_bid = bid_score, bid
+        # score random bids according to a heuristic until the search budget of this turn is spent
+        best_bid, _, _ = anytime_best(
+            candidate_bids(all_bids), lambda bid: self.score_bid(bid, context), context.search_budget_s
+        )
 
         return best_bid
 
-    def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.1) -> float:
+    def score_bid(self, bid: Bid, context: TurnContext, alpha: float = 0.95, eps: float = 0.1) -> float:
         """Calculate heuristic score for a bid
 
         Args:
             bid (Bid): Bid to score
+            context (TurnContext): progress and derived quantities of the current turn
             alpha (float, optional): Trade-off factor between self interested and
                 altruistic behaviour. Defaults to 0.95.
             eps (float, optional): Time pressure factor, balances between conceding
@@ -232,15 +238,13 @@ class TemplateAgent(DefaultParty):
         Returns:
             float: score
         """
-        progress = self.progress.get(time() * 1000)
-
-        our_utility = float(self.profile.getUtility(bid))
+        our_utility = self.evaluator.utility(bid)
 
-        time_pressure = 1.0 - progress ** (1 / eps)
+        time_pressure = context.time_pressure(eps)
         score = alpha * time_pressure * our_utility
 
         if self.opponent_model is not None:
-            opponent_utility = self.opponent_model.get_predicted_utility(bid)
+            opponent_utility = context.opponent_utility(self.opponent_model, bid)
             opponent_score = (1.0 - alpha * time_pressure) * opponent_utility
             score += opponent_score
 
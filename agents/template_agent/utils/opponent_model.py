@@ -1,4 +1,5 @@
 from collections import defaultdict
+from typing import Dict
 
 from geniusweb.issuevalue.Bid import Bid
 from geniusweb.issuevalue.DiscreteValueSet import DiscreteValueSet
@@ -23,35 +24,27 @@ class OpponentModel:
         for issue_id, issue_estimator in self.issue_estimators.items():
             issue_estimator.update(bid.getValue(issue_id))
 
-    def get_predicted_utility(self, bid: Bid):
+    def get_issue_weights(self) -> Dict[str, float]:
+        """Predicted issue weights, normalised such that the sum is 1.0"""
+        total_issue_weight = sum(e.weight for e in self.issue_estimators.values())
+        if total_issue_weight == 0.0:
+            return {i: 1 / len(self.issue_estimators) for i in self.issue_estimators}
+        return {i: e.weight / total_issue_weight for i, e in self.issue_estimators.items()}
+
+    def get_predicted_utility(self, bid: Bid, issue_weights: Dict[str, float] = None):
         if len(self.offers) == 0 or bid is None:
             return 0
 
-        # initiate
-        total_issue_weight = 0.0
-        value_utilities = []
-        issue_weights = []
-
-        for issue_id, issue_estimator in self.issue_estimators.items():
-            # get the value that is set for this issue in the bid
-            value: Value = bid.getValue(issue_id)
-
-            # collect both the predicted weight for the issue and
-            # predicted utility of the value within this issue
-            value_utilities.append(issue_estimator.get_value_utility(value))
-            issue_weights.append(issue_estimator.weight)
-
-            total_issue_weight += issue_estimator.weight
-
-        # normalise the issue weights such that the sum is 1.0
-        if total_issue_weight == 0.0:
-            issue_weights = [1 / len(issue_weights) for _ in issue_weights]
-        else:
-            issue_weights = [iw / total_issue_weight for iw in issue_weights]
+        # the normalised issue weights can be passed in when many bids are scored at once
+        if issue_weights is None:
+            issue_weights = self.get_issue_weights()
 
         # calculate predicted utility by multiplying all value utilities with their issue weight
         predicted_utility = sum(
-            [iw * vu for iw, vu in zip(issue_weights, value_utilities)]
+            [
+                issue_weights[issue_id] * issue_estimator.get_value_utility(bid.getValue(issue_id))
+                for issue_id, issue_estimator in self.issue_estimators.items()
+            ]
         )
 
         return predicted_utility
@@ -15,6 +15,9 @@ if not RESULTS_DIR.exists():
 #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
 #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement
+#   Optionally, set "engine" to "inprocess" to run both agents directly in this process instead of through the geniusweb Runner (less overhead per round)
+#   Optionally, add "profile_agents": {"dir": str(RESULTS_DIR.joinpath("profiles"))} to write sampled stacks of the agents (collapsed stack format)
+#   Optionally, add "results_db": {"path": "results/results.sqlite", "traces": True} to also store the session (and its compressed trace) in a SQLite database
 settings = {
     "agents": [
         {
@@ -0,0 +1,52 @@
+import json
+import time
+from pathlib import Path
+
+from utils.sweep import run_sweep
+
+RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
+
+# create results directory if it does not exist
+if not RESULTS_DIR.exists():
+    RESULTS_DIR.mkdir(parents=True)
+
+# Settings to run a parameter sweep:
+#   You need to specify the agent to tune and the values (list) or ranges ({"min": .., "max": ..}) of its parameters.
+#   The parameters are passed to the agent through its "parameters" dict, the agent reads them from the Settings object.
+#   Every configuration is evaluated against the opponents on the profile sets (on both sides). Configurations that perform
+#   badly on the first "min_sessions" sessions are dropped early (successive halving), the survivors get more sessions.
+#   The session options of the sweep settings ("engine", "reporter", "limits", "seed", "profile_cache") are passed on to every session.
+sweep_settings = {
+    "agent": {
+        "class": "agents.CSE3210.agent68.agent68.Agent68",
+    },
+    "search_space": {
+        "utilWeight": [0.6, 0.7, 0.8, 0.9, 1.0],
+        "leniencyWeight": [0.0, 0.1, 0.2, 0.3],
+        "leniencyBase": [0.2, 0.3, 0.4, 0.5],
+    },
+    "opponents": [
+        {"class": "agents.boulware_agent.boulware_agent.BoulwareAgent"},
+        {"class": "agents.conceder_agent.conceder_agent.ConcederAgent"},
+        {"class": "agents.linear_agent.linear_agent.LinearAgent"},
+    ],
+    "profile_sets": [
+        ["domains/domain00/profileA.json", "domains/domain00/profileB.json"],
+        ["domains/domain01/profileA.json", "domains/domain01/profileB.json"],
+        ["domains/domain02/profileA.json", "domains/domain02/profileB.json"],
+    ],
+    "deadline_time_ms": 10000,
+    "method": "halving",
+    "min_sessions": 2,
+    "eta": 3,
+    "workers": 4,
+}
+
+# run the sweep and obtain the evaluated configurations, best first
+sweep_results = run_sweep(sweep_settings)
+
+# save the sweep settings and results
+with open(RESULTS_DIR.joinpath("sweep_settings.json"), "w", encoding="utf-8") as f:
+    f.write(json.dumps(sweep_settings, indent=2))
+with open(RESULTS_DIR.joinpath("sweep_results.json"), "w", encoding="utf-8") as f:
+    f.write(json.dumps(sweep_results, indent=2))
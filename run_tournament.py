@@ -19,6 +19,24 @@ if not RESULTS_DIR.exists():
 #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
 #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement.
+#   Optionally, add "reporter": {"level": "WARNING", "agent_levels": {"TemplateAgent": "INFO"}, "buffer_size": 1000} to only keep
+#   log messages above a threshold (per agent class) in a memory buffer that is written to stdout when a session ends in an error.
+#   Optionally, add "workers": <n> to run sessions on n processes, longest expected session first. Durations are learned per agent
+#   and can be kept across runs by adding "duration_history": "results/session_durations.json".
+#   Optionally, add "limits": {"wall_time_s": 30, "cpu_time_s": 20, "rss_mb": 2048} to run every session under a watchdog that stops
+#   it as soon as an agent exceeds a limit. The session is recorded as "timeout" or "OOM" and the agent is blamed (needs "engine": "inprocess",
+#   otherwise the combined limits of both agents apply to the session as a whole and no agent is blamed).
+#   Optionally, add "cache": {"dir": "results/session_cache"} (and a "seed") to reuse the results of sessions whose agent source code (including the agent
+#   code it imports), shared utils, profiles, deadline, parameters, limits and seed did not change since an earlier run.
+#   Optionally, add "profile_agents": {"agents": ["TemplateAgent"], "dir": str(RESULTS_DIR.joinpath("profiles"))} to sample where the agents
+#   spend their time. Collapsed stacks are written per agent per session, hotspots.txt and a flamegraph per agent summarise the tournament.
+#   Optionally, add "profile_cache": True to parse profiles once per process and share them between all agents and sessions.
+#   Optionally, add "adaptive": {"top_k": 3, "confidence": 0.95, "min_sessions": 10} to only run sessions until the top-k agents by
+#   mean utility are known with that confidence. Sessions of the agents whose ranking is still uncertain are picked first.
+#   Optionally, add "queue": {"path": "results/queue.sqlite", "local_workers": 4} to publish the sessions to a SQLite work queue and
+#   wait for their results. Workers on other machines that can reach the file join with `python -m utils.work_queue <path>`.
+#   Optionally, add "results_db": {"path": "results/results.sqlite", "name": "my sweep", "traces": False} to store all sessions of the tournament as one run
+#   in a SQLite database that accumulates the history of all runs, indexed by agent, opponent, domain, domain size, run and time (see utils/results_store.py).
 tournament_settings = {
     "agents": [
         {
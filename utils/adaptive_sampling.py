@@ -0,0 +1,136 @@
+import math
+import random
+from statistics import NormalDist
+from typing import List, Optional, Tuple
+
+
+class AdaptiveSampler:
+    """Chooses the sessions of a tournament one at a time until the top-k agents by mean
+    utility are known with the requested confidence, instead of running the full grid.
+
+    Every agent has a confidence interval of its mean utility over all its sessions in the
+    grid. Because an agent's sessions are sampled uniformly at random without replacement
+    from the grid, the interval uses the finite population correction and shrinks to the
+    exact mean once all its sessions have run. The intervals are Bonferroni corrected for
+    the number of agents.
+
+    Like racing algorithms, an agent is decided as soon as its interval separates it from
+    enough others: it is in the top-k if its lower bound is above the upper bound of all but
+    k - 1 other agents, and out if at least k agents have a lower bound above its upper
+    bound. The next session is one of the undecided agent with the widest interval (the
+    least sampled on ties), with the opponent and profile set drawn at random. Sampling
+    stops when all agents are decided or no sessions are left.
+
+    Args:
+        agents (List[dict]): agents of the tournament
+        steps (List[dict]): session settings of the full tournament grid
+        top_k (int, optional): number of best agents to identify. Defaults to 3.
+        confidence (float, optional): confidence of the top-k set. Defaults to 0.95.
+        min_sessions (int, optional): sessions per agent before it can be decided. Defaults to 10.
+        seed (int, optional): seed of the session selection. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        agents: List[dict],
+        steps: List[dict],
+        top_k: int = 3,
+        confidence: float = 0.95,
+        min_sessions: int = 10,
+        seed: int = 0,
+    ):
+        self.agents = agents
+        self.steps = steps
+        self.top_k = top_k
+        self.min_sessions = min_sessions
+        self.rng = random.Random(seed)
+        self.z = NormalDist().inv_cdf(1 - (1 - confidence) / (2 * len(agents)))
+
+        # agent indices per step, in the order of the positions in the session
+        self.step_agents = [[agents.index(agent) for agent in step["agents"]] for step in steps]
+        self.pending = [set() for _ in agents]
+        for index, step_agents in enumerate(self.step_agents):
+            for agent in step_agents:
+                self.pending[agent].add(index)
+        self.totals = [len(pending) for pending in self.pending]
+        # number, sum and sum of squares of the utilities per agent
+        self.counts = [0] * len(agents)
+        self.sums = [0.0] * len(agents)
+        self.squares = [0.0] * len(agents)
+        # indices of the steps that were handed out, in order
+        self.chosen: List[int] = []
+
+    def record(self, index: int, summary: dict):
+        """Add the utilities of a finished session to the statistics of its agents."""
+        for position, agent in enumerate(self.step_agents[index]):
+            utility = summary[f"utility_{position + 1}"]
+            self.counts[agent] += 1
+            self.sums[agent] += utility
+            self.squares[agent] += utility * utility
+
+    def interval(self, agent: int) -> Tuple[float, float, float]:
+        """Mean utility of an agent with the lower and upper bound of its confidence interval."""
+        n, total = self.counts[agent], self.totals[agent]
+        mean = self.sums[agent] / n if n else 0.0
+        if n < 2:
+            return mean, -math.inf, math.inf
+        if n >= total:
+            return mean, mean, mean
+        std = math.sqrt(max(0.0, self.squares[agent] - n * mean * mean) / (n - 1))
+        half_width = self.z * std / math.sqrt(n) * math.sqrt((total - n) / (total - 1))
+        return mean, mean - half_width, mean + half_width
+
+    def decisions(self) -> List[Optional[bool]]:
+        """Per agent True if it is in the top-k, False if it is not and None if undecided."""
+        intervals = [self.interval(agent) for agent in range(len(self.agents))]
+        decisions = []
+        for agent, (_, lower, upper) in enumerate(intervals):
+            if self.counts[agent] < min(self.min_sessions, self.totals[agent]):
+                decisions.append(None)
+                continue
+            others = [interval for other, interval in enumerate(intervals) if other != agent]
+            beaten = sum(lower > other_upper for _, _, other_upper in others)
+            beaten_by = sum(other_lower > upper for _, other_lower, _ in others)
+            if beaten >= len(self.agents) - self.top_k:
+                decisions.append(True)
+            elif beaten_by >= self.top_k:
+                decisions.append(False)
+            else:
+                decisions.append(None)
+        return decisions
+
+    def _undecided(self) -> List[int]:
+        decisions = self.decisions()
+        return [agent for agent, decision in enumerate(decisions) if decision is None and self.pending[agent]]
+
+    def finished(self) -> bool:
+        return not self._undecided()
+
+    def pop(self) -> Tuple[int, dict]:
+        """Next session to run, None if sampling is finished."""
+        undecided = self._undecided()
+        if not undecided:
+            return None
+
+        def priority(agent):
+            _, lower, upper = self.interval(agent)
+            return upper - lower, -self.counts[agent]
+
+        agent = max(undecided, key=priority)
+        index = self.rng.choice(sorted(self.pending[agent]))
+        for other in self.step_agents[index]:
+            self.pending[other].discard(index)
+        self.chosen.append(index)
+        return index, self.steps[index]
+
+    def top(self) -> List[int]:
+        """Indices of the agents with the highest mean utility, best first."""
+        means = [self.interval(agent)[0] for agent in range(len(self.agents))]
+        return sorted(range(len(self.agents)), key=lambda agent: means[agent], reverse=True)[: self.top_k]
+
+    def report(self) -> str:
+        decided = sum(decision is not None for decision in self.decisions())
+        return (
+            f"adaptive sampling: ran {len(self.chosen)} of {len(self.steps)} sessions, "
+            f"{decided} of {len(self.agents)} agents decided"
+        )
@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, List
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class AgentStorage:
+    """Files in the `storage_dir` of an agent that stay consistent when several sessions of the
+    agent run in parallel (e.g. with `"workers"` in the tournament settings).
+
+    - Writes are atomic: data is written to a temporary file in the same directory that then
+      replaces the file, so readers see either the old or the new content, never half of it.
+    - Read-modify-write cycles (`update_json`, `append_records`) hold an advisory lock on
+      `<name>.lock` for the whole cycle, so concurrent sessions do not lose each other's updates.
+    - Session logs are merged on commit: `append_records` adds the records of this session to
+      the list in the file as it is at the time of writing, not to the copy loaded at the start
+      of the session.
+
+    Args:
+        directory (str): storage directory of the agent, created if it does not exist
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, name: str) -> Path:
+        return self.directory.joinpath(name)
+
+    def exists(self, name: str) -> bool:
+        return self.path(name).exists()
+
+    @contextmanager
+    def lock(self, name: str):
+        """Exclusive advisory lock of a file, between all processes that use this class."""
+        with open(self.path(f"{name}.lock"), "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                # retries for 10 seconds before raising an OSError
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def read_json(self, name: str, default: Any = None) -> Any:
+        """Content of a json file, `default` if it does not exist."""
+        try:
+            with open(self.path(name), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+    def write_json(self, name: str, data: Any, **dump_kwargs):
+        """Replace the content of a json file atomically, `dump_kwargs` are passed to `json.dump`."""
+        path = self.path(name)
+        with tempfile.NamedTemporaryFile("w", dir=path.parent, delete=False, suffix=".tmp") as f:
+            try:
+                json.dump(data, f, **dump_kwargs)
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, path)
+
+    def update_json(self, name: str, update: Callable[[Any], Any], default: Any = None, **dump_kwargs) -> Any:
+        """Read a json file, apply `update` and write the result, all under the lock of the file.
+
+        Args:
+            name (str): file name in the storage directory
+            update (Callable[[Any], Any]): gets the current content (or `default`) and returns the new
+                content. Returning None keeps the (in place modified) current content.
+            default (Any, optional): content if the file does not exist. Defaults to None.
+
+        Returns:
+            Any: the written content
+        """
+        with self.lock(name):
+            data = self.read_json(name, default)
+            updated = update(data)
+            data = data if updated is None else updated
+            self.write_json(name, data, **dump_kwargs)
+        return data
+
+    def append_records(self, name: str, records: List[Any], key: str = None, **dump_kwargs) -> Any:
+        """Append records to a log file that is a json list, or a json dict with the list under `key`.
+
+        Returns:
+            Any: the written content, including the records of other sessions
+        """
+
+        def append(data):
+            (data if key is None else data.setdefault(key, [])).extend(records)
+
+        return self.update_json(name, append, [] if key is None else {}, **dump_kwargs)
@@ -0,0 +1,126 @@
+import random
+import time
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from geniusweb.bidspace.AllBidsList import AllBidsList
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.progress.Progress import Progress
+from geniusweb.progress.ProgressTime import ProgressTime
+
+# domains up to this size are searched exhaustively instead of by random sampling
+EXHAUSTIVE_SIZE = 2000
+
+
+class TurnBudget:
+    """Seconds an agent can spend on the search of a turn, derived from the time left until
+    the deadline and the observed turn times of the opponent.
+
+    To keep time for at least `reserve_rounds` more rounds, a round (the opponent's turn
+    plus ours) may take `remaining / reserve_rounds` seconds, so the search gets what is left
+    of that after the opponent's average turn, clamped to `[min_s, max_s]`. The opponent's
+    turn time is the time between the end of our turn and the start of the next one.
+    Sessions with a deadline in rounds instead of time always get `max_s`.
+
+    Args:
+        reserve_rounds (int, optional): rounds to keep time for. Defaults to 100.
+        min_s (float, optional): minimum budget in seconds. Defaults to 0.002.
+        max_s (float, optional): maximum budget in seconds. Defaults to 0.05.
+        alpha (float, optional): smoothing factor of the opponent turn time. Defaults to 0.3.
+    """
+
+    def __init__(self, reserve_rounds: int = 100, min_s: float = 0.002, max_s: float = 0.05, alpha: float = 0.3):
+        self.reserve_rounds = reserve_rounds
+        self.min_s = min_s
+        self.max_s = max_s
+        self.alpha = alpha
+        self.opponent_s: float = None
+        self._turn_end: float = None
+
+    def start_turn(self, progress: Progress, time_ms: float = None) -> float:
+        """Record the start of our turn and return the search budget of the turn in seconds."""
+        time_ms = time.time() * 1000 if time_ms is None else time_ms
+        if self._turn_end is not None:
+            opponent_s = max(0.0, time_ms / 1000 - self._turn_end)
+            if self.opponent_s is None:
+                self.opponent_s = opponent_s
+            else:
+                self.opponent_s += self.alpha * (opponent_s - self.opponent_s)
+
+        if not isinstance(progress, ProgressTime):
+            return self.max_s
+        remaining_s = (1 - progress.get(time_ms)) * progress.getDuration() / 1000
+        budget = remaining_s / self.reserve_rounds - (self.opponent_s or 0.0)
+        return min(self.max_s, max(self.min_s, budget))
+
+    def end_turn(self, time_ms: float = None):
+        """Record the end of our turn (after sending the action)."""
+        self._turn_end = (time.time() * 1000 if time_ms is None else time_ms) / 1000
+
+
+def candidate_bids(all_bids: AllBidsList, rng: random.Random = None) -> Iterator[Bid]:
+    """Candidates for a search: every bid once in random order for small domains, so the search
+    ends when they are exhausted, and an endless stream of random bids otherwise."""
+    rng = rng or random
+    size = all_bids.size()
+    if size <= EXHAUSTIVE_SIZE:
+        indices = list(range(size))
+        rng.shuffle(indices)
+        for index in indices:
+            yield all_bids.get(index)
+    else:
+        while True:
+            yield all_bids.get(rng.randrange(size))
+
+
+def anytime_batches(
+    candidates: Iterable, budget_s: float, batch_size: int = 32, max_candidates: int = None
+) -> Iterator[list]:
+    """Batches of candidates until the time budget expires (checked between batches), the
+    candidates are exhausted or `max_candidates` were handed out. The first batch is always
+    handed out, so a search has a result even with an expired budget."""
+    deadline = time.perf_counter() + budget_s
+    candidates = iter(candidates)
+    handed_out = 0
+    while max_candidates is None or handed_out < max_candidates:
+        size = batch_size if max_candidates is None else min(batch_size, max_candidates - handed_out)
+        batch = [candidate for _, candidate in zip(range(size), candidates)]
+        if not batch:
+            return
+        handed_out += len(batch)
+        yield batch
+        if time.perf_counter() >= deadline:
+            return
+
+
+def anytime_best(
+    candidates: Iterable,
+    score: Callable[[object], Optional[float]],
+    budget_s: float,
+    batch_size: int = 32,
+    max_candidates: int = None,
+) -> Tuple[object, float, int]:
+    """Best scoring candidate found within the time budget. Candidates with a score of None
+    are skipped.
+
+    Returns:
+        Tuple[object, float, int]: best candidate (None if no candidate had a score), its score
+            and the number of evaluated candidates
+    """
+    best, best_score, evaluated = None, None, 0
+    for batch in anytime_batches(candidates, budget_s, batch_size, max_candidates):
+        for candidate in batch:
+            candidate_score = score(candidate)
+            if candidate_score is not None and (best_score is None or candidate_score > best_score):
+                best, best_score = candidate, candidate_score
+        evaluated += len(batch)
+    return best, best_score, evaluated
+
+
+def anytime_filter(
+    candidates: Iterable, keep: Callable[[object], bool], budget_s: float, batch_size: int = 32, max_candidates: int = None
+) -> List:
+    """Candidates for which `keep` is true, among those evaluated within the time budget."""
+    kept = []
+    for batch in anytime_batches(candidates, budget_s, batch_size, max_candidates):
+        kept.extend(candidate for candidate in batch if keep(candidate))
+    return kept
@@ -0,0 +1,91 @@
+"""Measure the cold import time of `utils.runners` and every agent module.
+
+Every module is imported in a fresh Python process (repeated a few times, the fastest run
+counts), so the numbers include the cost of all libraries the module pulls in. Run from the
+root of the repository:
+
+    python -m utils.benchmark_imports                       # print import times
+    python -m utils.benchmark_imports --save baseline.json  # store them as a baseline
+    python -m utils.benchmark_imports --compare baseline.json --tolerance 1.5
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from statistics import median
+from typing import Dict, List
+
+AGENT_CLASS_PATTERN = re.compile(r"^class \w+\((\w+\.)?DefaultParty\)", re.MULTILINE)
+TIMER = (
+    "import time, importlib; start = time.perf_counter(); "
+    "importlib.import_module({module!r}); print(time.perf_counter() - start)"
+)
+
+
+def find_agent_modules(agents_dir: str = "agents") -> List[str]:
+    """Module names of all files in the agents directory that define a `DefaultParty` subclass."""
+    modules = []
+    for path in sorted(Path(agents_dir).rglob("*.py")):
+        if AGENT_CLASS_PATTERN.search(path.read_text(encoding="utf-8", errors="ignore")):
+            modules.append(".".join(path.with_suffix("").parts))
+    return modules
+
+
+def measure_import(module: str, repeat: int = 3) -> float:
+    """Fastest cold import time of a module in seconds, None if the import fails."""
+    times = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-c", TIMER.format(module=module)],
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            return None
+        times.append(float(process.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold import times of the runner and all agents.")
+    parser.add_argument("--repeat", type=int, default=3, help="imports per module, the fastest counts")
+    parser.add_argument("--save", help="write the import times to this json file")
+    parser.add_argument("--compare", help="compare with the import times in this json file")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor compared to the baseline")
+    args = parser.parse_args()
+
+    modules = ["utils.runners"] + find_agent_modules()
+    results: Dict[str, float] = {}
+    for module in modules:
+        results[module] = measure_import(module, args.repeat)
+        duration = "failed" if results[module] is None else f"{results[module] * 1000:8.1f} ms"
+        print(f"{duration:>11}  {module}")
+
+    succeeded = [t for t in results.values() if t is not None]
+    if succeeded:
+        print(f"\nmedian: {median(succeeded) * 1000:.1f} ms, max: {max(succeeded) * 1000:.1f} ms")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = [
+            module
+            for module, duration in results.items()
+            if duration is not None
+            and baseline.get(module) is not None
+            and duration > baseline[module] * args.tolerance
+        ]
+        for module in regressions:
+            print(f"REGRESSION: {module} {baseline[module] * 1000:.1f} ms -> {results[module] * 1000:.1f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+from typing import Dict, Iterator, List, Tuple
+
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.issuevalue.Value import Value
+
+
+class CompactBid:
+    """Bid stored as a tuple of value indices, one per issue of the domain (in the
+    order of `BidCodec.issues`). Instances are interned by their `BidCodec`, so equal
+    bids of a domain are the same object and compare and hash in constant time.
+
+    The methods `getIssues`, `getValue` and `getIssueValues` mirror those of the
+    geniusweb `Bid` so compact bids can be used where only these are needed. Use
+    `to_bid` to get a geniusweb `Bid` at the protocol boundary (e.g. to make an Offer).
+    """
+
+    __slots__ = ("indices", "codec", "_hash")
+
+    def __init__(self, indices: Tuple[int, ...], codec: "BidCodec"):
+        self.indices = indices
+        self.codec = codec
+        self._hash = hash(indices)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, CompactBid):
+            return self.indices == other.indices
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CompactBid{self.indices}"
+
+    def to_bid(self) -> Bid:
+        return self.codec.decode(self)
+
+    def getIssues(self) -> List[str]:
+        return self.codec.issues
+
+    def getValue(self, issue: str) -> Value:
+        position = self.codec.positions[issue]
+        return self.codec.values[position][self.indices[position]]
+
+    def getIssueValues(self) -> Dict[str, Value]:
+        return {
+            issue: values[index]
+            for issue, values, index in zip(self.codec.issues, self.codec.values, self.indices)
+        }
+
+
+class BidCodec:
+    """Converts between geniusweb bids and interned `CompactBid`s of a domain and
+    enumerates the bid space without creating geniusweb `Bid` objects.
+
+    Bids are numbered in mixed radix, the last issue changes fastest, so `get(i)`
+    and iteration give the bids in the same order.
+
+    Args:
+        domain (Domain): the domain of the negotiation
+    """
+
+    def __init__(self, domain: Domain):
+        self.issues: List[str] = sorted(domain.getIssues())
+        self.positions: Dict[str, int] = {issue: i for i, issue in enumerate(self.issues)}
+        self.values: List[List[Value]] = []
+        self.value_indices: List[Dict[Value, int]] = []
+        for issue in self.issues:
+            value_set = domain.getValues(issue)
+            values = [value_set.get(i) for i in range(value_set.size())]
+            self.values.append(values)
+            self.value_indices.append({value: i for i, value in enumerate(values)})
+        self._interned: Dict[Tuple[int, ...], CompactBid] = {}
+
+    def __len__(self) -> int:
+        size = 1
+        for values in self.values:
+            size *= len(values)
+        return size
+
+    def __iter__(self) -> Iterator[CompactBid]:
+        return (self.get(i) for i in range(len(self)))
+
+    def intern(self, indices: Tuple[int, ...]) -> CompactBid:
+        """The unique `CompactBid` with these value indices."""
+        compact_bid = self._interned.get(indices)
+        if compact_bid is None:
+            compact_bid = self._interned[indices] = CompactBid(indices, self)
+        return compact_bid
+
+    def get(self, index: int) -> CompactBid:
+        """Bid number `index` of the bid space."""
+        indices = []
+        for values in reversed(self.values):
+            index, value_index = divmod(index, len(values))
+            indices.append(value_index)
+        return self.intern(tuple(reversed(indices)))
+
+    def encode(self, bid: Bid) -> CompactBid:
+        """Compact form of a complete geniusweb bid of this domain."""
+        return self.intern(
+            tuple(
+                value_indices[bid.getValue(issue)]
+                for issue, value_indices in zip(self.issues, self.value_indices)
+            )
+        )
+
+    def decode(self, compact_bid: CompactBid) -> Bid:
+        """New geniusweb `Bid` for a compact bid."""
+        return Bid(compact_bid.getIssueValues())
+
+    def clear(self):
+        """Forget all interned bids, e.g. after a full bid space scan."""
+        self._interned.clear()
@@ -1,26 +1,137 @@
+import argparse
 import json
 import math
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from itertools import product
 from math import sqrt
-from random import randint
 from shutil import rmtree
 from string import ascii_uppercase
-from typing import Iterable
+from typing import Iterable, Tuple
 
 import numpy as np
 import plotly.graph_objects as go
-from numpy.random import dirichlet
 
 NUM_DOMAINS_TO_GENERATE = 50
+DEFAULT_SEED = 0
+# number of encoded bids per chunk when calculating specials in streaming mode
+DEFAULT_CHUNK_SIZE = 100_000
+# domains with more bids than this use the streaming specials calculation by default
+STREAMING_THRESHOLD = 50_000
 
 
 def main():
-    for i in range(NUM_DOMAINS_TO_GENERATE):
-        domain = Domain.create_random(f"domain{i:03d}")
-        domain.calculate_specials()
+    parser = argparse.ArgumentParser(description="Generate random negotiation domains in parallel.")
+    parser.add_argument("--num", type=int, default=NUM_DOMAINS_TO_GENERATE, help="number of domains to generate")
+    parser.add_argument("--start", type=int, default=0, help="index of the first domain")
+    parser.add_argument("--prefix", default="domain", help="name prefix of the domains")
+    parser.add_argument("--output", default="domains/", help="directory to write the domains to")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="base seed, every domain gets its own seed derived from it")
+    parser.add_argument("--size", type=int, nargs=2, default=[200, 10000], metavar=("MIN", "MAX"), help="range of the number of bids")
+    parser.add_argument("--opposition", type=float, nargs=2, default=None, metavar=("MIN", "MAX"), help="only accept domains with an opposition in this range")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument(
+        "--visualisation",
+        choices=["now", "deferred", "none"],
+        default="now",
+        help="render the visualisation while generating, skip it now and render it with --render-only later, or never",
+    )
+    parser.add_argument("--streaming", action="store_true", default=None, help="calculate specials in bounded memory (default: only for domains above STREAMING_THRESHOLD bids)")
+    parser.add_argument("--render-only", action="store_true", help="only render missing visualisations of existing domains")
+    parser.add_argument("--overwrite", action="store_true", help="regenerate domains that already exist")
+    args = parser.parse_args()
+
+    names = [f"{args.prefix}{i:02d}" for i in range(args.start, args.start + args.num)]
+
+    if args.render_only:
+        jobs = [(render_visualisation, (os.path.join(args.output, name),)) for name in names]
+    else:
+        jobs = []
+        for index, name in zip(range(args.start, args.start + args.num), names):
+            if not args.overwrite and is_complete(os.path.join(args.output, name), args.visualisation == "now"):
+                print(f"skipping {name}, already generated")
+                continue
+            settings = (
+                name,
+                (args.seed, index),
+                args.output,
+                tuple(args.size),
+                args.opposition,
+                args.visualisation == "now",
+                args.streaming,
+            )
+            jobs.append((generate_domain, settings))
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(func, *func_args): func_args[0] for func, func_args in jobs}
+        for future in as_completed(futures):
+            print(f"finished {futures[future]}: {future.result()}")
+
+
+def generate_domain(
+    name: str,
+    seed: Tuple[int, int],
+    parent_path: str,
+    size_range: Tuple[int, int] = (200, 10000),
+    opposition_range: Tuple[float, float] = None,
+    visualise: bool = True,
+    streaming: bool = None,
+    max_attempts: int = 100,
+) -> str:
+    """Generate a single random domain with its specials and write it to file. The random
+    generator is seeded with `seed`, so the same seed always results in the same domain,
+    regardless of the worker process or the order in which domains are generated.
+
+    Args:
+        name (str): name of the domain
+        seed (Tuple[int, int]): seed of the random generator, typically (base seed, domain index)
+        parent_path (str): directory to write the domain to
+        size_range (Tuple[int, int], optional): range of the number of bids. Defaults to (200, 10000).
+        opposition_range (Tuple[float, float], optional): if set, domains are regenerated until the
+            opposition is within this range. Defaults to None.
+        visualise (bool, optional): render the visualisation pdf. Defaults to True.
+        streaming (bool, optional): calculate the specials in bounded memory. Defaults to None,
+            which enables it for domains with more than `STREAMING_THRESHOLD` bids.
+        max_attempts (int, optional): maximum number of attempts to meet the opposition range. Defaults to 100.
+
+    Returns:
+        str: short description of the generated domain
+    """
+    rng = np.random.default_rng(seed)
+    for _ in range(max_attempts):
+        domain = Domain.create_random(name, rng, size_range)
+        # decided per attempt, every attempt draws a domain of a different size
+        use_streaming = streaming if streaming is not None else domain.get_size() > STREAMING_THRESHOLD
+        domain.calculate_specials(streaming=use_streaming)
+        if opposition_range is None or opposition_range[0] <= domain.opposition <= opposition_range[1]:
+            break
+    else:
+        raise ValueError(f"Could not generate {name} with opposition in {opposition_range}")
+
+    if visualise:
         domain.generate_visualisation()
-        domain.to_file("domains/")
+    domain.to_file(parent_path)
+
+    return f"size: {domain.get_size()}, opposition: {domain.opposition:.4f}, distribution: {domain.distribution:.4f}"
+
+
+def render_visualisation(directory: str) -> str:
+    """Render the visualisation of a domain that was generated without it."""
+    if os.path.exists(os.path.join(directory, "visualisation.pdf")):
+        return "visualisation exists"
+    domain = Domain.from_directory(directory)
+    domain.generate_visualisation()
+    domain.visualisation.write_image(file=os.path.join(directory, "visualisation.pdf"), scale=5)
+    return "visualisation rendered"
+
+
+def is_complete(directory: str, with_visualisation: bool) -> bool:
+    """The specials are written after the domain and profiles, so a domain directory is
+    complete once they exist (and the visualisation if that is rendered as well).
+    """
+    if not os.path.exists(os.path.join(directory, "specials.json")):
+        return False
+    return not with_visualisation or os.path.exists(os.path.join(directory, "visualisation.pdf"))
 
 
 class Profile:
@@ -49,9 +160,12 @@ class Profile:
         return cls(profile, issue_weights, value_weights)
 
     @classmethod
-    def create_random(cls, domain, name):
+    def create_random(cls, domain, name, rng: np.random.Generator = None):
+        if rng is None:
+            rng = np.random.default_rng()
+
         def dirichlet_dist(names, mode, alpha=1):
-            distribution = (dirichlet([alpha] * len(names)) * 100000).astype(int)
+            distribution = (rng.dirichlet([alpha] * len(names)) * 100000).astype(int)
             if mode == "issues":
                 distribution[0] += 100000 - np.sum(distribution)
             if mode == "values":
@@ -130,12 +244,14 @@ class Domain:
         self.visualisation = visualisation
 
     @classmethod
-    def create_random(cls, name):
-        domain_size = randint(200, 10000)
+    def create_random(cls, name, rng: np.random.Generator = None, size_range: Tuple[int, int] = (200, 10000)):
+        if rng is None:
+            rng = np.random.default_rng()
+        domain_size = int(rng.integers(size_range[0], size_range[1], endpoint=True))
 
         while True:
-            num_issues = randint(4, 10)
-            spread = dirichlet([1] * num_issues)
+            num_issues = int(rng.integers(4, 10, endpoint=True))
+            spread = rng.dirichlet([1] * num_issues)
             multiplier = (domain_size / np.prod(spread)) ** (1.0 / num_issues)
             values_per_issue = np.round(multiplier * spread).astype(np.int32)
             values_per_issue = np.clip(values_per_issue, 2, None)
@@ -145,12 +261,12 @@ class Domain:
 
         issuesValues = {}
         for issue, num_values in zip(issues, values_per_issue):
-            values = {"values": [f"value{x}" for x in ascii_uppercase[:num_values]]}
+            values = {"values": [f"value{_letters(x)}" for x in range(num_values)]}
             issuesValues[f"issue{issue}"] = values
 
         domain = {"name": name, "issuesValues": issuesValues}
-        profile_A = Profile.create_random(domain, "profileA")
-        profile_B = Profile.create_random(domain, "profileB")
+        profile_A = Profile.create_random(domain, "profileA", rng)
+        profile_B = Profile.create_random(domain, "profileB", rng)
         return cls(domain, profile_A, profile_B)
 
     @classmethod
@@ -179,11 +295,27 @@ class Domain:
             domain = cls(domain, profile_A, profile_B)
             return domain
 
-    def calculate_specials(self):
+    def calculate_specials(self, streaming: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Calculate the Pareto front, distribution and special bids (social welfare, Nash,
+        Kalai-Smorodinsky) of the domain.
+
+        Args:
+            streaming (bool, optional): walk the bid space in chunks of encoded bids with
+                bounded memory instead of materialising all bids, needed for domains with
+                millions of bids. Defaults to False.
+            chunk_size (int, optional): number of bids per chunk in streaming mode.
+                Defaults to DEFAULT_CHUNK_SIZE.
+
+        Returns:
+            bool: False if the specials were already calculated
+        """
         if self.nash_bid:
             return False
-        self.pareto_front = self.get_pareto(list(self.iter_bids()))
-        self.distribution = self.get_distribution(self.iter_bids())
+        if streaming:
+            self.pareto_front, self.distribution = self.get_pareto_streaming(chunk_size)
+        else:
+            self.pareto_front = self.get_pareto(list(self.iter_bids()))
+            self.distribution = self.get_distribution(self.iter_bids())
 
         SW_utility = 0
         nash_utility = 0
@@ -268,7 +400,7 @@ class Domain:
 
         fig.update_layout(
             title=dict(
-                text=f"{self.get_name()}<br><sub>(size: {len(list(self.iter_bids()))}, opposition: {self.opposition:.4f}, distribution: {self.distribution:.4f})</sub>",
+                text=f"{self.get_name()}<br><sub>(size: {self.get_size()}, opposition: {self.opposition:.4f}, distribution: {self.distribution:.4f})</sub>",
                 x=0.5,
                 xanchor="center",
             )
@@ -292,7 +424,7 @@ class Domain:
                 f.write(
                     json.dumps(
                         {
-                            "size": len(list(self.iter_bids())),
+                            "size": self.get_size(),
                             "opposition": self.opposition,
                             "distribution": self.distribution,
                             "social_welfare": self.SW_bid,
@@ -312,6 +444,100 @@ class Domain:
     def iter_bids(self) -> Iterable:
         return iter(self)
 
+    def get_size(self) -> int:
+        return math.prod(len(v["values"]) for v in self.domain["issuesValues"].values())
+
+    def iter_encoded_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
+        """Iterate over the bid space in chunks. Every bid is encoded as an integer in a
+        mixed-radix system with one digit (value index) per issue, in the same order as
+        `iter_bids`.
+
+        Args:
+            chunk_size (int, optional): number of bids per chunk. Defaults to DEFAULT_CHUNK_SIZE.
+
+        Yields:
+            Tuple[np.ndarray, np.ndarray]: codes of shape (n,) and value indices of shape (n, num_issues)
+        """
+        radices = np.array([len(v["values"]) for v in self.domain["issuesValues"].values()], dtype=np.int64)
+        # the last issue changes fastest, as in itertools.product
+        strides = np.concatenate((np.cumprod(radices[::-1])[::-1][1:], [1]))
+        size = self.get_size()
+        for start in range(0, size, chunk_size):
+            codes = np.arange(start, min(start + chunk_size, size), dtype=np.int64)
+            yield codes, (codes[:, None] // strides) % radices
+
+    def decode_bid(self, code: int) -> dict:
+        """Convert an encoded bid (see `iter_encoded_chunks`) back to a bid dictionary."""
+        bid = {}
+        for issue, values in reversed(list(self.domain["issuesValues"].items())):
+            code, index = divmod(int(code), len(values["values"]))
+            bid[issue] = values["values"][index]
+        return dict(reversed(list(bid.items())))
+
+    def get_utility_tables(self) -> Tuple[list, list]:
+        """Weighted value utilities per issue of both profiles as arrays indexed by value index."""
+        tables = []
+        for profile in (self.profile_A, self.profile_B):
+            tables.append(
+                [
+                    np.array([profile.issue_weights[issue] * profile.value_weights[issue][v] for v in values["values"]])
+                    for issue, values in self.domain["issuesValues"].items()
+                ]
+            )
+        return tables[0], tables[1]
+
+    def get_pareto_streaming(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[list, float]:
+        """Calculate the Pareto front and distribution with memory bounded by the chunk size.
+
+        The first pass keeps a running Pareto front of encoded bids that is merged with
+        the front of every chunk. The second pass accumulates the distance of every bid
+        to the final front. Ties are resolved like `get_pareto`: of bids with identical
+        utilities only the first one is on the front.
+
+        Args:
+            chunk_size (int, optional): number of bids per chunk. Defaults to DEFAULT_CHUNK_SIZE.
+
+        Returns:
+            Tuple[list, float]: Pareto front (as `get_pareto`) and distribution (as `get_distribution`)
+        """
+        tables_A, tables_B = self.get_utility_tables()
+
+        def chunk_utilities(indices):
+            utilities = np.zeros((len(indices), 2))
+            for issue, (table_A, table_B) in enumerate(zip(tables_A, tables_B)):
+                utilities[:, 0] += table_A[indices[:, issue]]
+                utilities[:, 1] += table_B[indices[:, issue]]
+            return utilities
+
+        front_codes = np.empty(0, dtype=np.int64)
+        front_utilities = np.empty((0, 2))
+        for codes, indices in self.iter_encoded_chunks(chunk_size):
+            utilities = chunk_utilities(indices)
+            candidates = np.concatenate((front_utilities, utilities))
+            candidate_codes = np.concatenate((front_codes, codes))
+            keep = _pareto_indices(candidates)
+            front_codes, front_utilities = candidate_codes[keep], candidates[keep]
+
+        # sum of the distances to the closest bid on the Pareto front, limit the size of the
+        # distance matrix by splitting the chunks further depending on the size of the front
+        sub_chunk_size = max(1, 4_000_000 // len(front_codes))
+        min_distance_sum = 0.0
+        for _, indices in self.iter_encoded_chunks(chunk_size):
+            utilities = chunk_utilities(indices)
+            for start in range(0, len(utilities), sub_chunk_size):
+                part = utilities[start : start + sub_chunk_size]
+                distances = np.linalg.norm(part[:, None, :] - front_utilities[None, :, :], axis=2)
+                min_distance_sum += float(np.sum(np.min(distances, axis=1)))
+        distribution = min_distance_sum / self.get_size()
+
+        order = np.argsort(front_utilities[:, 0], kind="stable")
+        pareto_front = [
+            {"bid": self.decode_bid(code), "utility": [float(u_A), float(u_B)]}
+            for code, (u_A, u_B) in zip(front_codes[order], front_utilities[order])
+        ]
+
+        return pareto_front, distribution
+
     def get_utilities(self, bid):
         return self.profile_A.get_utility(bid), self.profile_B.get_utility(bid)
 
@@ -425,5 +651,28 @@ class Domain:
         return str(self.domain)
 
 
+def _letters(index: int) -> str:
+    """Spreadsheet style name of an index (A, B, ..., Z, AA, AB, ...), so that issues can
+    have more than 26 values.
+    """
+    name = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        name = ascii_uppercase[remainder] + name
+    return name
+
+
+def _pareto_indices(utilities: np.ndarray) -> np.ndarray:
+    """Indices of the points in an (n, 2) utility array that are not weakly dominated by an
+    earlier point. Sorting on utility A (descending) and then B (descending) leaves a point
+    on the front only if its utility B exceeds that of every point before it.
+    """
+    order = np.lexsort((-utilities[:, 1], -utilities[:, 0]))
+    utility_B = utilities[order, 1]
+    best_before = np.concatenate(([-np.inf], np.maximum.accumulate(utility_B)[:-1]))
+    return np.sort(order[utility_B > best_before])
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,90 @@
+import heapq
+from math import prod
+from typing import Iterator, List, Tuple
+
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
+    LinearAdditiveUtilitySpace,
+)
+
+from utils.utility_evaluator import UtilityEvaluator
+
+
+class KBestBids:
+    """Bids of a linear additive profile in descending order of utility, generated lazily.
+
+    Every issue has its values sorted by weighted utility, a bid is a tuple of ranks into
+    these lists. Starting from the best bid, a priority queue is expanded with the bids
+    that have one rank increased, where only ranks at or after the last increased issue
+    are increased, so every bid is generated exactly once. Getting the k best bids costs
+    O(k * issues * log(k * issues)) instead of evaluating and sorting the full bid space.
+
+    Generated bids are kept, so the enumerator can be indexed like a sorted list of
+    `(bid, utility)` tuples: `best[0]` is the best bid, `best[i]` generates bids up to rank i.
+
+    Args:
+        profile (LinearAdditiveUtilitySpace): profile to rank the bids by
+    """
+
+    def __init__(self, profile: LinearAdditiveUtilitySpace):
+        evaluator = UtilityEvaluator(profile)
+        self.issues = evaluator.issues
+        # per issue (value, weighted utility) pairs, best first
+        self.options = [sorted(table.items(), key=lambda item: item[1], reverse=True) for table in evaluator.tables]
+        self.size = prod(len(options) for options in self.options)
+
+        self._ranked: List[Tuple[Bid, float]] = []
+        start = (0,) * len(self.issues)
+        # entries are (negated utility, ranks, first issue whose rank may be increased)
+        self._queue = [(-self._utility(start), start, 0)] if self.size > 0 else []
+
+    def _utility(self, ranks: Tuple[int, ...]) -> float:
+        return sum(options[rank][1] for options, rank in zip(self.options, ranks))
+
+    def __len__(self) -> int:
+        """Number of bids in the domain, as for a list of all bids."""
+        return self.size
+
+    def __getitem__(self, index: int) -> Tuple[Bid, float]:
+        if index < 0:
+            raise IndexError("negative indices would need the full bid space")
+        while len(self._ranked) <= index:
+            if self.next_best() is None:
+                raise IndexError(index)
+        return self._ranked[index]
+
+    def __iter__(self) -> Iterator[Tuple[Bid, float]]:
+        index = 0
+        while index < len(self._ranked) or self.next_best() is not None:
+            yield self._ranked[index]
+            index += 1
+
+    def next_best(self) -> Tuple[Bid, float]:
+        """Generate the next bid in descending order of utility, None if all bids were generated."""
+        if not self._queue:
+            return None
+        negated_utility, ranks, first_issue = heapq.heappop(self._queue)
+        for issue in range(first_issue, len(ranks)):
+            if ranks[issue] + 1 < len(self.options[issue]):
+                child = ranks[:issue] + (ranks[issue] + 1,) + ranks[issue + 1 :]
+                heapq.heappush(self._queue, (-self._utility(child), child, issue))
+
+        bid = Bid({issue: options[rank][0] for issue, options, rank in zip(self.issues, self.options, ranks)})
+        self._ranked.append((bid, -negated_utility))
+        return self._ranked[-1]
+
+    def take(self, k: int) -> List[Tuple[Bid, float]]:
+        """The k best bids (fewer if the domain is smaller)."""
+        if k > 0:
+            try:
+                self[k - 1]
+            except IndexError:
+                pass
+        return self._ranked[:k]
+
+    def bids_above(self, threshold: float) -> Iterator[Tuple[Bid, float]]:
+        """All bids with a utility of at least `threshold`, best first."""
+        for bid, utility in self:
+            if utility < threshold:
+                return
+            yield bid, utility
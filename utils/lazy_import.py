@@ -0,0 +1,37 @@
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import a module that is only executed when one of its attributes is first accessed.
+    Use this for heavy libraries (pandas, lightgbm, ...) that are needed in some code paths
+    only, so that importing an agent stays cheap.
+
+    Args:
+        name (str): full name of the module
+
+    Returns:
+        ModuleType: the (not yet executed) module
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def load(module: ModuleType) -> ModuleType:
+    """Execute a module from `lazy_import` now instead of on first use, e.g. while an agent
+    handles its `Settings`, before the negotiation deadline matters.
+    """
+    # any attribute access executes a lazy module
+    vars(module)
+    return module
@@ -0,0 +1,75 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+
+class DomainSpecials(NamedTuple):
+    """Special outcomes of a domain in utility space of (profile A, profile B)."""
+
+    pareto_front: np.ndarray  # shape (n, 2)
+    nash: np.ndarray  # shape (2,)
+    kalai: np.ndarray  # shape (2,)
+    max_social_welfare: float
+    size: int
+
+
+@lru_cache(maxsize=None)
+def load_specials(domain_dir: str) -> Optional[DomainSpecials]:
+    """Load the `specials.json` of a domain directory (as created by `utils/create_domains.py`)
+    once per process. Returns None if the domain has no specials file.
+    """
+    specials_file = Path(domain_dir, "specials.json")
+    if not specials_file.exists():
+        return None
+
+    with open(specials_file, "r", encoding="utf-8") as f:
+        specials = json.load(f)
+
+    pareto_front = np.array([bid["utility"] for bid in specials["pareto_front"]], dtype=np.float64)
+    return DomainSpecials(
+        pareto_front=pareto_front,
+        nash=np.array(specials["nash"]["utility"], dtype=np.float64),
+        kalai=np.array(specials["kalai"]["utility"], dtype=np.float64),
+        max_social_welfare=float(np.max(pareto_front.sum(axis=1))),
+        size=specials["size"],
+    )
+
+
+def outcome_metrics(profiles: List[str], utilities: List[float]) -> dict:
+    """Distance based quality metrics of a session outcome. These only depend on the real
+    utilities of the outcome, not on opponent models.
+
+    Args:
+        profiles (List[str]): profile files of the agents in the session (in agent order)
+        utilities (List[float]): utility of the outcome for every agent (in agent order)
+
+    Returns:
+        dict: `pareto_distance`, `nash_distance`, `kalai_distance` (Euclidean distance in
+            utility space) and `efficiency` (social welfare relative to the maximum social
+            welfare of the domain). Empty if the domain has no specials or the profiles are
+            not named profileA/profileB.
+    """
+    profile_paths = [Path(p) for p in profiles]
+    if profile_paths[0].parent != profile_paths[1].parent:
+        return {}
+    names = [p.stem for p in profile_paths]
+    if sorted(names) != ["profileA", "profileB"]:
+        return {}
+
+    specials = load_specials(str(profile_paths[0].parent))
+    if specials is None:
+        return {}
+
+    # specials are expressed as (utility A, utility B)
+    point = np.array(utilities if names[0] == "profileA" else utilities[::-1], dtype=np.float64)
+
+    pareto_distance = np.min(np.hypot(*(specials.pareto_front - point).T))
+    return {
+        "pareto_distance": float(pareto_distance),
+        "nash_distance": float(np.hypot(*(specials.nash - point))),
+        "kalai_distance": float(np.hypot(*(specials.kalai - point))),
+        "efficiency": float(point.sum() / specials.max_social_welfare),
+    }
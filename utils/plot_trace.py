@@ -1,12 +1,128 @@
 import os
 from collections import defaultdict
+from typing import List
 
+import numpy as np
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 
+# traces with more offers than this are plotted in scalable mode by default
+SCALABLE_THRESHOLD = 10000
+# default number of points that is kept per line in scalable mode
+DEFAULT_MAX_POINTS = 4000
 
-def plot_trace(results_trace: dict, plot_file: str):
+
+def plot_trace(results_trace: dict, plot_file: str, scalable: bool = None, max_points: int = DEFAULT_MAX_POINTS):
+    """Plot the utilities of the offers in a session trace to an html file.
+
+    Args:
+        results_trace (dict): session trace as returned by `run_session`
+        plot_file (str): file to write the plot to (extension is replaced by .html)
+        scalable (bool, optional): use WebGL rendering, decimate every line to at most
+            `max_points` points and only create hover text for the points that are kept.
+            Defaults to None, which enables it for traces with more than `SCALABLE_THRESHOLD` actions.
+        max_points (int, optional): point budget per line in scalable mode. Defaults to DEFAULT_MAX_POINTS.
+    """
+    if scalable is None:
+        scalable = len(results_trace["actions"]) > SCALABLE_THRESHOLD
+
+    fig = go.Figure()
+    last_index = _add_session_traces(fig, results_trace, scalable, max_points)
+
+    fig.update_layout(
+        # width=1000,
+        height=800,
+        legend={
+            "yanchor": "bottom",
+            "y": 1,
+            "xanchor": "left",
+            "x": 0,
+        },
+    )
+    fig.update_xaxes(title_text="round", range=[0, last_index + 1], ticks="outside")
+    fig.update_yaxes(title_text="utility", range=[0, 1], ticks="outside")
+    fig.write_html(f"{os.path.splitext(plot_file)[0]}.html")
+
+
+def plot_traces(
+    results_traces: List[dict],
+    plot_file: str,
+    titles: List[str] = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+    row_height: int = 400,
+):
+    """Plot many session traces (e.g. of a tournament) as subplots of a single html file.
+    All traces are rendered in scalable mode, so the file size depends on the point budget
+    and the number of sessions, not on the length of the sessions.
+
+    Args:
+        results_traces (List[dict]): session traces as returned by `run_session`
+        plot_file (str): file to write the plot to (extension is replaced by .html)
+        titles (List[str], optional): subplot title per session. Defaults to the agent names.
+        max_points (int, optional): point budget per line. Defaults to DEFAULT_MAX_POINTS.
+        row_height (int, optional): height of a single subplot in pixels. Defaults to 400.
+    """
+    if titles is None:
+        titles = [
+            " vs ".join(
+                v["party"]["partyref"].split(".")[-1]
+                for v in results_trace["partyprofiles"].values()
+            )
+            for results_trace in results_traces
+        ]
+
+    fig = make_subplots(
+        rows=len(results_traces), cols=1, subplot_titles=titles, vertical_spacing=0.2 / len(results_traces)
+    )
+    for row, results_trace in enumerate(results_traces, 1):
+        last_index = _add_session_traces(fig, results_trace, True, max_points, row=row)
+        fig.update_xaxes(range=[0, last_index + 1], ticks="outside", row=row, col=1)
+        fig.update_yaxes(title_text="utility", range=[0, 1], ticks="outside", row=row, col=1)
+
+    fig.update_layout(height=row_height * len(results_traces))
+    fig.write_html(f"{os.path.splitext(plot_file)[0]}.html")
+
+
+def decimate(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Select the indices of at most `max_points` points that preserve the shape of a line.
+    The line is split into `max_points // 2` buckets and of every bucket the points with
+    the minimum and maximum value are kept, so peaks and dips remain visible.
+
+    Args:
+        x (np.ndarray): x coordinates (sorted)
+        y (np.ndarray): y coordinates
+        max_points (int): point budget
+
+    Returns:
+        np.ndarray: sorted indices of the points to keep
+    """
+    if len(x) <= max_points:
+        return np.arange(len(x))
+
+    num_buckets = max(max_points // 2, 1)
+    bounds = np.linspace(0, len(x), num_buckets + 1).astype(np.int64)
+    starts = bounds[:-1]
+
+    # minimum and maximum per bucket through reduceat on the bucket start indices
+    bucket_min = np.minimum.reduceat(y, starts)
+    bucket_max = np.maximum.reduceat(y, starts)
+    bucket_ids = np.repeat(np.arange(num_buckets), np.diff(bounds))
+    is_min = y == bucket_min[bucket_ids]
+    is_max = y == bucket_max[bucket_ids]
+
+    # first occurrence of the minimum and maximum within each bucket
+    min_idx = np.flatnonzero(is_min)
+    min_idx = min_idx[np.unique(bucket_ids[min_idx], return_index=True)[1]]
+    max_idx = np.flatnonzero(is_max)
+    max_idx = max_idx[np.unique(bucket_ids[max_idx], return_index=True)[1]]
+
+    return np.union1d(min_idx, max_idx)
+
+
+def _collect_trace(results_trace: dict):
     utilities = defaultdict(lambda: defaultdict(lambda: {"x": [], "y": [], "bids": []}))
     accept = {"x": [], "y": [], "bids": []}
+    index = 0
     for index, action in enumerate(results_trace["actions"], 1):
         if "Offer" in action:
             offer = action["Offer"]
@@ -23,53 +139,57 @@ def plot_trace(results_trace: dict, plot_file: str):
                 accept["y"].append(util)
                 accept["bids"].append(offer["bid"]["issuevalues"])
 
-    fig = go.Figure()
+    return utilities, accept, index
+
+
+def _hover_text(bid: dict, util: float) -> str:
+    return "<br>".join(
+        [f"<b>utility: {util:.3f}</b><br>"] + [f"{i}: {v}" for i, v in bid.items()]
+    )
+
+
+def _add_session_traces(fig: go.Figure, results_trace: dict, scalable: bool, max_points: int, row: int = None) -> int:
+    utilities, accept, last_index = _collect_trace(results_trace)
+    scatter = go.Scattergl if scalable else go.Scatter
+    position = {"row": row, "col": 1} if row is not None else {}
+    group_prefix = f"{row}_" if row is not None else ""
+
     fig.add_trace(
-        go.Scatter(
+        scatter(
             mode="markers",
             x=accept["x"],
             y=accept["y"],
             name="agreement",
             marker={"color": "green", "size": 15},
             hoverinfo="skip",
-        )
+            showlegend=row in (None, 1),
+        ),
+        **position,
     )
 
     color = {0: "red", 1: "blue"}
     for i, (agent, data) in enumerate(utilities.items()):
         for actor, utility in data.items():
             name = "_".join(agent.split("_")[-2:])
-            text = []
-            for bid, util in zip(utility["bids"], utility["y"]):
-                text.append(
-                    "<br>".join(
-                        [f"<b>utility: {util:.3f}</b><br>"]
-                        + [f"{i}: {v}" for i, v in bid.items()]
-                    )
-                )
+            x, y, bids = utility["x"], utility["y"], utility["bids"]
+            if scalable:
+                keep = decimate(np.asarray(x), np.asarray(y, dtype=np.float64), max_points)
+                x = [x[k] for k in keep]
+                y = [y[k] for k in keep]
+                bids = [bids[k] for k in keep]
+            text = [_hover_text(bid, util) for bid, util in zip(bids, y)]
             fig.add_trace(
-                go.Scatter(
+                scatter(
                     mode="lines+markers" if agent == actor else "markers",
-                    x=utilities[agent][actor]["x"],
-                    y=utilities[agent][actor]["y"],
+                    x=x,
+                    y=y,
                     name=f"{name} offered" if agent == actor else f"{name} received",
-                    legendgroup=agent,
+                    legendgroup=f"{group_prefix}{agent}",
                     marker={"color": color[i]},
                     hovertext=text,
                     hoverinfo="text",
-                )
+                ),
+                **position,
             )
 
-    fig.update_layout(
-        # width=1000,
-        height=800,
-        legend={
-            "yanchor": "bottom",
-            "y": 1,
-            "xanchor": "left",
-            "x": 0,
-        },
-    )
-    fig.update_xaxes(title_text="round", range=[0, index + 1], ticks="outside")
-    fig.update_yaxes(title_text="utility", range=[0, 1], ticks="outside")
-    fig.write_html(f"{os.path.splitext(plot_file)[0]}.html")
+    return last_index
@@ -0,0 +1,73 @@
+import os
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+from geniusweb.profile.Profile import Profile
+from geniusweb.profileconnection.ProfileConnectionFactory import (
+    ProfileConnectionFactory,
+)
+from geniusweb.profileconnection.ProfileInterface import ProfileInterface
+from tudelft_utilities_logging.Reporter import Reporter
+from uri.uri import URI
+
+_original_create = ProfileConnectionFactory.create
+# parsed profiles per absolute file path, with the modification time of the file
+_profiles: Dict[str, Tuple[int, Profile]] = {}
+_lock = Lock()
+
+
+class CachedProfileConnection(ProfileInterface):
+    """Connection to a profile from the process-wide cache. Profiles are immutable, so
+    all connections to the same file share one profile object."""
+
+    def __init__(self, profile: Profile):
+        self._profile = profile
+
+    def getProfile(self) -> Profile:
+        return self._profile
+
+    def close(self):
+        pass
+
+
+def get_profile(uri: URI, reporter: Reporter = None) -> Profile:
+    """Parsed profile of a `file:` uri, only parsed again if the file was modified."""
+    path = os.path.abspath(urlparse(str(uri)).path)
+    mtime = os.stat(path).st_mtime_ns
+    with _lock:
+        cached = _profiles.get(path)
+        if cached is None or cached[0] != mtime:
+            connection = _original_create(uri, reporter)
+            cached = _profiles[path] = (mtime, connection.getProfile())
+            connection.close()
+    return cached[1]
+
+
+def _create(uri: URI, reporter: Reporter) -> ProfileInterface:
+    if urlparse(str(uri)).scheme != "file":
+        return _original_create(uri, reporter)
+    return CachedProfileConnection(get_profile(uri, reporter))
+
+
+def enable_profile_cache(enabled: bool = True):
+    """Let `ProfileConnectionFactory.create` return connections to cached profiles for
+    `file:` uris, for all agents in this process. Other uris are not affected."""
+    ProfileConnectionFactory.create = staticmethod(_create if enabled else _original_create)
+
+
+@contextmanager
+def profile_cache(enabled: bool = True):
+    """Enable the profile cache (see `enable_profile_cache`) for the duration of a session,
+    the original factory is restored afterwards."""
+    enable_profile_cache(enabled)
+    try:
+        yield
+    finally:
+        enable_profile_cache(False)
+
+
+def clear_profile_cache():
+    with _lock:
+        _profiles.clear()
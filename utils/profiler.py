@@ -0,0 +1,220 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from utils.session_cache import agent_directory
+
+# milliseconds between two stack samples
+DEFAULT_INTERVAL_MS = 5
+# samples between two writes of the stacks while the session runs
+DEFAULT_FLUSH_EVERY = 200
+DEFAULT_PROFILE_DIR = "results/profiles"
+# stacks with less than this share of the samples of an agent are left out of the flamegraph
+FLAMEGRAPH_MIN_SHARE = 0.002
+
+
+@lru_cache(maxsize=None)
+def _frame_label(code) -> str:
+    try:
+        file = os.path.relpath(code.co_filename)
+    except ValueError:
+        file = code.co_filename
+    # ";" separates frames in the collapsed stack format
+    return f"{code.co_name} ({file}:{code.co_firstlineno})".replace(";", ":")
+
+
+class AgentProfiler:
+    """Sampling profiler for the agents of a session, created from the `"profile_agents"`
+    entry of the session or tournament settings:
+
+        "profile_agents": {
+            "agents": ["TemplateAgent"],     # agent classes to profile, all agents if omitted
+            "dir": "results/profiles",       # output directory
+            "interval_ms": 5,                # time between two samples
+            "flush_every": 200,              # samples between two writes of the stacks
+        }
+
+    A background thread periodically samples the stacks of all threads. A sample is
+    attributed to an agent from the first frame that is in the source directory of the
+    agent, so it works for both engines and includes the library code called by the agent.
+    The stacks of every agent are written in the collapsed stack format (one
+    `frame;frame;frame count` line per stack) to `<dir>/<agent class>/<session>.collapsed`,
+    which can be read by flamegraph.pl, speedscope and `write_profile_summary`.
+
+    The files are written on exit and every `flush_every` samples while the session runs,
+    each time replacing the previous file atomically, so a session that is killed (e.g. by
+    the watchdog) still leaves the profile up to its last write.
+    """
+
+    def __init__(self, config: dict, agent_classes: List[str]):
+        self.directory = Path(config.get("dir", DEFAULT_PROFILE_DIR))
+        self.session = config.get("session", f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}")
+        self.interval = config.get("interval_ms", DEFAULT_INTERVAL_MS) / 1000
+        self.flush_every = config.get("flush_every", DEFAULT_FLUSH_EVERY)
+
+        selected = config.get("agents")
+        self.agent_dirs: Dict[str, str] = {}
+        for agent_class in agent_classes:
+            name = agent_class.split(".")[-1]
+            if selected is None or name in selected:
+                self.agent_dirs[agent_directory(agent_class) + os.sep] = name
+        self.stacks: Dict[str, Counter] = {name: Counter() for name in self.agent_dirs.values()}
+
+        self._file_agents: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="AgentProfiler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+    def _agent_of(self, file: str) -> str:
+        if file not in self._file_agents:
+            # the longest matching directory, in case agent directories are nested
+            matches = [d for d in self.agent_dirs if file.startswith(d)]
+            self._file_agents[file] = self.agent_dirs[max(matches, key=len)] if matches else None
+        return self._file_agents[file]
+
+    def _run(self):
+        own_thread = threading.get_ident()
+        samples = 0
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_thread:
+                    self._sample(frame)
+            samples += 1
+            if samples % self.flush_every == 0:
+                self.write()
+
+    def _sample(self, frame):
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack.reverse()
+        for i, code in enumerate(stack):
+            agent = self._agent_of(code.co_filename)
+            if agent is not None:
+                self.stacks[agent][tuple(stack[i:])] += 1
+                return
+
+    def write(self):
+        for agent, stacks in self.stacks.items():
+            if not stacks:
+                continue
+            agent_dir = self.directory.joinpath(agent)
+            agent_dir.mkdir(parents=True, exist_ok=True)
+            collapsed = Counter()
+            for stack, count in stacks.items():
+                collapsed[";".join(_frame_label(code) for code in stack)] += count
+            write_collapsed(collapsed, agent_dir.joinpath(f"{self.session}.collapsed"))
+
+
+def write_collapsed(stacks: Counter, file: Path):
+    # write to a temporary file first so that a killed process never leaves a partial file
+    with tempfile.NamedTemporaryFile("w", dir=file.parent, delete=False, suffix=".tmp", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    os.replace(f.name, file)
+
+
+def read_collapsed(file: Path) -> Counter:
+    stacks = Counter()
+    with open(file, "r", encoding="utf-8") as f:
+        for line in f:
+            stack, count = line.rstrip("\n").rsplit(" ", 1)
+            stacks[stack] += int(count)
+    return stacks
+
+
+def hotspots(stacks: Counter, top: int = 10) -> List[Tuple[str, int, int]]:
+    """Functions with the most samples.
+
+    Returns:
+        List[Tuple[str, int, int]]: function, samples in the function itself and samples
+            in the function or anything it called, sorted by the latter
+    """
+    self_samples, total_samples = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] += count
+        for frame in set(frames):
+            total_samples[frame] += count
+    return [(frame, self_samples[frame], total) for frame, total in total_samples.most_common(top)]
+
+
+def write_flamegraph(stacks: Counter, file: Path, title: str = None):
+    """Interactive flamegraph (icicle chart) of collapsed stacks as html file."""
+    import plotly.graph_objects as go
+
+    total = sum(stacks.values())
+    node_values = Counter()
+    for stack, count in stacks.items():
+        if count < total * FLAMEGRAPH_MIN_SHARE:
+            continue
+        frames = stack.split(";")
+        for depth in range(1, len(frames) + 1):
+            node_values[";".join(frames[:depth])] += count
+
+    ids = list(node_values.keys())
+    fig = go.Figure(
+        go.Icicle(
+            ids=ids,
+            labels=[node.rsplit(";", 1)[-1] for node in ids],
+            parents=[node.rsplit(";", 1)[0] if ";" in node else "" for node in ids],
+            values=[node_values[node] for node in ids],
+            branchvalues="total",
+            tiling={"orientation": "v", "flip": "y"},
+        )
+    )
+    fig.update_layout(title=title, margin={"t": 40, "l": 0, "r": 0, "b": 0})
+    fig.write_html(str(file))
+
+
+def write_profile_summary(directory: str, top: int = 15) -> Dict[str, list]:
+    """Aggregate the profiles of all sessions in a directory per agent. Writes per agent the
+    summed collapsed stacks and a flamegraph, and a `hotspots.txt` with the hottest
+    functions of all agents.
+
+    Args:
+        directory (str): output directory of the `AgentProfiler`s
+        top (int, optional): number of functions per agent in the hotspots. Defaults to 15.
+
+    Returns:
+        Dict[str, list]: hotspots per agent, see `hotspots`
+    """
+    directory = Path(directory)
+    summary = {}
+    lines = []
+    for agent_dir in sorted(p for p in directory.iterdir() if p.is_dir()):
+        stacks = Counter()
+        for file in agent_dir.glob("*.collapsed"):
+            stacks.update(read_collapsed(file))
+        if not stacks:
+            continue
+        agent = agent_dir.name
+        write_collapsed(stacks, directory.joinpath(f"{agent}.collapsed"))
+        write_flamegraph(stacks, directory.joinpath(f"{agent}_flamegraph.html"), agent)
+
+        summary[agent] = hotspots(stacks, top)
+        num_samples = sum(stacks.values())
+        lines.append(f"{agent} ({num_samples} samples)")
+        lines.append(f"{'self %':>8} {'total %':>8}  function")
+        for frame, self_samples, total_samples in summary[agent]:
+            lines.append(f"{self_samples / num_samples:8.1%} {total_samples / num_samples:8.1%}  {frame}")
+        lines.append("")
+
+    with open(directory.joinpath("hotspots.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return summary
@@ -0,0 +1,203 @@
+import logging
+import sys
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Union
+
+from tudelft_utilities_logging.Reporter import Reporter
+
+DEFAULT_BUFFER_SIZE = 1000
+
+
+class LazyMessage:
+    """Log message that is only formatted when it is actually written.
+
+    Either pass a format string with arguments (`LazyMessage("utility: %.3f", util)`)
+    or a callable that returns the message (`LazyMessage(lambda: bid_to_string(bid))`).
+    Both `logging` and the reporters below only call `str()` on a message when its
+    level passes the threshold, so a filtered message costs one object allocation.
+    """
+
+    __slots__ = ("msg", "args")
+
+    def __init__(self, msg, *args):
+        self.msg = msg
+        self.args = args
+
+    def __str__(self) -> str:
+        if callable(self.msg):
+            return str(self.msg())
+        if self.args:
+            return self.msg % self.args
+        return str(self.msg)
+
+
+def _to_level(level: Union[int, str]) -> int:
+    if isinstance(level, int):
+        return level
+    return logging.getLevelName(level.upper())
+
+
+class RingBufferHandler(logging.Handler):
+    """Logging handler that keeps the last `capacity` records in memory. The buffer is
+    written to the target stream when a record of at least `flush_level` arrives or
+    when `flush` is called, otherwise old records are silently dropped.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_BUFFER_SIZE, flush_level: int = logging.ERROR, stream=None):
+        super().__init__()
+        self.buffer = deque(maxlen=capacity)
+        self.flush_level = flush_level
+        self.stream = stream if stream is not None else sys.stdout
+        self.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+
+    def emit(self, record: logging.LogRecord):
+        self.buffer.append(record)
+        if record.levelno >= self.flush_level:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            while self.buffer:
+                self.stream.write(self.format(self.buffer.popleft()) + "\n")
+            self.stream.flush()
+        finally:
+            self.release()
+
+    def clear(self):
+        self.buffer.clear()
+
+
+class BufferedReporter(Reporter):
+    """geniusweb `Reporter` with a level threshold and an in-memory ring buffer.
+
+    Messages below `level` are dropped before they are formatted. Other messages are
+    kept (unformatted) in a ring buffer of `capacity` entries, which is written to
+    `stream` when a message of at least `flush_level` is logged or when `flush` is called.
+    """
+
+    def __init__(
+        self,
+        level: Union[int, str] = logging.WARNING,
+        capacity: int = DEFAULT_BUFFER_SIZE,
+        flush_level: Union[int, str] = logging.ERROR,
+        stream=None,
+    ):
+        self.level = _to_level(level)
+        self.flush_level = _to_level(flush_level)
+        self.buffer = deque(maxlen=capacity)
+        self.stream = stream if stream is not None else sys.stdout
+
+    def log(self, level: int, msg, thrown: BaseException = None):
+        if level < self.level:
+            return
+        self.buffer.append((level, msg, thrown))
+        if level >= self.flush_level:
+            self.flush()
+
+    def flush(self):
+        while self.buffer:
+            level, msg, thrown = self.buffer.popleft()
+            line = f"{logging.getLevelName(level)}:{msg}"
+            if thrown is not None:
+                line += f" ({type(thrown).__name__}: {thrown})"
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def clear(self):
+        self.buffer.clear()
+
+
+class SessionReporting:
+    """Logging setup for negotiation sessions, created from the `"reporter"` entry of the
+    session or tournament settings:
+
+        "reporter": {
+            "level": "WARNING",                      # default threshold for all agents
+            "agent_levels": {"MyAgent": "INFO"},     # per agent class name threshold
+            "buffer_size": 1000,                     # records kept in memory
+        }
+
+    Agents log through `ReportToLogger`, which uses a Python logger named after the agent
+    class. The thresholds are set on those loggers, so a message below the threshold is
+    discarded by `Logger.isEnabledFor` before a record is created. Records that pass are
+    kept in a ring buffer that is flushed on errors or when `flush` is called.
+
+    The handlers of the root logger are only replaced while a session runs (see `session`),
+    afterwards the original handlers and level are restored.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.level = _to_level(config.get("level", logging.WARNING))
+        self.agent_levels: Dict[str, int] = {
+            k: _to_level(v) for k, v in config.get("agent_levels", {}).items()
+        }
+        capacity = config.get("buffer_size", DEFAULT_BUFFER_SIZE)
+
+        self.reporter = BufferedReporter(self.level, capacity)
+        self.handler = RingBufferHandler(capacity)
+
+    @contextmanager
+    def session(self, agent_classes):
+        """Route the logging of one session through the ring buffers.
+
+        Records of earlier sessions are dropped, the agent thresholds are applied and the
+        handlers of the root logger are replaced by the ring buffer handler. On exit the
+        root logger gets its original handlers and level back, and the buffers are written
+        if the session raised.
+        """
+        self.clear()
+        self.apply(agent_classes)
+
+        # route all agent logging through the buffer instead of the console handlers
+        root_logger = logging.getLogger()
+        handlers, level = list(root_logger.handlers), root_logger.level
+        for handler in handlers:
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(self.handler)
+        root_logger.setLevel(self.level)
+        try:
+            yield self
+        except BaseException:
+            self.flush()
+            raise
+        finally:
+            root_logger.removeHandler(self.handler)
+            for handler in handlers:
+                root_logger.addHandler(handler)
+            root_logger.setLevel(level)
+
+    def apply(self, agent_classes):
+        """Set the logging thresholds of the agents in a session. This is done before every
+        session (before the agents are created), so changes an agent made to its logger in an
+        earlier session do not carry over.
+        """
+        for agent_class in agent_classes:
+            name = agent_class.split(".")[-1]
+            agent_logger = logging.getLogger(name)
+            agent_logger.setLevel(self.agent_levels.get(name, self.level))
+            # make sure records end up in the ring buffer only
+            for handler in list(agent_logger.handlers):
+                agent_logger.removeHandler(handler)
+            agent_logger.propagate = True
+
+    def flush(self):
+        self.reporter.flush()
+        self.handler.flush()
+
+    def clear(self):
+        self.reporter.clear()
+        self.handler.clear()
+
+
+_session_reporting: SessionReporting = None
+
+
+def get_session_reporting(config: dict) -> SessionReporting:
+    """Return the process wide `SessionReporting`, (re)creating it if the config changed."""
+    global _session_reporting
+    if _session_reporting is None or _session_reporting.config != config:
+        _session_reporting = SessionReporting(config)
+    return _session_reporting
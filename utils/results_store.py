@@ -0,0 +1,180 @@
+import json
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import List
+
+from utils.scheduler import domain_size
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    started REAL NOT NULL,
+    settings TEXT
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER REFERENCES runs (id),
+    finished REAL NOT NULL,
+    domain TEXT,
+    domain_size INTEGER,
+    result TEXT,
+    nash_product REAL,
+    social_welfare REAL,
+    num_offers INTEGER,
+    settings TEXT,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS session_agents (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    side INTEGER NOT NULL,
+    agent TEXT NOT NULL,
+    opponent TEXT NOT NULL,
+    utility REAL,
+    opponent_utility REAL,
+    PRIMARY KEY (session_id, side)
+);
+CREATE TABLE IF NOT EXISTS traces (
+    session_id INTEGER PRIMARY KEY REFERENCES sessions (id),
+    trace BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_agents_agent ON session_agents (agent, opponent, session_id);
+CREATE INDEX IF NOT EXISTS sessions_run ON sessions (run_id);
+CREATE INDEX IF NOT EXISTS sessions_domain ON sessions (domain);
+CREATE INDEX IF NOT EXISTS sessions_domain_size ON sessions (domain_size);
+CREATE INDEX IF NOT EXISTS sessions_finished ON sessions (finished);
+"""
+# settings that only tell the runner where to store results, they are not stored themselves
+STORE_KEYS = ["results_db"]
+
+
+class ResultsStore:
+    """Session summaries, settings and optionally compressed traces of all runs in one SQLite
+    file. Configured with `"results_db": {"path": "results/results.sqlite"}` in the session or
+    tournament settings, add `"traces": True` to also store the traces.
+
+    The database is in WAL mode, so worker processes write their own sessions concurrently
+    while queries read a consistent snapshot. Every session has one row per agent in
+    `session_agents` (agent, opponent, utilities), indexed by agent and opponent, and the
+    sessions are indexed by run, domain, domain size and time, so queries over the history
+    of many runs do not need to read all sessions.
+
+    Args:
+        path (str): SQLite file, created if it does not exist
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # a commit in WAL mode only has to reach the log, not the database file
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def start_run(self, name: str = None, settings: dict = None) -> int:
+        """Add a run (e.g. a tournament) that sessions can be stored under, returns its id."""
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (name, started, settings) VALUES (?, ?, ?)",
+                (name, time.time(), json.dumps(settings) if settings is not None else None),
+            )
+        return cursor.lastrowid
+
+    def add_session(self, run_id: int, settings: dict, summary: dict, trace: dict = None) -> int:
+        """Store a session, with its trace if one is given, returns its id."""
+        settings = {k: v for k, v in settings.items() if k not in STORE_KEYS}
+        profile = settings["profiles"][0]
+        positions = sorted(int(key[6:]) for key in summary if key.startswith("agent_"))[:2]
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO sessions (run_id, finished, domain, domain_size, result, nash_product, social_welfare, "
+                "num_offers, settings, summary) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    time.time(),
+                    Path(profile).parent.name,
+                    domain_size(profile) if Path(profile).exists() else None,
+                    summary["result"],
+                    summary.get("nash_product"),
+                    summary.get("social_welfare"),
+                    summary.get("num_offers"),
+                    json.dumps(settings),
+                    json.dumps(summary),
+                ),
+            )
+            session_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO session_agents (session_id, side, agent, opponent, utility, opponent_utility) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        session_id,
+                        side,
+                        summary[f"agent_{position}"],
+                        summary[f"agent_{other}"],
+                        summary[f"utility_{position}"],
+                        summary[f"utility_{other}"],
+                    )
+                    for side, (position, other) in enumerate([positions, positions[::-1]])
+                ],
+            )
+            if trace is not None:
+                self.connection.execute(
+                    "INSERT INTO traces (session_id, trace) VALUES (?, ?)",
+                    (session_id, zlib.compress(json.dumps(trace).encode())),
+                )
+        return session_id
+
+    def trace(self, session_id: int) -> dict:
+        """Trace of a session, None if it was not stored."""
+        row = self.connection.execute("SELECT trace FROM traces WHERE session_id = ?", (session_id,)).fetchone()
+        return None if row is None else json.loads(zlib.decompress(row["trace"]))
+
+    def query(self, sql: str, parameters=()) -> List[dict]:
+        """Rows of an arbitrary query as dicts."""
+        return [dict(row) for row in self.connection.execute(sql, parameters)]
+
+    def agent_results(
+        self, agent: str, opponent: str = None, min_domain_size: int = None, last_runs: int = None
+    ) -> List[dict]:
+        """Sessions of an agent (class name as in the summaries), optionally only against one
+        opponent, on domains with at least `min_domain_size` bids or in the last `last_runs` runs.
+        """
+        conditions, parameters = ["a.agent = ?"], [agent]
+        if opponent is not None:
+            conditions.append("a.opponent = ?")
+            parameters.append(opponent)
+        if min_domain_size is not None:
+            conditions.append("s.domain_size >= ?")
+            parameters.append(min_domain_size)
+        if last_runs is not None:
+            conditions.append("s.run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)")
+            parameters.append(last_runs)
+        return self.query(
+            "SELECT s.id AS session_id, s.run_id, s.finished, s.domain, s.domain_size, s.result, a.agent, a.opponent, "
+            "a.utility, a.opponent_utility, s.nash_product, s.social_welfare, s.num_offers "
+            "FROM session_agents a JOIN sessions s ON s.id = a.session_id "
+            f"WHERE {' AND '.join(conditions)} ORDER BY s.id",
+            parameters,
+        )
+
+
+def store_session(results_db: dict, settings: dict, summary: dict, trace: dict = None):
+    """Store a session as configured by the `results_db` settings: the `path` of the database,
+    the `run` to store it under (a new run if missing) and whether to keep `traces`."""
+    store = ResultsStore(results_db["path"])
+    try:
+        run_id = results_db.get("run")
+        if run_id is None:
+            run_id = store.start_run("session")
+        store.add_session(run_id, settings, summary, trace if results_db.get("traces", False) else None)
+    finally:
+        store.close()
@@ -1,11 +1,15 @@
+import random
 import shutil
-from collections import defaultdict
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from itertools import permutations
 from math import factorial, prod
 from pathlib import Path
 from typing import Tuple
 
-import pandas as pd
+import numpy as np
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
     LinearAdditiveUtilitySpace,
 )
@@ -20,14 +24,45 @@ from geniusweb.simplerunner.Runner import Runner
 from pyson.ObjectMapper import ObjectMapper
 from uri.uri import URI
 
+from utils.adaptive_sampling import AdaptiveSampler
 from utils.ask_proceed import ask_proceed
+from utils.outcome_metrics import outcome_metrics
+from utils.profile_cache import profile_cache
+from utils.profiler import DEFAULT_PROFILE_DIR, AgentProfiler, write_profile_summary
+from utils.reporting import get_session_reporting
+from utils.results_store import ResultsStore, store_session
+from utils.saop_engine import run_saop_session, summarise_trace
+from utils.scheduler import SessionScheduler
+from utils.session_cache import SessionCache
+from utils.tournament_analytics import SessionTable
+from utils.watchdog import run_session_supervised
+from utils.work_queue import DEFAULT_LEASE_S, WorkQueue
+
+
+def run_session(settings, on_party=None) -> Tuple[dict, dict]:
+    results_trace, results_summary = _start_session(settings, on_party)
+
+    # every process that runs sessions writes them to the results database itself
+    if "results_db" in settings:
+        store_session(settings["results_db"], settings, results_summary, results_trace)
 
+    return results_trace, results_summary
+
+
+def _start_session(settings, on_party=None) -> Tuple[dict, dict]:
+    # run the session in a child process that enforces resource limits on the agents
+    if "limits" in settings:
+        return run_session_supervised(settings)
 
-def run_session(settings) -> Tuple[dict, dict]:
     agents = settings["agents"]
     profiles = settings["profiles"]
     deadline_time_ms = settings["deadline_time_ms"]
 
+    # explicit seed for agents that use the global random generators
+    if "seed" in settings:
+        random.seed(settings["seed"])
+        np.random.seed(settings["seed"])
+
     # quick and dirty checks
     assert isinstance(agents, list) and len(agents) == 2
     assert isinstance(profiles, list) and len(profiles) == 2
@@ -41,6 +76,42 @@ def run_session(settings) -> Tuple[dict, dict]:
                 if not storage_dir.exists():
                     storage_dir.mkdir(parents=True)
 
+    # optionally, agents share parsed profiles instead of parsing them in every session
+    with profile_cache(settings.get("profile_cache", False)):
+        # sample the stacks of the agents to find out where they spend their time
+        if "profile_agents" in settings:
+            with AgentProfiler(settings["profile_agents"], [agent["class"] for agent in agents]):
+                return _run_session(settings, on_party)
+        return _run_session(settings, on_party)
+
+
+def _run_session(settings, on_party=None) -> Tuple[dict, dict]:
+    # optional level gated and buffered logging instead of printing everything to stdout
+    if "reporter" not in settings:
+        return _run_negotiation(settings, StdOutReporter(), on_party)
+
+    reporting = get_session_reporting(settings["reporter"])
+    with reporting.session([agent["class"] for agent in settings["agents"]]):
+        results_trace, results_summary = _run_negotiation(settings, reporting.reporter, on_party)
+
+        # write buffered log messages if something went wrong
+        if results_summary["result"] == "ERROR":
+            reporting.flush()
+
+    return results_trace, results_summary
+
+
+def _run_negotiation(settings, reporter, on_party=None) -> Tuple[dict, dict]:
+    agents = settings["agents"]
+    profiles = settings["profiles"]
+    deadline_time_ms = settings["deadline_time_ms"]
+
+    # run the session without the geniusweb Runner if requested
+    if settings.get("engine", "geniusweb") == "inprocess":
+        results_trace, results_summary = run_session_inprocess(settings, on_party)
+        add_outcome_metrics(results_summary, profiles)
+        return results_trace, results_summary
+
     # file path to uri
     profiles_uri = [f"file:{x}" for x in profiles]
 
@@ -88,7 +159,7 @@ def run_session(settings) -> Tuple[dict, dict]:
     settings_obj = ObjectMapper().parse(settings_full, NegoSettings)
 
     # create the negotiation session runner object
-    runner = Runner(settings_obj, ClassPathConnectionFactory(), StdOutReporter(), 0)
+    runner = Runner(settings_obj, ClassPathConnectionFactory(), reporter, 0)
 
     # run the negotiation session
     runner.run()
@@ -99,10 +170,22 @@ def run_session(settings) -> Tuple[dict, dict]:
 
     # add utilities to the results and create a summary
     results_trace, results_summary = process_results(results_class, results_dict)
+    add_outcome_metrics(results_summary, profiles)
 
     return results_trace, results_summary
 
 
+def run_session_inprocess(settings, on_party=None) -> Tuple[dict, dict]:
+    """Run a session with the lightweight in-process SAOP engine instead of the geniusweb
+    Runner. Selected by setting `"engine": "inprocess"` in the session settings.
+    """
+    utility_funcs = [get_utility_function(f"file:{x}") for x in settings["profiles"]]
+
+    trace = run_saop_session(settings, utility_funcs, on_party)
+
+    return trace.to_dict(), summarise_trace(trace)
+
+
 def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
     # create agent permutations, ensures that every agent plays against every other agent on both sides of a profile set.
     agents = tournament_settings["agents"]
@@ -114,13 +197,21 @@ def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
     )
     if num_sessions > 100:
         message = (
-            f"WARNING: this would run {num_sessions} negotiation sessions. Proceed?"
+            f"WARNING: this would run {'up to ' if 'adaptive' in tournament_settings else ''}"
+            f"{num_sessions} negotiation sessions. Proceed?"
         )
         if not ask_proceed(message):
             print("Exiting script")
             exit()
 
-    tournament_results = []
+    # all sessions of the tournament are stored under one run in the results database
+    results_db = None
+    if "results_db" in tournament_settings:
+        store = ResultsStore(tournament_settings["results_db"]["path"])
+        run_id = store.start_run(tournament_settings["results_db"].get("name"), tournament_settings)
+        store.close()
+        results_db = dict(tournament_settings["results_db"], run=run_id)
+
     tournament_steps = []
     for profiles in profile_sets:
         # quick an dirty check
@@ -132,19 +223,145 @@ def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
                 "profiles": profiles,
                 "deadline_time_ms": deadline_time_ms,
             }
+            for key in ["engine", "reporter", "limits", "seed", "profile_cache"]:
+                if key in tournament_settings:
+                    settings[key] = tournament_settings[key]
+            if results_db:
+                settings["results_db"] = results_db
+            if "profile_agents" in tournament_settings:
+                settings["profile_agents"] = dict(
+                    tournament_settings["profile_agents"], session=f"session_{len(tournament_steps):04d}"
+                )
+            tournament_steps.append(settings)
 
-            # run a single negotiation session
-            _, session_results_summary = run_session(settings)
+    # reuse summaries of sessions that were run before with identical agents, profiles and settings
+    cache = None
+    if "cache" in tournament_settings:
+        cache = SessionCache(tournament_settings["cache"]["dir"])
+
+    if "adaptive" in tournament_settings:
+        # only run sessions until the top-k agents are known with the requested confidence
+        sampler = AdaptiveSampler(agents, tournament_steps, **tournament_settings["adaptive"])
+        batch_size = tournament_settings.get("workers", 1)
+        tournament_results = []
+        while not sampler.finished():
+            batch = [step for step in (sampler.pop() for _ in range(batch_size)) if step is not None]
+            batch_results = run_tournament_steps([settings for _, settings in batch], tournament_settings, cache)
+            for (index, _), session_results_summary in zip(batch, batch_results):
+                sampler.record(index, session_results_summary)
+            tournament_results.extend(batch_results)
+        tournament_steps = [tournament_steps[i] for i in sampler.chosen]
+        print(sampler.report())
+    else:
+        tournament_results = run_tournament_steps(tournament_steps, tournament_settings, cache)
 
-            # assemble results
-            tournament_steps.append(settings)
-            tournament_results.append(session_results_summary)
+    if cache:
+        print(cache.report())
+
+    # hottest functions per agent over all profiled sessions
+    if "profile_agents" in tournament_settings:
+        profile_dir = tournament_settings["profile_agents"].get("dir", DEFAULT_PROFILE_DIR)
+        if Path(profile_dir).exists():
+            write_profile_summary(profile_dir)
+            print(f"agent profiles: {Path(profile_dir, 'hotspots.txt')}")
 
     tournament_results_summary = process_tournament_results(tournament_results)
 
     return tournament_steps, tournament_results, tournament_results_summary
 
 
+def run_tournament_steps(tournament_steps: list, tournament_settings: dict, cache: SessionCache = None) -> list:
+    """Run the sessions of a tournament that are not in the cache, serially or on a pool of
+    `workers` processes, and add their summaries to the cache.
+
+    Returns:
+        list: session summaries in the order of `tournament_steps`
+    """
+    tournament_results = [cache.get(settings) if cache else None for settings in tournament_steps]
+    to_run = [i for i, summary in enumerate(tournament_results) if summary is None]
+    sessions = [tournament_steps[i] for i in to_run]
+
+    workers = tournament_settings.get("workers", 1)
+    if "queue" in tournament_settings:
+        # run sessions on workers on any machine that can reach the queue
+        sessions_results = run_sessions_queued(sessions, tournament_settings["queue"])
+    elif workers > 1:
+        # run sessions in parallel, ordered by the scheduler to reduce the total duration
+        scheduler = SessionScheduler(
+            sessions, tournament_settings.get("duration_history")
+        )
+        sessions_results = run_sessions_parallel(scheduler, workers)
+    else:
+        sessions_results = []
+        for settings in sessions:
+            # run a single negotiation session
+            _, session_results_summary = run_session(settings)
+            sessions_results.append(session_results_summary)
+
+    # sessions from the cache are results of this run as well
+    for i, settings in enumerate(tournament_steps):
+        if tournament_results[i] is not None and "results_db" in settings:
+            store_session(settings["results_db"], settings, tournament_results[i])
+
+    for i, session_results_summary in zip(to_run, sessions_results):
+        tournament_results[i] = session_results_summary
+        if cache:
+            cache.put(tournament_steps[i], session_results_summary)
+
+    return tournament_results
+
+
+def run_sessions_parallel(scheduler: SessionScheduler, workers: int) -> list:
+    """Run all sessions of a scheduler on a pool of worker processes. Only as many
+    sessions as there are workers are submitted at a time, so that the remaining sessions
+    can be reordered based on the durations of the finished ones.
+
+    Returns:
+        list: session summaries in the order of `scheduler.sessions`
+    """
+    results = [None] * len(scheduler.sessions)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = {}
+        while len(scheduler) > 0 or running:
+            while len(scheduler) > 0 and len(running) < workers:
+                index, settings = scheduler.pop()
+                running[executor.submit(_run_session_timed, settings)] = index
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                results[index], duration = future.result()
+                scheduler.record(index, duration)
+
+    scheduler.save_history()
+    return results
+
+
+def run_sessions_queued(sessions: list, queue_settings: dict) -> list:
+    """Publish sessions to a shared work queue and wait until workers posted all results.
+    `local_workers` worker processes are started on this machine, more can be started on
+    any machine with `python -m utils.work_queue <path>`.
+
+    Returns:
+        list: session summaries in the order of `sessions`
+    """
+    work_queue = WorkQueue(queue_settings["path"], queue_settings.get("lease_s", DEFAULT_LEASE_S))
+    queue = work_queue.publish(sessions)
+    command = [sys.executable, "-m", "utils.work_queue", queue_settings["path"], "--lease", str(work_queue.lease_s)]
+    workers = [subprocess.Popen(command) for _ in range(queue_settings.get("local_workers", 0))]
+
+    results = work_queue.wait(queue)
+    for worker in workers:
+        worker.wait()
+    work_queue.close()
+    return results
+
+
+def _run_session_timed(settings) -> Tuple[dict, float]:
+    start = time.perf_counter()
+    _, session_results_summary = run_session(settings)
+    return session_results_summary, time.perf_counter() - start
+
+
 def process_results(results_class: SAOPState, results_dict: dict):
     # dict to translate geniusweb agent reference to Python class name
     agent_translate = {
@@ -208,6 +425,16 @@ def process_results(results_class: SAOPState, results_dict: dict):
     return results_dict, results_summary
 
 
+def add_outcome_metrics(results_summary: dict, profiles: list):
+    """Add distances to the Pareto front, Nash and Kalai points and the efficiency of the
+    outcome to the session summary, if the domain comes with a `specials.json`.
+    """
+    if results_summary["result"] == "ERROR":
+        return
+    utilities = [results_summary["utility_1"], results_summary["utility_2"]]
+    results_summary.update(outcome_metrics(profiles, utilities))
+
+
 def get_utility_function(profile_uri) -> LinearAdditiveUtilitySpace:
     profile_connection = ProfileConnectionFactory.create(
         URI(profile_uri), StdOutReporter()
@@ -219,62 +446,5 @@ def get_utility_function(profile_uri) -> LinearAdditiveUtilitySpace:
 
 
 def process_tournament_results(tournament_results):
-    agent_result_raw = defaultdict(lambda: defaultdict(list))
-    tournament_results_summary = defaultdict(lambda: defaultdict(int))
-    for session_results in tournament_results:
-        agents = {k: v for k, v in session_results.items() if k.startswith("agent")}
-        for agent_id, agent_class in agents.items():
-            agent_result_raw[agent_class]["utility"].append(
-                session_results[f"utility_{agent_id.split('_')[1]}"]
-            )
-            agent_result_raw[agent_class]["nash_product"].append(
-                session_results["nash_product"]
-            )
-            agent_result_raw[agent_class]["social_welfare"].append(
-                session_results["social_welfare"]
-            )
-            if "num_offers" in session_results:
-                agent_result_raw[agent_class]["num_offers"].append(
-                    session_results["num_offers"]
-                )
-            tournament_results_summary[agent_class][session_results["result"]] += 1
-
-    for agent, stats in agent_result_raw.items():
-        num_session = len(stats["utility"])
-        for desc, stat in stats.items():
-            stat_average = sum(stat) / num_session
-            tournament_results_summary[agent][f"avg_{desc}"] = stat_average
-        tournament_results_summary[agent]["count"] = num_session
-
-    column_order = [
-        "avg_utility",
-        "avg_nash_product",
-        "avg_social_welfare",
-        "avg_num_offers",
-        "count",
-        "agreement",
-        "failed",
-        "ERROR",
-    ]
-    column_type = {
-        "count": int,
-        "agreement": int,
-        "failed": int,
-        "ERROR": int,
-    }
-
-    # results dictionary to dataframe
-    tournament_results_summary = pd.DataFrame(tournament_results_summary).T
-
-    # clean data and types
-    tournament_results_summary = tournament_results_summary.fillna(0)
-    for column in column_order:
-        if column not in tournament_results_summary:
-            tournament_results_summary[column] = 0
-    tournament_results_summary = tournament_results_summary.astype(column_type)
-
-    # structure dataframe
-    tournament_results_summary.sort_values("avg_utility", ascending=False, inplace=True)
-    tournament_results_summary = tournament_results_summary[column_order]
-
-    return tournament_results_summary
+    """Per-agent summary DataFrame of the session summaries of a tournament, see `SessionTable.summary`."""
+    return SessionTable.from_summaries(tournament_results).summary()
@@ -0,0 +1,282 @@
+import importlib
+import time
+from array import array
+from datetime import datetime
+from math import prod
+from typing import Callable, List, Tuple
+
+from geniusweb.actions.Accept import Accept
+from geniusweb.actions.Action import Action
+from geniusweb.actions.Offer import Offer
+from geniusweb.actions.PartyId import PartyId
+from geniusweb.inform.ActionDone import ActionDone
+from geniusweb.inform.Agreements import Agreements
+from geniusweb.inform.Finished import Finished
+from geniusweb.inform.Settings import Settings
+from geniusweb.inform.YourTurn import YourTurn
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.DiscreteValue import DiscreteValue
+from geniusweb.party.DefaultParty import DefaultParty
+from geniusweb.progress.ProgressTime import ProgressTime
+from geniusweb.references.Parameters import Parameters
+from geniusweb.references.ProfileRef import ProfileRef
+from geniusweb.references.ProtocolRef import ProtocolRef
+from uri.uri import URI
+
+OFFER, ACCEPT = 0, 1
+
+
+class SessionTrace:
+    """Compact record of the actions in a SAOP session.
+
+    Actor index, action kind, timestamp and the utility of the bid for both
+    parties are kept in flat typed arrays. Bids are stored by reference, the
+    geniusweb-style trace dictionary is only built when `to_dict` is called.
+    """
+
+    def __init__(self, party_ids: List[PartyId], party_refs: List[dict], profiles: List[str]):
+        self.party_ids = party_ids
+        self.party_refs = party_refs
+        self.profiles = profiles
+
+        self.actors = array("B")
+        self.kinds = array("B")
+        self.times_ms = array("d")
+        self.utilities = array("d")  # interleaved, one entry per party per action
+        self.bids: List[Bid] = []
+        self.error: str = None
+
+    def append(self, actor: int, kind: int, bid: Bid, time_ms: float, utilities: Tuple[float, float]):
+        self.actors.append(actor)
+        self.kinds.append(kind)
+        self.times_ms.append(time_ms)
+        self.utilities.extend(utilities)
+        self.bids.append(bid)
+
+    def __len__(self) -> int:
+        return len(self.actors)
+
+    def get_utilities(self, index: int) -> Tuple[float, float]:
+        return self.utilities[2 * index], self.utilities[2 * index + 1]
+
+    def to_dict(self) -> dict:
+        """Build a trace dictionary with the same layout as the JSON serialised `SAOPState`,
+        so that it can be used by `plot_trace` and written to file.
+        """
+        party_names = [str(party_id) for party_id in self.party_ids]
+
+        actions = []
+        for i in range(len(self)):
+            issue_values = {
+                issue: value.getValue() if isinstance(value, DiscreteValue) else str(value)
+                for issue, value in self.bids[i].getIssueValues().items()
+            }
+            action = {
+                "actor": party_names[self.actors[i]],
+                "bid": {"issuevalues": issue_values},
+                "utilities": dict(zip(party_names, self.get_utilities(i))),
+            }
+            actions.append({"Offer" if self.kinds[i] == OFFER else "Accept": action})
+
+        return {
+            "actions": actions,
+            "connections": party_names,
+            "partyprofiles": {
+                name: {"party": party_ref, "profile": profile}
+                for name, party_ref, profile in zip(party_names, self.party_refs, self.profiles)
+            },
+            "error": self.error,
+        }
+
+
+class _PartyConnection:
+    """Minimal stand-in for the geniusweb `ConnectionEnd` of a party. Actions sent by the
+    party are stored so that the engine can pick them up after delivering `YourTurn`.
+    """
+
+    def __init__(self, party_id: PartyId):
+        self.party_id = party_id
+        self.listeners = []
+        self.pending: List[Action] = []
+
+    def send(self, action: Action):
+        self.pending.append(action)
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def close(self):
+        pass
+
+    def getError(self):
+        return None
+
+
+def _load_party_class(class_path: str) -> type:
+    module_name, class_name = class_path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def run_saop_session(settings: dict, utility_funcs: list, on_party: Callable[[int], None] = None) -> SessionTrace:
+    """Run a SAOP negotiation session with both parties in this process.
+
+    The parties are instantiated directly and the `Settings`, `YourTurn`, `ActionDone`
+    and `Finished` messages are delivered by calling `notifyChange`. This skips the
+    settings parsing, connection factories and state serialisation of the geniusweb
+    `Runner`, but follows the same protocol rules: parties take turns, an `Accept`
+    must refer to the last offered bid and the session ends at the deadline.
+
+    Args:
+        settings (dict): session settings as used by `run_session`
+        utility_funcs (list): utility functions of both profiles, used to annotate the trace
+        on_party (Callable[[int], None], optional): called with the index of a party before
+            the engine calls into it and with -1 when the engine continues itself, e.g. to
+            attribute resource usage to agents. Defaults to None.
+
+    Returns:
+        SessionTrace: trace of the actions in the session
+    """
+    agents = settings["agents"]
+    profiles_uri = [f"file:{x}" for x in settings["profiles"]]
+
+    party_ids = []
+    party_refs = []
+    for i, agent in enumerate(agents):
+        party_ids.append(PartyId(f"{agent['class'].split('.')[-1]}_{i + 1}"))
+        party_refs.append(
+            {
+                "partyref": f"pythonpath:{agent['class']}",
+                "parameters": agent.get("parameters", {}),
+            }
+        )
+    trace = SessionTrace(party_ids, party_refs, profiles_uri)
+    if on_party is None:
+        on_party = _ignore_party
+
+    parties: List[DefaultParty] = []
+    try:
+        for i, (agent, party_id) in enumerate(zip(agents, party_ids)):
+            on_party(i)
+            party = _load_party_class(agent["class"])()
+            party.connect(_PartyConnection(party_id))
+            parties.append(party)
+
+        start = time.time() * 1000
+        progress = ProgressTime(settings["deadline_time_ms"], datetime.fromtimestamp(start / 1000))
+        protocol = ProtocolRef(URI("SAOP"))
+        for i, (party, party_id, party_ref, profile_uri) in enumerate(zip(parties, party_ids, party_refs, profiles_uri)):
+            settings_inform = Settings(
+                party_id,
+                ProfileRef(URI(profile_uri)),
+                protocol,
+                progress,
+                Parameters(party_ref["parameters"]),
+            )
+            on_party(i)
+            party.notifyChange(settings_inform)
+
+        agreement = _run_turns(parties, party_ids, progress, start, utility_funcs, trace, on_party)
+    except Exception as e:
+        trace.error = f"{type(e).__name__}: {e}"
+        agreement = None
+
+    if agreement is None:
+        finished = Finished(Agreements())
+    else:
+        finished = Finished(Agreements({party_id: agreement for party_id in party_ids}))
+    for i, party in enumerate(parties):
+        try:
+            on_party(i)
+            party.notifyChange(finished)
+        except Exception as e:
+            if trace.error is None:
+                trace.error = f"{type(e).__name__}: {e}"
+    on_party(-1)
+
+    return trace
+
+
+def _ignore_party(index: int):
+    pass
+
+
+def _run_turns(parties, party_ids, progress, start, utility_funcs, trace: SessionTrace, on_party) -> Bid:
+    last_offer: Bid = None
+    current = 0
+    while True:
+        now = time.time() * 1000
+        if progress.isPastDeadline(now):
+            return None
+
+        connection: _PartyConnection = parties[current].getConnection()
+        on_party(current)
+        parties[current].notifyChange(YourTurn())
+        on_party(-1)
+        if len(connection.pending) != 1:
+            raise ValueError(
+                f"{party_ids[current]} sent {len(connection.pending)} actions in its turn, expected 1"
+            )
+        action = connection.pending.pop()
+        now = time.time() * 1000
+
+        # actions that arrive after the deadline are ignored, as in the geniusweb protocol
+        if progress.isPastDeadline(now):
+            return None
+        if action.getActor() != party_ids[current]:
+            raise ValueError(f"{party_ids[current]} sent an action on behalf of {action.getActor()}")
+
+        if isinstance(action, Offer):
+            kind = OFFER
+            bid = action.getBid()
+            last_offer = bid
+        elif isinstance(action, Accept):
+            kind = ACCEPT
+            bid = action.getBid()
+            if last_offer is None or bid != last_offer:
+                raise ValueError(f"{party_ids[current]} accepted a bid that was not offered last: {bid}")
+        else:
+            raise ValueError(f"{party_ids[current]} sent an unsupported action: {action}")
+
+        if bid is None:
+            raise ValueError(f"Found `None` value in sequence of actions: {action}")
+        utilities = tuple(float(u.getUtility(bid)) for u in utility_funcs)
+        trace.append(current, kind, bid, now - start, utilities)
+
+        action_done = ActionDone(action)
+        for i, party in enumerate(parties):
+            on_party(i)
+            party.notifyChange(action_done)
+        on_party(-1)
+
+        if kind == ACCEPT:
+            return bid
+
+        current = 1 - current
+
+
+def summarise_trace(trace: SessionTrace) -> dict:
+    """Create a session summary with the same keys as `process_results`."""
+    results_summary = {"num_offers": len(trace)}
+
+    if trace.error is not None and len(trace) == 0:
+        utilities_final = [0, 0]
+        result = "ERROR"
+    elif len(trace) > 0 and trace.kinds[-1] == ACCEPT:
+        utilities_final = list(trace.get_utilities(len(trace) - 1))
+        result = "agreement"
+    else:
+        utilities_final = [0, 0]
+        result = "failed"
+
+    for i, party_ref in enumerate(trace.party_refs):
+        results_summary[f"agent_{i + 1}"] = party_ref["partyref"].split(".")[-1]
+        results_summary[f"utility_{i + 1}"] = utilities_final[i]
+    results_summary["nash_product"] = prod(utilities_final)
+    results_summary["social_welfare"] = sum(utilities_final)
+    results_summary["result"] = result
+
+    return results_summary
@@ -0,0 +1,133 @@
+import heapq
+import json
+import math
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Tuple
+
+from utils.outcome_metrics import load_specials
+
+# finished sessions after which all pending sessions are re-prioritised
+DEFAULT_REPRIORITISE_EVERY = 16
+
+
+@lru_cache(maxsize=None)
+def domain_size(profile_file: str) -> int:
+    """Number of bids in the domain of a profile, taken from the `size` field of the
+    `specials.json` of the domain or calculated from the profile itself.
+    """
+    specials = load_specials(str(Path(profile_file).parent))
+    if specials is not None:
+        return specials.size
+
+    with open(profile_file, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    issues_values = profile["LinearAdditiveUtilitySpace"]["domain"]["issuesValues"]
+    return math.prod(len(v["values"]) for v in issues_values.values())
+
+
+class SessionScheduler:
+    """Orders the sessions of a tournament to reduce the makespan of a parallel run.
+
+    The cost of a session is estimated as the domain size multiplied by the average
+    seconds per bid of both agents, learned from earlier sessions (optionally stored in a
+    history file across runs), and capped by the deadline. Sessions are handed out
+    longest-expected-first.
+
+    Every finished session updates the estimates of its agents in constant time. The
+    queue is not rebuilt after every session: the session at the front is re-estimated when
+    it is popped and put back if it is no longer the longest, and all pending sessions are
+    re-prioritised every `reprioritise_every` finished sessions.
+
+    Args:
+        sessions (List[dict]): session settings as used by `run_session`
+        history_file (str, optional): json file with per agent durations of earlier runs.
+            Defaults to None.
+        reprioritise_every (int, optional): finished sessions between full re-prioritisations.
+            Defaults to 16.
+    """
+
+    def __init__(
+        self, sessions: List[dict], history_file: str = None, reprioritise_every: int = DEFAULT_REPRIORITISE_EVERY
+    ):
+        self.sessions = sessions
+        self.history_file = history_file
+        self.reprioritise_every = reprioritise_every
+        # per agent class: [number of sessions, mean seconds per bid]
+        self.rates = defaultdict(lambda: [0, 0.0])
+
+        if history_file is not None and Path(history_file).exists():
+            with open(history_file, "r", encoding="utf-8") as f:
+                for agent_class, rate in json.load(f)["rates"].items():
+                    self.rates[agent_class] = rate
+
+        # number and sum of the rates of agents with sessions, agents without use their mean
+        known = [rate for count, rate in self.rates.values() if count > 0]
+        self.known_count = len(known)
+        self.known_sum = sum(known)
+        self.recorded = 0
+
+        self.pending = set(range(len(sessions)))
+        self.queue = []
+        self._reprioritise()
+
+    def estimate(self, settings: dict) -> float:
+        """Expected duration of a session in seconds."""
+        size = domain_size(settings["profiles"][0])
+        default_rate = self.known_sum / self.known_count if self.known_count else 1.0
+        rates = []
+        for agent in settings["agents"]:
+            count, rate = self.rates[agent["class"]] if agent["class"] in self.rates else (0, 0.0)
+            rates.append(rate if count > 0 else default_rate)
+
+        return min(size * sum(rates) / len(rates), settings["deadline_time_ms"] / 1000)
+
+    def _reprioritise(self):
+        # larger domains first when estimates are equal (e.g. all capped by the deadline)
+        self.queue = [
+            (-self.estimate(self.sessions[i]), -domain_size(self.sessions[i]["profiles"][0]), i)
+            for i in self.pending
+        ]
+        heapq.heapify(self.queue)
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def pop(self) -> Tuple[int, dict]:
+        """Return the index and settings of the session with the largest expected duration."""
+        while True:
+            priority, size, index = heapq.heappop(self.queue)
+            current = -self.estimate(self.sessions[index])
+            # the estimate may be outdated, put the session back if it is no longer the longest
+            if current <= priority or not self.queue or (current, size, index) <= self.queue[0]:
+                break
+            heapq.heappush(self.queue, (current, size, index))
+        self.pending.remove(index)
+        return index, self.sessions[index]
+
+    def record(self, index: int, duration: float):
+        """Update the per agent estimates with the actual duration of a finished session."""
+        settings = self.sessions[index]
+        rate = duration / domain_size(settings["profiles"][0])
+        for agent in settings["agents"]:
+            agent_rate = self.rates[agent["class"]]
+            previous = agent_rate[1]
+            agent_rate[0] += 1
+            agent_rate[1] += (rate - agent_rate[1]) / agent_rate[0]
+            if agent_rate[0] == 1:
+                self.known_count += 1
+                self.known_sum += agent_rate[1]
+            else:
+                self.known_sum += agent_rate[1] - previous
+
+        self.recorded += 1
+        if self.recorded % self.reprioritise_every == 0:
+            self._reprioritise()
+
+    def save_history(self):
+        if self.history_file is None:
+            return
+        Path(self.history_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.history_file, "w", encoding="utf-8") as f:
+            json.dump({"rates": dict(self.rates)}, f, indent=2)
@@ -0,0 +1,164 @@
+import ast
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Tuple
+
+# the shared code in utils/ that agents import, which also contains the session runners
+SHARED_DIRECTORY = str(Path(__file__).parent)
+
+
+@lru_cache(maxsize=None)
+def hash_directory(directory: str) -> str:
+    """Hash of the names and contents of all files in a directory (recursively)."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(directory).rglob("*")):
+        if not path.is_file() or "__pycache__" in path.parts or path.suffix == ".pyc":
+            continue
+        digest.update(str(path.relative_to(directory)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def hash_file(file: str) -> str:
+    return hashlib.sha256(Path(file).read_bytes()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def agent_directory(class_path: str) -> str:
+    """Directory of the module that defines an agent class, found without importing it."""
+    spec = importlib.util.find_spec(class_path.rsplit(".", 1)[0])
+    return str(Path(spec.origin).parent)
+
+
+def _module_directory(name: str) -> str:
+    # directory of a module or package, None if it can not be found
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or spec.origin is None:
+        return None
+    return str(Path(spec.origin).parent)
+
+
+@lru_cache(maxsize=None)
+def imported_directories(directory: str) -> Tuple[str, ...]:
+    """Directories outside `directory` of the `agents` modules that its python files import,
+    found by parsing the files without running them."""
+    root = Path(directory)
+    directories = set()
+    for path in root.rglob("*.py"):
+        if "__pycache__" in path.parts:
+            continue
+        try:
+            tree = ast.parse(path.read_bytes(), str(path))
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                names = [node.module]
+            elif isinstance(node, ast.ImportFrom):
+                # relative import, resolved from the package of the file
+                package = path.parents[node.level - 1]
+                module = package.joinpath(*node.module.split(".")) if node.module else package
+                directories.add(str(module if module.is_dir() else module.parent))
+                continue
+            else:
+                continue
+            for name in names:
+                if name is not None and name.startswith("agents."):
+                    module_directory = _module_directory(name)
+                    if module_directory is not None:
+                        directories.add(module_directory)
+    return tuple(sorted(d for d in directories if not Path(d).resolve().is_relative_to(root.resolve())))
+
+
+def source_directories(directory: str) -> List[str]:
+    """`directory` and all directories it imports agent code from, directly or indirectly."""
+    found, pending = set(), [directory]
+    while pending:
+        current = pending.pop()
+        if current not in found:
+            found.add(current)
+            pending.extend(imported_directories(current))
+    return sorted(found)
+
+
+def session_key(settings: dict) -> str:
+    """Content address of a session: changes whenever the source of one of the agents, the
+    shared `utils` package, one of the profiles, the deadline, the agent parameters, the
+    resource limits or the seed change. The source of an agent is its own directory and
+    the directories of the `agents` modules it imports, directly or indirectly.
+    """
+    key = {
+        "agents": [
+            {
+                "class": agent["class"],
+                "source": [hash_directory(d) for d in source_directories(agent_directory(agent["class"]))],
+                "parameters": agent.get("parameters", {}),
+            }
+            for agent in settings["agents"]
+        ],
+        "shared": hash_directory(SHARED_DIRECTORY),
+        "profiles": [hash_file(profile) for profile in settings["profiles"]],
+        "deadline_time_ms": settings["deadline_time_ms"],
+        "engine": settings.get("engine", "geniusweb"),
+        "limits": settings.get("limits"),
+        "seed": settings.get("seed"),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+class SessionCache:
+    """Opt-in cache of session summaries, stored as one json file per session key in
+    `directory`. Configured with `"cache": {"dir": "results/session_cache"}` in the
+    tournament settings.
+
+    Note that learning agents that read from their `storage_dir` may behave differently
+    in a rerun even if nothing in the key changed, only enable the cache when that is fine.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory.joinpath(key[:2], f"{key}.json")
+
+    def get(self, settings: dict) -> dict:
+        """Return the stored summary of a session, None if it was not run before."""
+        path = self._path(session_key(settings))
+        if path.exists():
+            self.hits += 1
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["summary"]
+        self.misses += 1
+        return None
+
+    def put(self, settings: dict, summary: dict):
+        # sessions that crashed or were stopped are not cached so that they are retried
+        if summary["result"] not in ("agreement", "failed"):
+            return
+        path = self._path(session_key(settings))
+        path.parent.mkdir(exist_ok=True)
+        # write to a temporary file first so that parallel runs never read partial files
+        with tempfile.NamedTemporaryFile("w", dir=path.parent, delete=False, suffix=".tmp", encoding="utf-8") as f:
+            json.dump({"settings": settings, "summary": summary}, f)
+        os.replace(f.name, path)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self) -> str:
+        return f"session cache: {self.hits} hits, {self.misses} misses ({self.hit_rate():.1%} hit rate)"
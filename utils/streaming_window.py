@@ -0,0 +1,115 @@
+from collections import deque
+from typing import List
+
+
+class StreamingWindow:
+    """Statistics over a window of a stream of values (e.g. utilities of received bids)
+    in amortized constant time per update: running sums for the mean, monotonic deques for
+    the maximum and minimum and running sums of a least squares fit for the trend.
+
+    All appended values are kept in `history`, so they are computed only once. The window
+    is `history[start:end]`. With a fixed `size` it always covers the last `size` values,
+    otherwise it is set with `move`. Moving the bounds forward is incremental, moving
+    them backward rebuilds the statistics from the history.
+
+    Values can be floats or Decimals; the sum and mean keep the type of the values.
+
+    Args:
+        size (int, optional): number of most recent values in the window. Defaults to None
+            (the window is the whole history unless it is moved).
+    """
+
+    def __init__(self, size: int = None):
+        self.size = size
+        self.history: List = []
+        self.start = 0
+        self.end = 0
+        self._reset()
+
+    def _reset(self):
+        self._total = 0
+        # float sums of the least squares fit of value against index
+        self._sum_x = self._sum_y = self._sum_xx = self._sum_xy = 0.0
+        # (index, value) pairs with decreasing values for the max, increasing for the min
+        self._max = deque()
+        self._min = deque()
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def append(self, value):
+        """Add a value to the history and to the end of the window."""
+        self.history.append(value)
+        if self.end == len(self.history) - 1:
+            self._push()
+        if self.size is not None:
+            while len(self) > self.size:
+                self._pop()
+
+    def move(self, start: int, end: int):
+        """Set the window to `history[start:end]`."""
+        end = max(0, min(end, len(self.history)))
+        start = max(0, min(start, end))
+        if start < self.start or end < self.end:
+            self.start = self.end = start
+            self._reset()
+        while self.end < end:
+            self._push()
+        while self.start < start:
+            self._pop()
+
+    def _push(self):
+        index, value = self.end, self.history[self.end]
+        self._total += value
+        x, y = float(index), float(value)
+        self._sum_x += x
+        self._sum_y += y
+        self._sum_xx += x * x
+        self._sum_xy += x * y
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+        self.end += 1
+
+    def _pop(self):
+        index, value = self.start, self.history[self.start]
+        self._total -= value
+        x, y = float(index), float(value)
+        self._sum_x -= x
+        self._sum_y -= y
+        self._sum_xx -= x * x
+        self._sum_xy -= x * y
+        if self._max[0][0] == index:
+            self._max.popleft()
+        if self._min[0][0] == index:
+            self._min.popleft()
+        self.start += 1
+
+    def values(self) -> List:
+        return self.history[self.start : self.end]
+
+    def sum(self):
+        return self._total
+
+    def mean(self):
+        """Mean of the window, None if it is empty."""
+        return self._total / len(self) if len(self) else None
+
+    def max(self):
+        """Maximum of the window, None if it is empty."""
+        return self._max[0][1] if self._max else None
+
+    def min(self):
+        """Minimum of the window, None if it is empty."""
+        return self._min[0][1] if self._min else None
+
+    def slope(self) -> float:
+        """Slope of the least squares line through the window (change per value), 0 for less than 2 values."""
+        n = len(self)
+        denominator = n * self._sum_xx - self._sum_x**2
+        if n < 2 or denominator <= 0:
+            return 0.0
+        return (n * self._sum_xy - self._sum_x * self._sum_y) / denominator
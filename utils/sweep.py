@@ -0,0 +1,208 @@
+import math
+import numbers
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from statistics import mean
+from typing import Dict, List, Tuple
+
+from utils.runners import run_session
+
+# settings of the sweep that are passed on to every session
+SESSION_KEYS = ["engine", "reporter", "limits", "seed", "profile_cache"]
+
+
+def grid_configs(search_space: Dict[str, list]) -> List[dict]:
+    """All combinations of the parameter values in the search space."""
+    names = list(search_space.keys())
+    return [dict(zip(names, values)) for values in product(*search_space.values())]
+
+
+def sample_configs(search_space: Dict[str, list], num_configs: int, seed: int = 0) -> List[dict]:
+    """Random configurations from the search space. A parameter is either a list of
+    values to choose from or a `{"min": .., "max": ..}` range that is sampled uniformly.
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(num_configs):
+        config = {}
+        for name, space in search_space.items():
+            if isinstance(space, dict):
+                config[name] = rng.uniform(space["min"], space["max"])
+            else:
+                config[name] = rng.choice(space)
+        configs.append(config)
+    return configs
+
+
+def sweep_tasks(sweep_settings: dict, seed: int = 0) -> List[Tuple[int, int, int]]:
+    """All (opponent, profile set, side) combinations the tuned agent can be evaluated on,
+    in a fixed random order. Every configuration is evaluated on a prefix of this list, so
+    configurations in the same rung are always compared on the same sessions.
+    """
+    tasks = list(
+        product(
+            range(len(sweep_settings["opponents"])),
+            range(len(sweep_settings["profile_sets"])),
+            range(2),
+        )
+    )
+    random.Random(seed).shuffle(tasks)
+    return tasks
+
+
+def _session_settings(sweep_settings: dict, config: dict, task: Tuple[int, int, int]) -> dict:
+    opponent_index, profiles_index, side = task
+    agent = sweep_settings["agent"]
+    parameters = dict(agent.get("parameters", {}))
+    # geniusweb Parameters.getDouble only accepts Python floats, also for integer grid values
+    parameters.update(
+        {k: float(v) if isinstance(v, numbers.Real) and not isinstance(v, bool) else v for k, v in config.items()}
+    )
+    agents = [
+        {"class": agent["class"], "parameters": parameters},
+        sweep_settings["opponents"][opponent_index],
+    ]
+    settings = {
+        "agents": agents if side == 0 else agents[::-1],
+        "profiles": sweep_settings["profile_sets"][profiles_index],
+        "deadline_time_ms": sweep_settings["deadline_time_ms"],
+    }
+    for key in SESSION_KEYS:
+        if key in sweep_settings:
+            settings[key] = sweep_settings[key]
+    return settings
+
+
+def _run_sweep_session(settings: dict, side: int) -> float:
+    _, session_results_summary = run_session(settings)
+    return session_results_summary[f"utility_{side + 1}"]
+
+
+def successive_halving(
+    sweep_settings: dict,
+    configs: List[dict],
+    min_sessions: int,
+    eta: int = 3,
+    executor: ProcessPoolExecutor = None,
+) -> List[dict]:
+    """Evaluate configurations with successive halving.
+
+    All configurations are evaluated on `min_sessions` sessions, only the best `1 / eta`
+    are evaluated further on `eta` times as many sessions, and so on until one
+    configuration is left, which is then evaluated on all sessions. Results of earlier
+    rungs are reused.
+
+    Args:
+        sweep_settings (dict): see `run_sweep`
+        configs (List[dict]): parameter configurations of the tuned agent
+        min_sessions (int): number of sessions in the first rung
+        eta (int, optional): reduction factor between rungs. Defaults to 3.
+        executor (ProcessPoolExecutor, optional): pool to run the sessions on. Defaults to None (serial).
+
+    Returns:
+        List[dict]: per configuration the parameters, the mean utility of the tuned agent, the
+            number of sessions it was evaluated on and whether it survived all rungs, best first
+    """
+    tasks = sweep_tasks(sweep_settings, sweep_settings.get("seed", 0))
+    utilities = [[] for _ in configs]
+    surviving = list(range(len(configs)))
+    budget = min(min_sessions, len(tasks))
+
+    while True:
+        jobs = []
+        for index in surviving:
+            for task in tasks[len(utilities[index]) : budget]:
+                jobs.append((index, _session_settings(sweep_settings, configs[index], task), task[2]))
+
+        if executor is None:
+            results = [_run_sweep_session(settings, side) for _, settings, side in jobs]
+        else:
+            results = executor.map(_run_sweep_session, [j[1] for j in jobs], [j[2] for j in jobs])
+        for (index, _, _), utility in zip(jobs, results):
+            utilities[index].append(utility)
+
+        if budget == len(tasks):
+            break
+
+        surviving.sort(key=lambda i: mean(utilities[i]), reverse=True)
+        surviving = surviving[: max(1, len(surviving) // eta)]
+        # the last remaining configuration is evaluated on all sessions
+        budget = len(tasks) if len(surviving) == 1 else min(budget * eta, len(tasks))
+
+    results = [
+        {
+            "parameters": config,
+            "avg_utility": mean(utility),
+            "sessions": len(utility),
+            "finalist": index in surviving,
+        }
+        for index, (config, utility) in enumerate(zip(configs, utilities))
+    ]
+    results.sort(key=_rank_key, reverse=True)
+    return results
+
+
+def _rank_key(result: dict) -> tuple:
+    # configurations that survived all rungs rank above the ones that were pruned
+    return result["finalist"], result["avg_utility"]
+
+
+def hyperband(sweep_settings: dict, search_space: dict, min_sessions: int, eta: int = 3, executor=None) -> List[dict]:
+    """Hyperband: several successive halving brackets that trade off the number of sampled
+    configurations against the sessions spent on each of them.
+    """
+    max_sessions = len(sweep_tasks(sweep_settings))
+    num_brackets = int(math.log(max(max_sessions // min_sessions, 1), eta)) + 1
+    seed = sweep_settings.get("seed", 0)
+
+    results = []
+    for bracket in reversed(range(num_brackets)):
+        num_configs = int(math.ceil(num_brackets / (bracket + 1) * eta**bracket))
+        configs = sample_configs(search_space, num_configs, seed + bracket)
+        bracket_min_sessions = min_sessions * eta ** (num_brackets - 1 - bracket)
+        results.extend(successive_halving(sweep_settings, configs, bracket_min_sessions, eta, executor))
+
+    results.sort(key=_rank_key, reverse=True)
+    return results
+
+
+def run_sweep(sweep_settings: dict) -> List[dict]:
+    """Search for good parameters of an agent. The parameters are passed to the agent
+    through the `parameters` dict of its settings, as for any other agent parameter.
+
+    sweep_settings:
+        agent (dict): agent to tune, `{"class": ..., "parameters": {...}}` with fixed parameters
+        search_space (dict): per parameter a list of values or a `{"min": .., "max": ..}` range
+        opponents (list): opponent agents, as in the tournament settings
+        profile_sets (list): profile sets, as in the tournament settings
+        deadline_time_ms (int): deadline of every session
+        method (str, optional): "halving" (default) or "hyperband"
+        num_configs (int, optional): number of random configurations for "halving",
+            the full grid is used if omitted (lists only)
+        min_sessions (int, optional): sessions per configuration in the first rung. Defaults to 2.
+        eta (int, optional): reduction factor between rungs. Defaults to 3.
+        workers (int, optional): number of worker processes. Defaults to 1.
+        seed (int, optional): seed for sampling configurations and session order. Defaults to 0.
+
+    Returns:
+        List[dict]: evaluated configurations, best first
+    """
+    search_space = sweep_settings["search_space"]
+    min_sessions = sweep_settings.get("min_sessions", 2)
+    eta = sweep_settings.get("eta", 3)
+    workers = sweep_settings.get("workers", 1)
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if sweep_settings.get("method", "halving") == "hyperband":
+            return hyperband(sweep_settings, search_space, min_sessions, eta, executor)
+
+        if "num_configs" in sweep_settings:
+            configs = sample_configs(search_space, sweep_settings["num_configs"], sweep_settings.get("seed", 0))
+        else:
+            configs = grid_configs(search_space)
+        return successive_halving(sweep_settings, configs, min_sessions, eta, executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,275 @@
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+# per-agent metrics that are derived from the two utilities of a session
+AGENT_METRICS = ["utility", "opponent_utility", "win"]
+# results in the order of the summary columns, other results are appended in order of appearance
+RESULTS = ["agreement", "failed", "ERROR", "timeout", "OOM"]
+# z-scores divide by at least this standard deviation
+MIN_STD = 0.0001
+
+
+class SessionTable:
+    """Session summaries of a tournament as typed arrays, for vectorized analysis.
+
+    The summaries (dicts with `agent_<i>`, `utility_<i>`, `result` and session metrics as
+    made by `run_session`) are parsed once. Agents and results are stored as integer codes
+    into `agent_names` and `result_names`, session metrics that are missing in a summary
+    (e.g. outcome metrics of sessions without a specials file) are NaN.
+
+    Every session gives one observation per agent. Per-agent statistics group these
+    observations with `np.bincount`, so their cost is linear in the number of sessions.
+    Metrics are the session metrics (`nash_product`, `social_welfare`, ...) or one of
+    `AGENT_METRICS`: the utility of the agent, of its opponent and whether it won the
+    session (1 for a higher utility than the opponent, 0.5 for a tie).
+
+    Args:
+        agent_names (List[str]): agent class names, indexed by the agent codes
+        agents (np.ndarray): (sessions, 2) agent codes
+        utilities (np.ndarray): (sessions, 2) final utilities of the agents
+        metrics (Dict[str, np.ndarray]): session metrics, one value per session
+        result_names (List[str]): session results, indexed by the result codes
+        results (np.ndarray): result code per session
+    """
+
+    def __init__(
+        self,
+        agent_names: List[str],
+        agents: np.ndarray,
+        utilities: np.ndarray,
+        metrics: Dict[str, np.ndarray],
+        result_names: List[str],
+        results: np.ndarray,
+    ):
+        self.agent_names = agent_names
+        self.agents = agents
+        self.utilities = utilities
+        self.metrics = metrics
+        self.result_names = result_names
+        self.results = results
+
+    @classmethod
+    def from_summaries(cls, summaries: Iterable[dict]) -> "SessionTable":
+        agent_codes: Dict[str, int] = {}
+        result_codes = {result: i for i, result in enumerate(RESULTS)}
+        agents, utilities, results = [], [], []
+        # session metrics as (session indices, values), most sessions have all of them
+        metrics: Dict[str, Tuple[list, list]] = {}
+        # keys that are not session metrics, the classification is done once per key
+        skipped = set()
+
+        for n, summary in enumerate(summaries):
+            if "agent_1" in summary and "agent_2" in summary:
+                positions = (1, 2)
+            else:
+                # agents are numbered by their position in the session, which may not start at 1
+                positions = sorted(int(key[6:]) for key in summary if key.startswith("agent_"))[:2]
+            for p in positions:
+                name = summary[f"agent_{p}"]
+                code = agent_codes.get(name)
+                if code is None:
+                    code = agent_codes[name] = len(agent_codes)
+                agents.append(code)
+                utilities.append(summary[f"utility_{p}"])
+            result = summary["result"]
+            code = result_codes.get(result)
+            if code is None:
+                code = result_codes[result] = len(result_codes)
+            results.append(code)
+
+            for key, value in summary.items():
+                if key in skipped:
+                    continue
+                if key.startswith(("agent_", "utility_")) or key == "result":
+                    skipped.add(key)
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    if key not in metrics:
+                        metrics[key] = ([], [])
+                    indices, values = metrics[key]
+                    indices.append(n)
+                    values.append(value)
+
+        columns = {}
+        for key, (indices, values) in metrics.items():
+            column = columns[key] = np.full(len(results), np.nan)
+            column[indices] = values
+
+        return cls(
+            agent_names=list(agent_codes),
+            agents=np.array(agents, dtype=np.int32).reshape(-1, 2),
+            utilities=np.array(utilities, dtype=np.float64).reshape(-1, 2),
+            metrics=columns,
+            result_names=list(result_codes),
+            results=np.array(results, dtype=np.int32),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "SessionTable":
+        """Sessions from a `tournament_results.json` or `results_summaries.json` file."""
+        with open(path, "r") as f:
+            return cls.from_summaries(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def select(self, mask: np.ndarray) -> "SessionTable":
+        """Table of the sessions where `mask` is true (or of the given session indices)."""
+        return SessionTable(
+            agent_names=self.agent_names,
+            agents=self.agents[mask],
+            utilities=self.utilities[mask],
+            metrics={key: column[mask] for key, column in self.metrics.items()},
+            result_names=self.result_names,
+            results=self.results[mask],
+        )
+
+    def result_mask(self, *results: str) -> np.ndarray:
+        """Boolean mask of the sessions that ended in one of the given results."""
+        codes = [self.result_names.index(result) for result in results if result in self.result_names]
+        return np.isin(self.results, codes)
+
+    def with_agent(self, agent: str) -> "SessionTable":
+        """Table of the sessions in which `agent` took part."""
+        if agent not in self.agent_names:
+            return self.select(np.zeros(len(self), dtype=bool))
+        return self.select((self.agents == self.agent_names.index(agent)).any(axis=1))
+
+    def observations(self, metric: str = "utility") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Agent codes, opponent codes and values of a metric, one entry per agent per session."""
+        agents = self.agents.ravel()
+        opponents = self.agents[:, ::-1].ravel()
+        if metric == "utility":
+            values = self.utilities.ravel()
+        elif metric == "opponent_utility":
+            values = self.utilities[:, ::-1].ravel()
+        elif metric == "win":
+            difference = self.utilities[:, 0] - self.utilities[:, 1]
+            first = 0.5 + 0.5 * np.sign(difference)
+            values = np.column_stack([first, 1.0 - first]).ravel()
+        else:
+            values = np.repeat(self.metrics[metric], 2)
+        return agents, opponents, values
+
+    def _grouped(self, groups: np.ndarray, values: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # count, sum and sum of squares per group, ignoring missing values
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0.0)
+        count = np.bincount(groups, weights=present, minlength=size)
+        total = np.bincount(groups, weights=values, minlength=size)
+        squares = np.bincount(groups, weights=values * values, minlength=size)
+        return count, total, squares
+
+    def counts(self) -> np.ndarray:
+        """Number of sessions per agent."""
+        return np.bincount(self.agents.ravel(), minlength=len(self.agent_names))
+
+    def result_counts(self) -> np.ndarray:
+        """(agents, results) number of sessions per agent per result code."""
+        groups = self.agents * len(self.result_names) + self.results[:, None]
+        counts = np.bincount(groups.ravel(), minlength=len(self.agent_names) * len(self.result_names))
+        return counts.reshape(len(self.agent_names), len(self.result_names))
+
+    def mean(self, metric: str = "utility") -> np.ndarray:
+        """Mean of a metric per agent, NaN for agents without values."""
+        agents, _, values = self.observations(metric)
+        count, total, _ = self._grouped(agents, values, len(self.agent_names))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return total / count
+
+    def std(self, metric: str = "utility") -> np.ndarray:
+        """Population standard deviation of a metric per agent."""
+        agents, _, values = self.observations(metric)
+        count, total, squares = self._grouped(agents, values, len(self.agent_names))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            return np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+
+    def matrix(self, metric: str = "utility") -> np.ndarray:
+        """(agents, opponents) mean of a metric of the agent against each opponent, NaN
+        for pairs that never met."""
+        size = len(self.agent_names)
+        agents, opponents, values = self.observations(metric)
+        count, total, _ = self._grouped(agents * size + opponents, values, size * size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (total / count).reshape(size, size)
+
+    def win_rates(self) -> np.ndarray:
+        """Fraction of the sessions per agent with a higher utility than the opponent, ties count half."""
+        return self.mean("win")
+
+    def z_scores(self, metric: str = "utility", reference: float = None) -> np.ndarray:
+        """Distance of the mean of a metric per agent to a reference value, in standard deviations
+        of the agent's own values (at least `MIN_STD`). The reference defaults to the mean over
+        all agents."""
+        if reference is None:
+            _, _, values = self.observations(metric)
+            reference = np.nanmean(values)
+        return (self.mean(metric) - reference) / np.maximum(self.std(metric), MIN_STD)
+
+    def bootstrap_ci(
+        self,
+        metric: str = "utility",
+        confidence: float = 0.95,
+        resamples: int = 1000,
+        seed: int = 0,
+        decimals: int = 3,
+        chunk_size: int = 2**22,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Percentile bootstrap confidence interval of the mean of a metric per agent.
+
+        Resampling the n observations of an agent with replacement is the same as drawing how
+        often each distinct value is picked from a multinomial distribution, so the cost of a
+        resample is linear in the number of distinct values instead of in the number of
+        sessions. Values are rounded to `decimals` (None to keep them exact) to bound this
+        number; the rounding changes the mean by at most half a unit in the last decimal.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: lower and upper bound per agent, NaN for agents without values
+        """
+        agents, _, values = self.observations(metric)
+        present = ~np.isnan(values)
+        agents, values = agents[present], values[present]
+        if decimals is not None:
+            values = np.round(values, decimals)
+
+        rng = np.random.default_rng(seed)
+        alpha = (1 - confidence) / 2
+        lower = np.full(len(self.agent_names), np.nan)
+        upper = np.full(len(self.agent_names), np.nan)
+        for agent in np.unique(agents):
+            distinct, frequencies = np.unique(values[agents == agent], return_counts=True)
+            n = frequencies.sum()
+            means = np.empty(resamples)
+            per_chunk = max(1, chunk_size // len(distinct))
+            for start in range(0, resamples, per_chunk):
+                stop = min(start + per_chunk, resamples)
+                picked = rng.multinomial(n, frequencies / n, size=stop - start)
+                means[start:stop] = picked @ distinct / n
+            lower[agent], upper[agent] = np.quantile(means, [alpha, 1 - alpha])
+        return lower, upper
+
+    def summary(self):
+        """Per-agent summary of the tournament as a pandas DataFrame, sorted by average utility:
+        average utility and session metrics, the number of sessions and the number of sessions
+        per result. The timeout and OOM columns are only included if such sessions occurred."""
+        # pandas is slow to import, only load it when a tournament summary is made
+        import pandas as pd
+
+        columns = {"avg_utility": self.mean("utility")}
+        for metric in ["nash_product", "social_welfare", "num_offers", *self.metrics]:
+            if metric in self.metrics:
+                columns[f"avg_{metric}"] = self.mean(metric)
+            elif metric in ["nash_product", "social_welfare", "num_offers"]:
+                columns[f"avg_{metric}"] = np.zeros(len(self.agent_names))
+        columns["count"] = self.counts()
+
+        result_counts = self.result_counts()
+        for code, result in enumerate(self.result_names):
+            if code < 3 or result_counts[:, code].any():
+                columns[result] = result_counts[:, code]
+
+        summary = pd.DataFrame(columns, index=self.agent_names).fillna(0)
+        return summary.sort_values("avg_utility", ascending=False)
@@ -0,0 +1,46 @@
+from time import time
+from typing import Any, Callable, Dict, Hashable
+
+from geniusweb.progress.Progress import Progress
+
+from utils.anytime_search import TurnBudget
+
+
+class TurnContext:
+    """Snapshot of the negotiation state at the start of a turn, created once per turn and
+    passed to the scoring functions. All candidate bids of a turn are scored at the same
+    progress, and derived quantities are computed once instead of per candidate.
+
+    Args:
+        progress (Progress): progress object of the session
+        time_ms (float, optional): time of the snapshot in ms since the epoch. Defaults to now.
+        turn_budget (TurnBudget, optional): starts the turn of the agent's budget, the seconds the
+            searches of this turn may take are in `search_budget_s`. Defaults to None.
+    """
+
+    def __init__(self, progress: Progress, time_ms: float = None, turn_budget: TurnBudget = None):
+        self.time_ms = time() * 1000 if time_ms is None else time_ms
+        self.progress: float = progress.get(self.time_ms)
+        self.search_budget_s: float = None if turn_budget is None else turn_budget.start_turn(progress, self.time_ms)
+        self._cache: Dict[Hashable, Any] = {}
+
+    def cached(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Value of `compute()`, only called the first time `key` is requested in this turn."""
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def time_pressure(self, eps: float) -> float:
+        """Time pressure `1 - progress ** (1 / eps)` as used by the template agent's `score_bid`."""
+        return self.cached(("time_pressure", eps), lambda: 1.0 - self.progress ** (1 / eps))
+
+    def opponent_utility(self, opponent_model, bid) -> float:
+        """Predicted opponent utility of a bid. The normalised issue weights of opponent models
+        that provide `get_issue_weights` (as the template's `OpponentModel`) are computed once per turn.
+        """
+        if opponent_model is None:
+            return 0.0
+        if not hasattr(opponent_model, "get_issue_weights"):
+            return opponent_model.get_predicted_utility(bid)
+        issue_weights = self.cached(("opponent_weights", id(opponent_model)), opponent_model.get_issue_weights)
+        return opponent_model.get_predicted_utility(bid, issue_weights)
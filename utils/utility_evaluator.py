@@ -0,0 +1,88 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
+    LinearAdditiveUtilitySpace,
+)
+
+from utils.compact_bid import CompactBid
+
+# maximum difference with the exact Decimal utility in check mode
+CHECK_TOLERANCE = 1e-9
+
+
+class UtilityEvaluator:
+    """Fast float evaluation of a `LinearAdditiveUtilitySpace`.
+
+    The weighted utility of every value is computed once, so evaluating a bid is a
+    table lookup per issue instead of Decimal arithmetic. Results can differ from
+    `float(profile.getUtility(bid))` in the last bits.
+
+    Args:
+        profile (LinearAdditiveUtilitySpace): profile to evaluate
+        check (bool, optional): compare every result with the exact Decimal utility
+            of the profile and raise an AssertionError on a mismatch, for testing.
+            Defaults to False.
+    """
+
+    def __init__(self, profile: LinearAdditiveUtilitySpace, check: bool = False):
+        self.profile = profile
+        self.check = check
+        domain = profile.getDomain()
+        weights = profile.getWeights()
+        utilities = profile.getUtilities()
+
+        # issues and values in the same order as `BidCodec`
+        self.issues: List[str] = sorted(domain.getIssues())
+        self.tables: List[Dict[Value, float]] = []
+        self.lists: List[List[float]] = []
+        self.arrays: List[np.ndarray] = []
+        for issue in self.issues:
+            value_set = domain.getValues(issue)
+            table = {}
+            for i in range(value_set.size()):
+                value = value_set.get(i)
+                table[value] = float(weights[issue] * utilities[issue].getUtility(value))
+            self.tables.append(table)
+            self.lists.append(list(table.values()))
+            self.arrays.append(np.fromiter(table.values(), dtype=np.float64, count=len(table)))
+
+    def utility(self, bid) -> float:
+        """Utility of a geniusweb `Bid` or `CompactBid`, issues without a value count as 0."""
+        if isinstance(bid, CompactBid):
+            utility = 0.0
+            for values, index in zip(self.lists, bid.indices):
+                utility += values[index]
+        else:
+            issue_values = bid.getIssueValues()
+            utility = 0.0
+            for issue, table in zip(self.issues, self.tables):
+                value = issue_values.get(issue)
+                if value is not None:
+                    utility += table.get(value, 0.0)
+
+        if self.check:
+            self._check(bid, utility)
+        return utility
+
+    def utility_many(self, bids: Iterable) -> np.ndarray:
+        """Utilities of several bids."""
+        return np.fromiter((self.utility(bid) for bid in bids), dtype=np.float64)
+
+    def utility_encoded(self, encoded: np.ndarray) -> np.ndarray:
+        """Utilities of bids encoded as a matrix of value indices, one row per bid and one
+        column per issue, in the order of `BidCodec` (see `CompactBid.indices`).
+        """
+        encoded = np.asarray(encoded)
+        utilities = np.zeros(encoded.shape[0], dtype=np.float64)
+        for column, array in enumerate(self.arrays):
+            utilities += array[encoded[:, column]]
+        return utilities
+
+    def _check(self, bid, utility: float):
+        if isinstance(bid, CompactBid):
+            bid = bid.to_bid()
+        exact = self.profile.getUtility(bid)
+        if abs(float(exact) - utility) > CHECK_TOLERANCE:
+            raise AssertionError(f"fast utility {utility} differs from exact utility {exact} of {bid}")
@@ -0,0 +1,171 @@
+import multiprocessing
+import os
+import time
+from typing import Dict, Tuple
+
+# seconds between two resource measurements of a supervised session
+POLL_INTERVAL = 0.05
+# extra wall time on top of the deadline before a session as a whole is considered hanging
+DEFAULT_GRACE_S = 10.0
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _cpu_time(pid: int) -> float:
+    """User + system CPU time of a process in seconds, read from /proc (Linux only)."""
+    with open(f"/proc/{pid}/stat", "r") as f:
+        # the process name can contain spaces, fields after it are space separated
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+
+
+def _rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/statm", "r") as f:
+        return int(f.read().split()[1]) * _PAGE_SIZE / 2**20
+
+
+class AgentLimits:
+    """Resource limits of the agents in a session, created from the `"limits"` entry of the
+    session or tournament settings:
+
+        "limits": {
+            "wall_time_s": 30,                       # time spent in the agent's own turns and callbacks
+            "cpu_time_s": 20,                        # CPU time used while the agent is active
+            "rss_mb": 2048,                          # memory of the session process while the agent is active
+            "agents": {"MyAgent": {"rss_mb": 4096}}, # per agent class overrides
+        }
+
+    Usage is only attributed to an agent while the in-process engine (`"engine": "inprocess"`)
+    is calling into it. Usage is sampled every `POLL_INTERVAL` seconds and the whole interval
+    since the previous sample is charged to the agent that is active at sample time, so an
+    agent can be charged for up to one interval of work of the engine or the other agent.
+
+    The child process as a whole is also checked against the combined limits of the agents
+    (the sum of their time limits and the largest memory limit), without blaming an agent.
+    This is the only check with the geniusweb Runner, which does not report the active agent.
+    """
+
+    KEYS = ["wall_time_s", "cpu_time_s", "rss_mb"]
+
+    def __init__(self, config: dict, agent_classes: list):
+        self.limits = []
+        for agent_class in agent_classes:
+            limits = {k: config[k] for k in self.KEYS if k in config}
+            limits.update(config.get("agents", {}).get(agent_class.split(".")[-1], {}))
+            self.limits.append(limits)
+
+    def check(self, index: int, wall_time: float, cpu_time: float, rss_mb: float) -> str:
+        """Return "timeout" or "OOM" if the usage of agent `index` exceeds its limits."""
+        limits = self.limits[index]
+        if wall_time > limits.get("wall_time_s", float("inf")):
+            return "timeout"
+        if cpu_time > limits.get("cpu_time_s", float("inf")):
+            return "timeout"
+        if rss_mb > limits.get("rss_mb", float("inf")):
+            return "OOM"
+        return None
+
+    def check_session(self, wall_time: float, cpu_time: float, rss_mb: float) -> str:
+        """Return "timeout" or "OOM" if the usage of the session as a whole exceeds the
+        combined limits of its agents."""
+        if wall_time > sum(limits.get("wall_time_s", float("inf")) for limits in self.limits):
+            return "timeout"
+        if cpu_time > sum(limits.get("cpu_time_s", float("inf")) for limits in self.limits):
+            return "timeout"
+        if rss_mb > max(limits.get("rss_mb", float("inf")) for limits in self.limits):
+            return "OOM"
+        return None
+
+
+def _session_worker(settings: dict, connection, active_party):
+    from utils.runners import run_session
+
+    def on_party(index: int):
+        active_party.value = index
+
+    try:
+        connection.send(run_session(settings, on_party=on_party))
+    except Exception as e:
+        connection.send(e)
+    finally:
+        connection.close()
+
+
+def run_session_supervised(settings: dict) -> Tuple[dict, dict]:
+    """Run a session in a child process that is killed as soon as an agent exceeds its
+    wall-time, CPU-time or memory limit (see `AgentLimits`). The session is then recorded
+    with result "timeout" or "OOM" and the agent that was active is blamed. If the session
+    as a whole exceeds the combined limits, e.g. with the geniusweb Runner, no agent is blamed.
+
+    Args:
+        settings (dict): session settings as used by `run_session`, including `"limits"`
+
+    Returns:
+        Tuple[dict, dict]: session trace and summary, as `run_session`
+    """
+    agent_classes = [agent["class"] for agent in settings["agents"]]
+    limits = AgentLimits(settings["limits"], agent_classes)
+    max_session_s = settings["deadline_time_ms"] / 1000 + settings["limits"].get("grace_s", DEFAULT_GRACE_S)
+
+    # the supervising process stores the result, also when the child is killed
+    child_settings = {k: v for k, v in settings.items() if k not in ("limits", "results_db")}
+    active_party = multiprocessing.Value("i", -1, lock=False)
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_session_worker, args=(child_settings, sender, active_party))
+
+    usage: Dict[int, list] = {i: [0.0, 0.0] for i in range(len(agent_classes))}  # wall, cpu
+    start = last_time = time.perf_counter()
+    process.start()
+    sender.close()
+    last_cpu = 0.0
+
+    violation, blamed = None, None
+    while True:
+        if receiver.poll(POLL_INTERVAL):
+            result = receiver.recv()
+            process.join()
+            if isinstance(result, Exception):
+                raise result
+            return result
+        if not process.is_alive():
+            violation = "ERROR"
+            break
+
+        try:
+            now, cpu, rss = time.perf_counter(), _cpu_time(process.pid), _rss_mb(process.pid)
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        index = active_party.value
+        if index >= 0:
+            usage[index][0] += now - last_time
+            usage[index][1] += cpu - last_cpu
+            violation = limits.check(index, usage[index][0], usage[index][1], rss)
+            if violation is not None:
+                blamed = index
+                break
+        last_time, last_cpu = now, cpu
+
+        # also covers usage that is not attributed to an agent
+        violation = limits.check_session(now - start, cpu, rss)
+        if violation is not None:
+            break
+        if now - start > max_session_s:
+            violation = "timeout"
+            break
+
+    process.kill()
+    process.join()
+    receiver.close()
+
+    results_summary = {"num_offers": 0}
+    for i, agent_class in enumerate(agent_classes):
+        results_summary[f"agent_{i + 1}"] = agent_class.split(".")[-1]
+        results_summary[f"utility_{i + 1}"] = 0
+    results_summary["nash_product"] = 0
+    results_summary["social_welfare"] = 0
+    results_summary["result"] = violation
+    results_summary["blamed_agent"] = None if blamed is None else agent_classes[blamed].split(".")[-1]
+
+    results_trace = {"actions": [], "error": f"session stopped by watchdog: {violation}"}
+    return results_trace, results_summary
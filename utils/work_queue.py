@@ -0,0 +1,235 @@
+"""Durable queue of tournament sessions in a SQLite file, shared by workers on any number of
+machines (e.g. on a shared filesystem). `run_tournament` publishes its sessions when
+`"queue": {"path": ...}` is in the tournament settings and waits for their results. Workers
+claim a session with a lease, renew the lease while it runs and post the summary. Sessions
+of workers that crashed are claimed again once their lease expired. Run workers from the
+root of the repository:
+
+    python -m utils.work_queue results/queue.sqlite              # until all sessions are done
+    python -m utils.work_queue results/queue.sqlite --wait       # keep polling for new sessions
+
+Note that SQLite relies on file locks, which some network filesystems do not implement
+correctly. Use a filesystem with working POSIX locks (or a local disk with several workers).
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    queue TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    settings TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_claim ON sessions (status, lease_until);
+CREATE INDEX IF NOT EXISTS sessions_queue ON sessions (queue, position);
+"""
+DEFAULT_LEASE_S = 600
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL_S = 1.0
+
+
+class WorkQueue:
+    """Sessions in a SQLite file with the states pending, leased, done and failed.
+
+    A claim takes the oldest pending session or a leased one whose lease expired, in a
+    single write transaction, so two workers never hold the same lease. A session that was
+    claimed `max_attempts` times without a result (its workers kept crashing) is marked
+    failed and gets an ERROR summary instead of being retried forever.
+
+    Args:
+        path (str): SQLite file, created if it does not exist
+        lease_s (float, optional): seconds a claim is valid without renewal. Defaults to 600.
+        max_attempts (int, optional): claims of a session before it fails. Defaults to 3.
+    """
+
+    def __init__(self, path: str, lease_s: float = DEFAULT_LEASE_S, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # autocommit mode, transactions are started explicitly
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _write(self, statements):
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent claims are serialised
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self.connection)
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+        return result
+
+    def publish(self, sessions: List[dict], queue: str = None) -> str:
+        """Add sessions to the queue, returns the name to collect their results with."""
+        queue = queue or uuid.uuid4().hex
+        rows = [(queue, position, json.dumps(settings)) for position, settings in enumerate(sessions)]
+        self._write(lambda db: db.executemany("INSERT INTO sessions (queue, position, settings) VALUES (?, ?, ?)", rows))
+        return queue
+
+    def claim(self, worker: str) -> Tuple[int, dict]:
+        """Lease the next session to run, None if there is none."""
+
+        def statements(db):
+            now = time.time()
+            # sessions whose workers crashed too often are not retried
+            failed = db.execute(
+                "SELECT id, settings FROM sessions WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            ).fetchall()
+            for session_id, settings in failed:
+                summary = error_summary(json.loads(settings), "worker lost")
+                db.execute(
+                    "UPDATE sessions SET status = 'failed', summary = ? WHERE id = ?", (json.dumps(summary), session_id)
+                )
+
+            row = db.execute(
+                "SELECT id, settings FROM sessions WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE sessions SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, now + self.lease_s, row[0]),
+            )
+            return row[0], json.loads(row[1])
+
+        return self._write(statements)
+
+    def renew(self, session_id: int, worker: str) -> bool:
+        """Extend the lease of a running session, False if the worker lost it."""
+        cursor = self._write(
+            lambda db: db.execute(
+                "UPDATE sessions SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_s, session_id, worker),
+            )
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, session_id: int, worker: str, summary: dict) -> bool:
+        """Post the summary of a session. A late result of a worker whose lease expired is
+        still accepted if no other worker finished the session first."""
+        cursor = self._write(
+            lambda db: db.execute(
+                "UPDATE sessions SET status = 'done', worker = ?, summary = ? WHERE id = ? AND status != 'done'",
+                (worker, json.dumps(summary), session_id),
+            )
+        )
+        return cursor.rowcount == 1
+
+    def counts(self, queue: str = None) -> dict:
+        """Number of sessions per status, of one queue or of all queues."""
+        query = "SELECT status, COUNT(*) FROM sessions"
+        query, parameters = (query + " WHERE queue = ?", (queue,)) if queue else (query, ())
+        with self._lock:
+            return dict(self.connection.execute(query + " GROUP BY status", parameters).fetchall())
+
+    def results(self, queue: str) -> List[dict]:
+        """Summaries of the sessions of a queue in the order they were published, None if not finished."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT summary FROM sessions WHERE queue = ? ORDER BY position", (queue,)
+            ).fetchall()
+        return [None if summary is None else json.loads(summary) for summary, in rows]
+
+    def wait(self, queue: str, poll_interval_s: float = POLL_INTERVAL_S) -> List[dict]:
+        """Block until all sessions of a queue are done or failed and return their summaries."""
+        while True:
+            counts = self.counts(queue)
+            if not counts.get("pending") and not counts.get("leased"):
+                return self.results(queue)
+            time.sleep(poll_interval_s)
+
+
+def error_summary(settings: dict, error: str) -> dict:
+    """Summary of a session that did not produce a result, as the watchdog makes them."""
+    results_summary = {"num_offers": 0}
+    for i, agent in enumerate(settings["agents"]):
+        results_summary[f"agent_{i + 1}"] = agent["class"].split(".")[-1]
+        results_summary[f"utility_{i + 1}"] = 0
+    results_summary["nash_product"] = 0
+    results_summary["social_welfare"] = 0
+    results_summary["result"] = "ERROR"
+    results_summary["error"] = error
+    return results_summary
+
+
+def run_worker(path: str, lease_s: float = DEFAULT_LEASE_S, wait: bool = False, worker: str = None) -> int:
+    """Claim and run sessions from a queue until all sessions are done (or forever with `wait`).
+
+    Returns:
+        int: number of sessions this worker ran
+    """
+    # imported here, the runners import this module to publish sessions
+    from utils.runners import run_session
+
+    work_queue = WorkQueue(path, lease_s)
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    ran = 0
+    while True:
+        claimed = work_queue.claim(worker)
+        if claimed is None:
+            # leased sessions may still be given back by a crashed worker
+            if not wait and not work_queue.counts().get("leased"):
+                break
+            time.sleep(POLL_INTERVAL_S)
+            continue
+
+        session_id, settings = claimed
+        # renew the lease while the session runs, so only crashed workers lose their sessions
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(lease_s / 3):
+                work_queue.renew(session_id, worker)
+
+        renewer = threading.Thread(target=renew, daemon=True)
+        renewer.start()
+        try:
+            _, summary = run_session(settings)
+        except Exception as e:
+            summary = error_summary(settings, repr(e))
+        finally:
+            stop.set()
+            renewer.join()
+        work_queue.complete(session_id, worker, summary)
+        ran += 1
+
+    work_queue.close()
+    return ran
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run tournament sessions from a shared SQLite work queue.")
+    parser.add_argument("path", help="SQLite file of the queue")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_S, help="seconds a claim is valid without renewal")
+    parser.add_argument("--wait", action="store_true", help="keep polling for new sessions when the queue is empty")
+    parser.add_argument("--worker", help="name of this worker, defaults to <host>:<pid>")
+    args = parser.parse_args()
+
+    ran = run_worker(args.path, args.lease, args.wait, args.worker)
+    print(f"worker finished after {ran} sessions")